@@ -3,12 +3,14 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from src.config.database import get_db
 from src.infrastructure.database.repositories.user_repository import UserRepository
-from src.infrastructure.database.models import User
+from src.infrastructure.database.models import UserStatus
 from src.infrastructure.security.token_provider import JoseJwtTokenProvider
+from src.infrastructure.security.principal_cache import Principal, principal_cache
+from src.config.settings import settings
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -21,16 +23,26 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     email = payload.get("sub")
     if email is None:
         raise credentials_exception
-    
+
+    if settings.auth_stateless_claims:
+        principal = Principal.from_claims(payload)
+        if principal is not None:
+            return principal
+
+    cache_key = principal_cache.key_for(payload)
+    principal = principal_cache.get(cache_key)
+    if principal is not None:
+        return principal
+
     user_repo = UserRepository(db)
     user = user_repo.get_by_email(email)
     if user is None:
         raise credentials_exception
-    return user
-
-from src.infrastructure.database.models import User, UserStatus
+    principal = Principal.from_user(user)
+    principal_cache.put(cache_key, principal, token_exp=payload.get("exp"))
+    return principal
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_active_user(current_user: Principal = Depends(get_current_user)) -> Principal:
     if current_user.status != UserStatus.ACTIVE:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
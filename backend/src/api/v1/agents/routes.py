@@ -5,7 +5,7 @@ from src.application.agents.agent_config_service import AgentConfigService
 from src.infrastructure.database.repositories.agent_repository import AgentRepository
 from src.api.v1.agents.schemas import AgentCreate, AgentResponse
 from src.api.dependencies import get_current_user
-from src.infrastructure.database.models import User
+from src.infrastructure.security.principal_cache import Principal
 from typing import List
 
 router = APIRouter()
@@ -18,7 +18,7 @@ def get_agent_service(db: Session = Depends(get_db)) -> AgentConfigService:
 def create_agent(
     agent_in: AgentCreate,
     agent_service: AgentConfigService = Depends(get_agent_service),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     if not current_user.org_id:
         raise HTTPException(status_code=400, detail="User does not belong to an organization")
@@ -33,7 +33,7 @@ def create_agent(
 @router.get("/", response_model=List[AgentResponse])
 def list_agents(
     agent_service: AgentConfigService = Depends(get_agent_service),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     if not current_user.org_id:
         return []
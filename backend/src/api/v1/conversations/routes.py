@@ -1,16 +1,22 @@
-from fastapi import APIRouter, Depends, Body
-import os
+from fastapi import APIRouter, Depends, Body, Query, Request
 from fastapi.responses import StreamingResponse
 import json
+import logging
+from datetime import datetime
 from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from src.config.database import get_db
+from src.config.database import AsyncSessionLocal, get_async_db
 from src.api.dependencies import get_current_user
-from src.infrastructure.database.models import User
+from src.infrastructure.security.principal_cache import Principal
 from src.application.conversations.service import ConversationService
 from src.infrastructure.llm.provider_service import ProviderService
+from src.infrastructure.llm.retry import llm_deadline
+from src.config.settings import settings
 from src.api.v1.conversations.schemas import ChatHistoryResponse
+from src.api.v1.conversations.streaming import ClientDisconnected, coalesce_chunks, ndjson_frame, sse_frame, sse_frames
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -26,38 +32,12 @@ class ChatRequest(BaseModel):
 @router.post("/chat")
 async def chat(
     body: ChatRequest = Body(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    if body.model and "/" in body.model and body.model.strip().lower() not in {"string", "null", "none"}:
-        os.environ["CHAT_MODEL"] = body.model
-    service = ConversationService(ProviderService.create(user_id=str(current_user.id)))
-    resp = await service.chat(
-        db=db,
-        user_id=str(current_user.id),
-        org_id=current_user.org_id,
-        query=body.query,
-        project_id=body.project_id,
-        framework=body.framework,
-        model=body.model,
-        agent=body.agent,
-        attachment=body.attachment,
-    )
-    return {"response": resp.response}
-
-
-@router.post("/chat/stream")
-async def chat_stream(
-    body: ChatRequest = Body(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    if body.model and "/" in body.model and body.model.strip().lower() not in {"string", "null", "none"}:
-        os.environ["CHAT_MODEL"] = body.model
-    service = ConversationService(ProviderService.create(user_id=str(current_user.id)))
-
-    async def stream_response():
-        async for chunk in service.chat_stream(
+    service = ConversationService(ProviderService.create(user_id=str(current_user.id), chat_model=body.model, org_id=current_user.org_id))
+    with llm_deadline(settings.chat_request_timeout_seconds):
+        resp = await service.chat(
             db=db,
             user_id=str(current_user.id),
             org_id=current_user.org_id,
@@ -67,16 +47,133 @@ async def chat_stream(
             model=body.model,
             agent=body.agent,
             attachment=body.attachment,
-        ):
-            yield json.dumps(chunk.model_dump()) + "\n"
+        )
+    return {"response": resp.response}
+
+
+def _open_chat_stream(body: ChatRequest, current_user: Principal, request: Request):
+    provider = ProviderService.create(user_id=str(current_user.id), chat_model=body.model, org_id=current_user.org_id)
+    # Reject over-quota orgs before the 200 response has started streaming.
+    provider.check_quota()
+    service = ConversationService(provider)
+    user_id = str(current_user.id)
+    org_id = current_user.org_id
+
+    async def chunks(heartbeat_interval: Optional[float] = None):
+        # The session must outlive the handler, so the generator owns it.
+        async with AsyncSessionLocal() as db:
+            with llm_deadline(settings.chat_request_timeout_seconds):
+                source = service.chat_stream(
+                    db=db,
+                    user_id=user_id,
+                    org_id=org_id,
+                    query=body.query,
+                    project_id=body.project_id,
+                    framework=body.framework,
+                    model=body.model,
+                    agent=body.agent,
+                    attachment=body.attachment,
+                )
+                async for chunk in coalesce_chunks(
+                    source,
+                    max_delay=settings.stream_coalesce_ms / 1000,
+                    max_chars=settings.stream_coalesce_max_chars,
+                    heartbeat_interval=heartbeat_interval,
+                    is_disconnected=request.is_disconnected,
+                    disconnect_poll_interval=settings.stream_disconnect_poll_seconds,
+                ):
+                    yield chunk
+
+    return chunks
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    request: Request,
+    body: ChatRequest = Body(...),
+    current_user: Principal = Depends(get_current_user),
+):
+    chunks = _open_chat_stream(body, current_user, request)
+
+    async def stream_response():
+        try:
+            async for chunk in chunks():
+                yield ndjson_frame(chunk)
+        except ClientDisconnected:
+            logger.info("Chat stream client disconnected")
 
     return StreamingResponse(stream_response(), media_type="application/json")
 
+
+@router.post("/chat/sse")
+async def chat_sse(
+    request: Request,
+    body: ChatRequest = Body(...),
+    current_user: Principal = Depends(get_current_user),
+):
+    chunks = _open_chat_stream(body, current_user, request)
+
+    async def event_stream():
+        try:
+            async for chunk in chunks(heartbeat_interval=settings.stream_heartbeat_seconds):
+                for frame in sse_frames(chunk):
+                    yield frame
+        except ClientDisconnected:
+            logger.info("Chat SSE client disconnected")
+            return
+        except Exception as e:
+            logger.error(f"Chat SSE stream failed: {e}")
+            yield sse_frame("error", {"detail": str(e)})
+            return
+        yield sse_frame("done", {})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.get("/history/{project_id}", response_model=ChatHistoryResponse)
-def get_history(
+async def get_history(
+    project_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[str] = Query(None, description="Cursor of the oldest message already loaded"),
+    after: Optional[str] = Query(None, description="Cursor of the newest message already loaded"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    service = ConversationService(ProviderService.create(user_id=str(current_user.id)))
+    return await service.get_chat_history(
+        db=db,
+        org_id=current_user.org_id,
+        project_id=project_id,
+        limit=limit,
+        before=before,
+        after=after,
+    )
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+@router.get("/history/{project_id}/export")
+async def export_history(
     project_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     service = ConversationService(ProviderService.create(user_id=str(current_user.id)))
-    return service.get_chat_history(db=db, org_id=current_user.org_id, project_id=project_id)
+    org_id = current_user.org_id
+
+    async def stream_rows():
+        async with AsyncSessionLocal() as db:
+            async for row in service.iter_chat_history(db=db, org_id=org_id, project_id=project_id):
+                yield json.dumps(row, default=_json_default) + "\n"
+
+    return StreamingResponse(
+        stream_rows(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="chat-history-{project_id}.ndjson"'},
+    )
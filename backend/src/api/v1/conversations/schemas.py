@@ -23,3 +23,9 @@ class ChatHistoryResponse(BaseModel):
     conversation_id: Optional[str] = None
     project_id: str
     messages: List[MessageResponse]
+    # Pass as `before` to fetch the next (older) page.
+    next_cursor: Optional[str] = None
+    # Pass as `after` to fetch messages newer than this page.
+    newer_cursor: Optional[str] = None
+    # Whether the requested direction (older, or newer for `after`) has more pages.
+    has_more: bool = False
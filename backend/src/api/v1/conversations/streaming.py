@@ -0,0 +1,152 @@
+import asyncio
+import json
+import time
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Union
+
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+from src.domain.agents.base import ChatAgentResponse, ToolCallResponse
+
+HEARTBEAT = object()
+_END = object()
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+def dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, default=str)
+    return json.dumps(value, separators=(",", ":"), default=str).encode()
+
+
+async def coalesce_chunks(
+    source: AsyncIterator[ChatAgentResponse],
+    max_delay: float,
+    max_chars: int,
+    heartbeat_interval: Optional[float] = None,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    disconnect_poll_interval: float = 0.5,
+) -> AsyncGenerator[Union[ChatAgentResponse, object], None]:
+    """Merge consecutive text deltas into one frame per `max_delay` seconds or
+    `max_chars` characters; tool events flush pending text and pass through.
+    Yields HEARTBEAT when nothing was sent for `heartbeat_interval` seconds.
+
+    `source` runs in its own task. If `is_disconnected` reports the client
+    gone, that task is cancelled (stopping the provider request) and
+    ClientDisconnected is raised."""
+    queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+
+    async def pump() -> None:
+        try:
+            async for chunk in source:
+                await queue.put(chunk)
+            await queue.put(_END)
+        except Exception as e:
+            await queue.put(e)
+
+    task = asyncio.ensure_future(pump())
+    pending: List[str] = []
+    pending_chars = 0
+    flush_at: Optional[float] = None
+    last_sent = time.monotonic()
+    next_poll = time.monotonic() + disconnect_poll_interval
+    try:
+        while True:
+            now = time.monotonic()
+            if is_disconnected is not None and now >= next_poll:
+                if await is_disconnected():
+                    raise ClientDisconnected()
+                next_poll = now + disconnect_poll_interval
+            deadlines = []
+            if is_disconnected is not None:
+                deadlines.append(next_poll - now)
+            if flush_at is not None:
+                deadlines.append(flush_at - now)
+            if heartbeat_interval:
+                deadlines.append(last_sent + heartbeat_interval - now)
+            timeout = max(0.0, min(deadlines)) if deadlines else None
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                now = time.monotonic()
+                if flush_at is not None and now >= flush_at:
+                    yield ChatAgentResponse(response="".join(pending), tool_calls=[], citations=[])
+                    pending, pending_chars, flush_at = [], 0, None
+                elif heartbeat_interval and now >= last_sent + heartbeat_interval:
+                    yield HEARTBEAT
+                else:
+                    continue
+                last_sent = time.monotonic()
+                continue
+
+            if item is _END or isinstance(item, Exception):
+                if pending:
+                    yield ChatAgentResponse(response="".join(pending), tool_calls=[], citations=[])
+                if isinstance(item, Exception):
+                    raise item
+                return
+
+            if item.response and not item.tool_calls and not item.citations:
+                pending.append(item.response)
+                pending_chars += len(item.response)
+                if flush_at is None:
+                    flush_at = time.monotonic() + max_delay
+                if pending_chars < max_chars:
+                    continue
+                yield ChatAgentResponse(response="".join(pending), tool_calls=[], citations=[])
+                pending, pending_chars, flush_at = [], 0, None
+                last_sent = time.monotonic()
+                continue
+
+            if not item.response and not item.tool_calls and not item.citations:
+                continue
+            if pending:
+                yield ChatAgentResponse(response="".join(pending), tool_calls=[], citations=[])
+                pending, pending_chars, flush_at = [], 0, None
+            yield item
+            last_sent = time.monotonic()
+    finally:
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except BaseException:
+                pass
+
+
+def sse_frame(event: str, data: Dict[str, Any]) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+SSE_HEARTBEAT = b": hb\n\n"
+
+
+def _tool_event(call: ToolCallResponse) -> Dict[str, Any]:
+    return {
+        "id": call.call_id,
+        "type": call.event_type.value,
+        "name": call.tool_name,
+        "msg": call.tool_response,
+        "details": call.tool_call_details,
+    }
+
+
+def sse_frames(chunk: Union[ChatAgentResponse, object]) -> List[bytes]:
+    """Compact SSE events: `delta` {t}, `tool` {id,type,name,msg,details}, `citations` {items}."""
+    if chunk is HEARTBEAT:
+        return [SSE_HEARTBEAT]
+    frames = [sse_frame("tool", _tool_event(call)) for call in chunk.tool_calls]
+    if chunk.response:
+        frames.append(sse_frame("delta", {"t": chunk.response}))
+    if chunk.citations:
+        frames.append(sse_frame("citations", {"items": chunk.citations}))
+    return frames
+
+
+def ndjson_frame(chunk: ChatAgentResponse) -> bytes:
+    return dumps(chunk.model_dump(mode="json")) + b"\n"
@@ -1,16 +1,18 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from src.config.database import get_db
+from src.config.database import get_async_db
 from src.api.dependencies import get_current_user
-from src.infrastructure.database.models import User
-from src.infrastructure.database.repositories.document_repository import DocumentRepository
+from src.infrastructure.database.models import DocumentScope, DocumentStatus, DocumentType
+from src.infrastructure.security.principal_cache import Principal
+from src.infrastructure.database.repositories.document_repository import DocumentFilters, DocumentRepository
+from src.shared.pagination import decode_cursor, encode_cursor
 from src.application.documents.service import DocumentService
 from src.api.v1.documents.schemas import DocumentResponse
 
 router = APIRouter()
 
-def get_document_service(db: Session = Depends(get_db)) -> DocumentService:
+def get_document_service(db: AsyncSession = Depends(get_async_db)) -> DocumentService:
     return DocumentService(DocumentRepository(db))
 
 @router.post("/upload", response_model=DocumentResponse)
@@ -22,8 +24,8 @@ async def upload_document(
     category: Optional[str] = Form(None),
     tags: Optional[str] = Form(None),
     svc: DocumentService = Depends(get_document_service),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     if not current_user.org_id:
         raise Exception("Organization not found")
@@ -51,21 +53,41 @@ async def upload_document(
     return doc
 
 @router.get("/", response_model=List[DocumentResponse])
-def list_documents(
+async def list_documents(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    status: Optional[DocumentStatus] = None,
+    category: Optional[str] = None,
+    file_type: Optional[DocumentType] = None,
+    scope: Optional[DocumentScope] = None,
+    tags: Optional[str] = Query(None, description="Comma separated; documents must carry all of them"),
     svc: DocumentService = Depends(get_document_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     if not current_user.org_id:
         return []
-    return svc.list_by_org(current_user.org_id)
+    filters = DocumentFilters(
+        status=status,
+        category=category,
+        file_type=file_type,
+        scope=scope,
+        tags=[t.strip() for t in tags.split(",") if t.strip()] if tags else [],
+    )
+    docs, has_more = await svc.list_by_org(
+        current_user.org_id, filters=filters, limit=limit, before=decode_cursor(cursor)
+    )
+    if has_more and docs:
+        response.headers["X-Next-Cursor"] = encode_cursor(docs[-1].created_at, docs[-1].id)
+    return docs
 
 @router.get("/{document_id}", response_model=DocumentResponse)
-def get_document(
+async def get_document(
     document_id: str,
     svc: DocumentService = Depends(get_document_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
-    d = svc.get(document_id)
+    d = await svc.get(document_id)
     if not d or d.org_id != current_user.org_id:
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Document not found")
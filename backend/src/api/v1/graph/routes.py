@@ -3,7 +3,7 @@ from uuid import uuid4
 from pathlib import Path
 from typing import Optional, Dict, Any
 from src.api.dependencies import get_current_user
-from src.infrastructure.database.models import User
+from src.infrastructure.security.principal_cache import Principal
 from src.application.graph.service import GraphService
 from src.infrastructure.ingestion.pipeline import run_ingestion
 from src.infrastructure.graph.neo4j_client import get_neo4j_client
@@ -16,7 +16,7 @@ async def test_ingestion_and_graph(
     file: UploadFile = File(...),
     title: Optional[str] = Form(None),
     persist: bool = Form(True),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     # Allow common document types: PDF, DOCX, TXT, MD
     allowed_exts = (".pdf", ".docx", ".txt", ".md")
@@ -59,6 +59,7 @@ async def test_ingestion_and_graph(
             title=title_,
             doc_type=save_ext.lstrip('.') or "pdf",
             content_hash=None, # Service will calculate it
+            org_id=current_user.org_id,
         )
     else:
         # Fallback to direct pipeline run if persist=False
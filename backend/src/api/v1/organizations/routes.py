@@ -8,7 +8,7 @@ from src.api.v1.organizations.schemas import OrgCreate, OrgResponse, OrgUserResp
 from typing import List
 from src.infrastructure.database.repositories.user_repository import UserRepository
 from src.api.dependencies import get_current_user
-from src.infrastructure.database.models import User
+from src.infrastructure.security.principal_cache import Principal
 
 router = APIRouter()
 
@@ -20,7 +20,7 @@ def get_org_service(db: Session = Depends(get_db)) -> OrgService:
 def create_org(
     org_in: OrgCreate, 
     org_service: OrgService = Depends(get_org_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     org = org_service.create_organization(org_in.name)
@@ -35,9 +35,12 @@ def create_org(
         # For now, let's assume it exists or raise error. 
         raise HTTPException(status_code=500, detail="System roles not initialized")
 
-    current_user.org_id = org.id
-    current_user.role_id = admin_role.id
-    db.add(current_user)
+    # current_user is a cached principal; update the row, which also invalidates the cache.
+    user = UserRepository(db).get_by_id(current_user.id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    user.org_id = org.id
+    user.role_id = admin_role.id
     db.commit()
     
     return org
@@ -46,7 +49,7 @@ def create_org(
 @router.get("/me", response_model=OrgResponse)
 def get_my_org(
     org_service: OrgService = Depends(get_org_service),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     if not current_user.org_id:
         raise HTTPException(status_code=404, detail="Organization not found")
@@ -58,7 +61,7 @@ def get_my_org(
 @router.get("/users", response_model=List[OrgUserResponse])
 def list_org_users(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     if not current_user.org_id:
         return []
@@ -69,7 +72,7 @@ def list_org_users(
 def get_org(
     identifier: str,
     org_service: OrgService = Depends(get_org_service),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     org = org_service.get_organization_flexible(identifier)
     if not org:
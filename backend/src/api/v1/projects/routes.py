@@ -6,7 +6,7 @@ from pathlib import Path
 
 from src.config.database import get_db
 from src.api.dependencies import get_current_user
-from src.infrastructure.database.models import User
+from src.infrastructure.security.principal_cache import Principal
 from src.infrastructure.database.repositories.project_repository import ProjectRepository
 from src.infrastructure.database.repositories.project_agent_repository import ProjectAgentRepository
 from src.infrastructure.database.repositories.project_member_repository import ProjectMemberRepository
@@ -75,7 +75,7 @@ async def generate_project_name(description: str, user_id: str) -> str:
 async def create_project(
     project_in: ProjectCreate,
     svc: ProjectService = Depends(get_project_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     if not current_user.org_id:
         raise HTTPException(status_code=400, detail="User does not belong to an organization")
@@ -103,7 +103,7 @@ async def create_project(
 @router.get("/", response_model=List[ProjectResponse])
 def list_projects(
     svc: ProjectService = Depends(get_project_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     if not current_user.org_id:
         return []
@@ -113,7 +113,7 @@ def list_projects(
 def get_project(
     project_id: str,
     svc: ProjectService = Depends(get_project_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     p = svc.get_by_id(project_id)
     if not p or p.org_id != current_user.org_id:
@@ -126,7 +126,7 @@ def update_project(
     update: ProjectUpdate,
     db: Session = Depends(get_db),
     svc: ProjectService = Depends(get_project_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     p = svc.get_by_id(project_id)
     if not p or p.org_id != current_user.org_id:
@@ -146,7 +146,7 @@ def add_agent(
     project_id: str,
     body: ProjectAgentCreate,
     svc: ProjectService = Depends(get_project_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     p = svc.get_by_id(project_id)
     if not p or p.org_id != current_user.org_id:
@@ -158,7 +158,7 @@ def add_agent(
 def list_agents(
     project_id: str,
     svc: ProjectService = Depends(get_project_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     p = svc.get_by_id(project_id)
     if not p or p.org_id != current_user.org_id:
@@ -170,7 +170,7 @@ def add_member(
     project_id: str,
     body: ProjectMemberCreate,
     svc: ProjectService = Depends(get_project_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     p = svc.get_by_id(project_id)
     if not p or p.org_id != current_user.org_id:
@@ -189,7 +189,7 @@ def add_member(
 def list_members(
     project_id: str,
     svc: ProjectService = Depends(get_project_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     p = svc.get_by_id(project_id)
     if not p or p.org_id != current_user.org_id:
@@ -200,7 +200,7 @@ def list_members(
 def list_projects_by_agent(
     agent_id: str,
     svc: ProjectService = Depends(get_project_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     if not current_user.org_id:
         return []
@@ -4,9 +4,10 @@ from sqlalchemy.orm import Session
 
 from src.config.database import get_db
 from src.api.dependencies import get_current_user
-from src.infrastructure.database.models import User
+from src.infrastructure.security.principal_cache import Principal
 
 from src.infrastructure.llm.provider_service import ProviderService
+from src.infrastructure.llm.retry import get_resilience_snapshot
 from src.api.v1.provider.schemas import (
     ProviderInfo,
     SetProviderRequest,
@@ -21,7 +22,7 @@ router = APIRouter()
 @router.get("/list-available-llms/", response_model=List[ProviderInfo])
 async def list_available_llms(
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     try:
         service = ProviderService.create(user_id=user.id)
@@ -33,7 +34,7 @@ async def list_available_llms(
 @router.get("/list-available-models/", response_model=AvailableModelsResponse)
 async def list_available_models(
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     try:
         service = ProviderService.create(user_id=user.id)
@@ -46,7 +47,7 @@ async def list_available_models(
 async def set_global_ai_provider(
     provider_request: SetProviderRequest,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     try:
         service = ProviderService.create(user_id=user.id)
@@ -58,10 +59,16 @@ async def set_global_ai_provider(
 @router.get("/get-global-ai-provider/", response_model=GetProviderResponse)
 async def get_global_ai_provider(
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     try:
         service = ProviderService.create(user_id=user.id)
         return await service.get_global_ai_provider()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting global AI provider: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error getting global AI provider: {str(e)}")
+
+@router.get("/resilience-stats/")
+async def get_resilience_stats(
+    user: Principal = Depends(get_current_user),
+):
+    return {"providers": get_resilience_snapshot()}
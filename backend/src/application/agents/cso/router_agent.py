@@ -74,7 +74,10 @@ class CSORouterAgent(ChatAgent):
     async def _run_classification(self, ctx: ChatContext, agent_descriptions: str) -> ChatAgent:
         prompt = classification_prompt.format(
             query=ctx.query,
-            history=", ".join(message for message in ctx.history),
+            history="\n".join(
+                ([f"summary of earlier turns: {ctx.history_summary}"] if ctx.history_summary else [])
+                + [f"{message.role}: {message.content}" for message in ctx.history]
+            ),
             agent_descriptions=agent_descriptions,
         )
         messages = [
@@ -88,6 +91,7 @@ class CSORouterAgent(ChatAgent):
             classification: ClassificationResponse = await self.llm_provider.call_llm_with_structured_output(
                 messages=messages,
                 output_schema=ClassificationResponse,
+                hedge=True,
             )
             selected_agent_id = classification.agent_id if classification and classification.agent_id in self.agents else "strategy"
             logger.info(
@@ -95,9 +99,6 @@ class CSORouterAgent(ChatAgent):
                 selected_agent_id,
                 getattr(classification, "confidence_score", 0.0) or 0.0,
             )
-            print("CSORouterAgent selected '%s' with confidence %.2f",
-                selected_agent_id,
-                getattr(classification, "confidence_score", 0.0) or 0.0,)
             
         except Exception as e:
             logger.error("Classification error, falling back to strategy agent: %s", e)
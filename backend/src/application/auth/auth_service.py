@@ -4,6 +4,7 @@ from src.domain.auth.hasher import PasswordHasher
 from src.domain.auth.tokens import TokenProvider
 from src.infrastructure.database.models import User
 from fastapi import HTTPException, status
+from src.config.settings import settings
 
 from src.infrastructure.database.repositories.org_repository import OrganizationRepository
 from src.infrastructure.database.models import Organization
@@ -63,7 +64,15 @@ class AuthService:
         return self.user_repo.create(new_user)
 
     def create_token_for_user(self, user: User):
-        access_token = self.token_provider.create(subject=user.email)
+        claims = None
+        if settings.auth_stateless_claims:
+            claims = {
+                "uid": user.id,
+                "org_id": user.org_id,
+                "role_id": user.role_id,
+                "status": user.status.value if user.status else None,
+            }
+        access_token = self.token_provider.create(subject=user.email, claims=claims)
         return {"access_token": access_token, "token_type": "bearer"}
 
     def create_login_response(self, user: User):
@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Iterable, List, Optional, Tuple
+
+from src.config.settings import settings
+from src.infrastructure.vector.quantization import check_mode, quantize, scores
+
+logger = logging.getLogger(__name__)
+
+_TRAILING_PUNCTUATION = " ?!.;:"
+
+# Expected binary score of a query against its own sign vector (E|x| of a unit
+# Gaussian component times sqrt(d)); identical questions rarely score higher.
+BINARY_SCORE_CEILING = math.sqrt(2 / math.pi)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.casefold().split()).rstrip(_TRAILING_PUNCTUATION)
+
+
+def context_fingerprint(match_ids: Iterable[str], node_keys: Iterable[str]) -> str:
+    """Stable hash of what enrichment retrieved; match ids embed the doc version."""
+    h = hashlib.sha256()
+    for value in sorted(match_ids):
+        h.update(b"m:" + value.encode() + b"\0")
+    for value in sorted(node_keys):
+        h.update(b"n:" + value.encode() + b"\0")
+    return h.hexdigest()
+
+
+def _unit(vector: List[float]) -> Tuple[float, ...]:
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return tuple(v / norm for v in vector)
+
+
+@dataclass
+class CacheProbe:
+    org_id: str
+    agent_key: str
+    fingerprint: str
+    vector: List[float]
+    doc_ids: List[str] = field(default_factory=list)
+
+    @property
+    def bucket(self) -> Tuple[str, str, str]:
+        return self.org_id, self.agent_key, self.fingerprint
+
+
+@dataclass
+class CachedAnswer:
+    response: str
+    citations: List[str]
+    doc_ids: frozenset
+    vector: Any  # unit tuple, or (codes, scales) when the cache is quantized
+    expires_at: float
+    similarity: float = 1.0
+
+
+class SemanticAnswerCache:
+    """Answers keyed on (org, agent, retrieved-context fingerprint), matched by query similarity.
+
+    The fingerprint pins the exact segments and graph nodes an answer was built
+    from, so only paraphrases over the same evidence can hit; the similarity
+    threshold decides how close the question itself has to be. With int8 or
+    binary quantization stored vectors shrink 4x/32x (from Python floats,
+    far more). Binary scores top out around BINARY_SCORE_CEILING, so a
+    threshold above it is replaced by `binary_threshold`.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        threshold: float,
+        ttl_seconds: float,
+        max_entries: int,
+        per_bucket: int = 16,
+        quantization: str = "none",
+        binary_threshold: float = 0.76,
+    ):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.per_bucket = per_bucket
+        try:
+            self.quantization = check_mode(quantization)
+        except (ValueError, RuntimeError) as e:
+            logger.error(f"Answer cache quantization disabled: {e}")
+            self.quantization = "none"
+        if self.quantization == "binary" and threshold >= BINARY_SCORE_CEILING:
+            logger.warning(
+                f"Answer cache threshold {threshold:g} is unreachable with binary quantization "
+                f"(scores peak near {BINARY_SCORE_CEILING:.2f}); using {binary_threshold:g}"
+            )
+            self.threshold = binary_threshold
+        self._buckets: "OrderedDict[Tuple[str, str, str], List[CachedAnswer]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _encode(self, vector: List[float]) -> Any:
+        unit = _unit(vector)
+        if self.quantization == "none":
+            return unit
+        codes, row_scales = quantize([unit], self.quantization)
+        return codes, row_scales
+
+    def _similarity(self, query: Tuple[float, ...], encoded: Any) -> float:
+        if self.quantization == "none":
+            return sum(a * b for a, b in zip(query, encoded))
+        codes, row_scales = encoded
+        return float(scores(codes, row_scales, self.quantization, len(query), query)[0])
+
+    def lookup(self, probe: CacheProbe) -> Optional[CachedAnswer]:
+        query = _unit(probe.vector)
+        now = time.monotonic()
+        with self._lock:
+            entries = self._buckets.get(probe.bucket)
+            if not entries:
+                return None
+            live = [e for e in entries if e.expires_at > now]
+            self._size -= len(entries) - len(live)
+            if not live:
+                del self._buckets[probe.bucket]
+                return None
+            self._buckets[probe.bucket] = live
+            self._buckets.move_to_end(probe.bucket)
+            best, best_score = None, self.threshold
+            for entry in live:
+                score = self._similarity(query, entry.vector)
+                if score >= best_score:
+                    best, best_score = entry, score
+        if best is None:
+            return None
+        return CachedAnswer(
+            response=best.response,
+            citations=list(best.citations),
+            doc_ids=best.doc_ids,
+            vector=best.vector,
+            expires_at=best.expires_at,
+            similarity=best_score,
+        )
+
+    def store(self, probe: CacheProbe, response: str, citations: Optional[List[str]] = None) -> None:
+        if not response:
+            return
+        entry = CachedAnswer(
+            response=response,
+            citations=list(citations or []),
+            doc_ids=frozenset(probe.doc_ids),
+            vector=self._encode(probe.vector),
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        with self._lock:
+            entries = self._buckets.setdefault(probe.bucket, [])
+            entries.append(entry)
+            self._size += 1
+            if len(entries) > self.per_bucket:
+                entries.pop(0)
+                self._size -= 1
+            self._buckets.move_to_end(probe.bucket)
+            while self._size > self.max_entries and self._buckets:
+                _, evicted = self._buckets.popitem(last=False)
+                self._size -= len(evicted)
+
+    def invalidate_documents(self, org_id: str, doc_ids: Iterable[str]) -> int:
+        targets = {d for d in doc_ids if d}
+        if not targets:
+            return 0
+        dropped = 0
+        with self._lock:
+            for key in [k for k in self._buckets if k[0] == org_id]:
+                entries = self._buckets[key]
+                kept = [e for e in entries if not (e.doc_ids & targets)]
+                dropped += len(entries) - len(kept)
+                if kept:
+                    self._buckets[key] = kept
+                else:
+                    del self._buckets[key]
+            self._size -= dropped
+        return dropped
+
+    def invalidate_org(self, org_id: str) -> None:
+        with self._lock:
+            for key in [k for k in self._buckets if k[0] == org_id]:
+                self._size -= len(self._buckets.pop(key))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+            self._size = 0
+
+
+async def embed_query(query: str) -> Optional[Tuple[List[float], List[float]]]:
+    """(retrieval vector of the raw query, cache vector of the normalised query), in one embeddings call.
+
+    Retrieval keeps the user's exact wording; only the cache match ignores
+    case, spacing and trailing punctuation.
+    """
+    from src.infrastructure.vector.embedder import embed_texts
+
+    normalized = normalize_query(query)
+    texts = [query] if normalized == query else [query, normalized]
+    try:
+        vectors = await asyncio.to_thread(embed_texts, texts)
+    except Exception as e:
+        logger.warning(f"Answer cache query embedding failed: {e}")
+        return None
+    return vectors[0], vectors[-1]
+
+
+answer_cache = SemanticAnswerCache(
+    enabled=settings.answer_cache_enabled,
+    threshold=settings.answer_cache_similarity_threshold,
+    ttl_seconds=settings.answer_cache_ttl_seconds,
+    max_entries=settings.answer_cache_max_entries,
+    quantization=settings.answer_cache_quantization,
+    binary_threshold=settings.answer_cache_binary_similarity_threshold,
+)
@@ -0,0 +1,214 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.settings import settings
+from src.domain.agents.base import ChatMessage
+from src.infrastructure.database.models.conversations import Conversation, Message, MessageRole
+from src.infrastructure.llm.provider_service import ProviderService
+from src.infrastructure.llm.usage import estimate_tokens, usage_scope
+
+logger = logging.getLogger(__name__)
+
+HISTORY_ROLES = (MessageRole.USER, MessageRole.ASSISTANT)
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an AI strategy assistant. "
+    "Update the existing summary with the new messages. Keep decisions, facts, figures, open questions "
+    "and user preferences; drop pleasantries and repetition. Reply with the updated summary only, "
+    "at most {max_words} words.\n\n"
+    "Existing summary:\n{summary}\n\n"
+    "New messages:\n{messages}"
+)
+
+
+_TRUNCATED = " [truncated]"
+
+
+async def _window_rows(db: AsyncSession, conversation_id: str, token_budget: int, max_turns: int) -> List[Tuple]:
+    """(role, content, created_at, id) of the history window, newest first.
+
+    Stops at `max_turns` messages or `token_budget`; a newest message that
+    alone exceeds the budget is cut down to it rather than sent whole.
+    """
+    result = await db.execute(
+        select(Message.role, Message.content, Message.created_at, Message.id)
+        .where(Message.conversation_id == conversation_id, Message.role.in_(HISTORY_ROLES))
+        .order_by(Message.created_at.desc(), Message.id.desc())
+        .limit(max_turns)
+    )
+    window: List[Tuple] = []
+    used = 0
+    for role, content, created_at, message_id in result.all():
+        if not content:
+            continue
+        cost = estimate_tokens(content)
+        if used + cost > token_budget:
+            if not window:
+                # estimate_tokens counts ~4 characters per token.
+                keep = max(0, token_budget * 4 - len(_TRUNCATED))
+                window.append((role, content[:keep] + _TRUNCATED, created_at, message_id))
+            break
+        used += cost
+        window.append((role, content, created_at, message_id))
+    return window
+
+
+def _fold_batch(rows: List[Tuple], token_budget: int, max_messages: int) -> List[Tuple]:
+    """Leading (role, content, created_at) rows within `max_messages` and `token_budget`.
+
+    An oversized first message is truncated. The batch never ends between
+    messages sharing a created_at, since the watermark is a timestamp and the
+    remainder would otherwise be skipped by the next refresh.
+    """
+    batch: List[Tuple] = []
+    used = 0
+    for role, content, created_at in rows:
+        cost = estimate_tokens(content) if content else 0
+        if len(batch) >= max_messages or (batch and used + cost > token_budget):
+            trimmed = [row for row in batch if row[2] != created_at]
+            return trimmed or batch
+        if cost > token_budget:
+            keep = max(0, token_budget * 4 - len(_TRUNCATED))
+            content, cost = content[:keep] + _TRUNCATED, token_budget
+        used += cost
+        batch.append((role, content, created_at))
+    return batch
+
+
+async def build_history_window(
+    db: AsyncSession,
+    conversation_id: str,
+    token_budget: int,
+    max_turns: int,
+) -> List[ChatMessage]:
+    """Most recent messages in chronological order, within `max_turns` and `token_budget`."""
+    window = await _window_rows(db, conversation_id, token_budget, max_turns)
+    return [ChatMessage(role=role.value, content=content) for role, content, _, _ in reversed(window)]
+
+
+class ConversationSummarizer:
+    """Folds messages that have left the history window into Conversation.summary.
+
+    The window is recomputed with the same turn and token limits the chat
+    path uses, so exactly the messages older than it are summarized.
+    `summary_generated_at` doubles as the watermark: it is the created_at of
+    the newest message already folded into the summary. Each refresh folds
+    at most `batch_messages` messages and `batch_tokens` tokens, oldest
+    first, so a long backlog catches up over several refreshes instead of
+    overflowing the summarisation prompt.
+    """
+
+    def __init__(
+        self,
+        window_turns: int,
+        token_budget: int,
+        min_new_messages: int,
+        max_words: int,
+        batch_messages: int = 100,
+        batch_tokens: int = 8000,
+    ):
+        self.window_turns = window_turns
+        self.token_budget = token_budget
+        self.min_new_messages = min_new_messages
+        self.max_words = max_words
+        self.batch_messages = batch_messages
+        self.batch_tokens = batch_tokens
+        self._in_flight: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def schedule(self, conversation_id: str) -> None:
+        if conversation_id in self._in_flight:
+            return
+        self._in_flight.add(conversation_id)
+        task = asyncio.get_running_loop().create_task(self._refresh_guarded(conversation_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh_guarded(self, conversation_id: str) -> None:
+        try:
+            await self.refresh(conversation_id)
+        except Exception as e:
+            logger.error(f"Conversation summary refresh failed for {conversation_id}: {e}")
+        finally:
+            self._in_flight.discard(conversation_id)
+
+    async def _pending(self, conversation_id: str) -> Optional[Tuple[Dict[str, Optional[str]], List[Tuple]]]:
+        from src.config.database import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as db:
+            conv = (
+                await db.execute(
+                    select(
+                        Conversation.org_id,
+                        Conversation.project_id,
+                        Conversation.summary,
+                        Conversation.summary_generated_at,
+                    ).where(Conversation.id == conversation_id)
+                )
+            ).first()
+            if conv is None:
+                return None
+            window = await _window_rows(db, conversation_id, self.token_budget, self.window_turns)
+            if not window:
+                return None
+            _, _, oldest_at, oldest_id = window[-1]
+            query = select(Message.role, Message.content, Message.created_at).where(
+                Message.conversation_id == conversation_id,
+                Message.role.in_(HISTORY_ROLES),
+                tuple_(Message.created_at, Message.id) < tuple_(oldest_at, oldest_id),
+            )
+            if conv.summary_generated_at is not None:
+                query = query.where(Message.created_at > conv.summary_generated_at)
+            rows = (
+                await db.execute(query.order_by(Message.created_at.asc(), Message.id.asc()).limit(self.batch_messages + 1))
+            ).all()
+            meta = {"org_id": conv.org_id, "project_id": conv.project_id, "summary": conv.summary}
+            return meta, rows
+
+    async def _store(self, conversation_id: str, summary: str, watermark) -> None:
+        from src.config.database import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Conversation)
+                .where(Conversation.id == conversation_id)
+                .values(summary=summary, summary_generated_at=watermark)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+    async def refresh(self, conversation_id: str) -> None:
+        pending = await self._pending(conversation_id)
+        if pending is None:
+            return
+        meta, rows = pending
+        if len(rows) < self.min_new_messages:
+            return
+        batch = _fold_batch(rows, self.batch_tokens, self.batch_messages)
+        if not batch:
+            return
+        transcript = "\n".join(f"{role.value}: {content}" for role, content, _ in batch if content)
+        prompt = SUMMARY_PROMPT.format(
+            max_words=self.max_words,
+            summary=meta["summary"] or "(none yet)",
+            messages=transcript,
+        )
+        provider = ProviderService.create(user_id="system", org_id=meta["org_id"])
+        with usage_scope(org_id=meta["org_id"], project_id=meta["project_id"], conversation_id=conversation_id):
+            summary = await provider.call_llm([{"role": "user", "content": prompt}], config_type="inference")
+        if summary:
+            await self._store(conversation_id, summary.strip(), batch[-1][2])
+
+
+conversation_summarizer = ConversationSummarizer(
+    window_turns=settings.history_max_turns,
+    token_budget=settings.history_token_budget,
+    min_new_messages=settings.history_summary_min_new_messages,
+    max_words=settings.history_summary_max_words,
+    batch_messages=settings.history_summary_batch_messages,
+    batch_tokens=settings.history_summary_batch_tokens,
+)
@@ -1,57 +1,241 @@
-from typing import AsyncGenerator, List, Optional
-import os
-from sqlalchemy.orm import Session
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncGenerator, List, Optional, Tuple
+from sqlalchemy import and_, false, func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 from src.infrastructure.database.models.projects import Project, ProjectAgent, AgentRoleInProject
 from src.infrastructure.database.models.agents import Agent
 from src.infrastructure.database.models.conversations import Message, Conversation, MessageRole, MessageStatus
 from src.infrastructure.llm.provider_service import ProviderService
+from src.infrastructure.llm.usage import UsageScope, usage_scope
 from src.application.agents.executer_agent import ExecuterAgent
-from src.domain.agents.base import AgentConfig, TaskConfig, ChatContext, ChatAgentResponse
+from src.domain.agents.base import AgentConfig, TaskConfig, ChatContext, ChatAgentResponse, ChatMessage
+from src.application.conversations.history import build_history_window, conversation_summarizer
+from src.application.conversations.answer_cache import CacheProbe, CachedAnswer, answer_cache, embed_query
+from src.infrastructure.observability.metrics import ANSWER_CACHE_REQUESTS
+from src.config.settings import settings
+from src.shared.pagination import decode_cursor, encode_cursor
+
+# Only what the history UI renders; skips token/feedback/metadata columns.
+HISTORY_COLUMNS = (
+    Message.id,
+    Message.conversation_id,
+    Message.project_id,
+    Message.org_id,
+    Message.role,
+    Message.user_id,
+    Message.agent_id,
+    Message.content,
+    Message.status,
+    Message.attachments,
+    Message.created_at,
+)
 
 class ConversationService:
     def __init__(self, provider: ProviderService):
         self.provider = provider
 
-    def _resolve_agent(self, db: Session, project: Optional[Project], org_id: str, agent_hint: Optional[str]) -> Optional[Agent]:
+    async def _load_chat_target(
+        self, db: AsyncSession, project_id: Optional[str], org_id: str, agent_hint: Optional[str]
+    ) -> Tuple[Optional[Project], Optional[Agent], Optional[Conversation]]:
+        """Project, agent and conversation for a chat turn in one round-trip."""
+        if not project_id:
+            return None, None, None
+        primary_link = aliased(ProjectAgent)
+        primary_agent = aliased(Agent)
+        hinted_agent = aliased(Agent)
+        query = (
+            select(Project, Conversation, primary_agent, hinted_agent)
+            .outerjoin(Conversation, Conversation.project_id == Project.id)
+            .outerjoin(
+                primary_link,
+                and_(primary_link.project_id == Project.id, primary_link.role == AgentRoleInProject.PRIMARY),
+            )
+            .outerjoin(primary_agent, primary_agent.id == primary_link.agent_id)
+            .outerjoin(hinted_agent, hinted_agent.id == agent_hint if agent_hint else false())
+            .where(Project.id == project_id)
+            .order_by(Conversation.created_at.asc())
+            .limit(1)
+        )
+        row = (await db.execute(query)).first()
+        if row is None:
+            return None, None, None
+        project, conv, primary, hinted = row
+        return project, hinted or primary, conv
+
+    async def _resolve_agent(self, db: AsyncSession, org_id: str, agent_hint: Optional[str]) -> Optional[Agent]:
         if agent_hint:
-            a = db.query(Agent).filter(Agent.id == agent_hint).first()
+            a = (await db.execute(select(Agent).where(Agent.id == agent_hint))).scalars().first()
             if a:
                 return a
-        if project:
-            pa = db.query(ProjectAgent).filter(ProjectAgent.project_id == project.id, ProjectAgent.role == AgentRoleInProject.PRIMARY).first()
-            if pa:
-                a = db.query(Agent).filter(Agent.id == pa.agent_id).first()
-                if a:
-                    return a
-        a = db.query(Agent).filter(Agent.org_id == org_id).first()
-        return a
-
-    def _build_history(self, db: Session, project_id: Optional[str]) -> List[str]:
-        if not project_id:
-            return []
-        msgs = (
-            db.query(Message)
-            .filter(Message.project_id == project_id)
-            .order_by(Message.created_at.asc())
-            .limit(20)
-            .all()
+        return (await db.execute(select(Agent).where(Agent.org_id == org_id).limit(1))).scalars().first()
+
+    async def _build_history(self, db: AsyncSession, conv: Conversation) -> List[ChatMessage]:
+        return await build_history_window(
+            db,
+            conv.id,
+            token_budget=settings.history_token_budget,
+            max_turns=settings.history_max_turns,
+        )
+
+    async def _prepare_turn(
+        self, db: AsyncSession, org_id: str, project_id: Optional[str], agent_hint: Optional[str]
+    ) -> Tuple[Optional[Agent], Conversation, bool, List[ChatMessage]]:
+        project, resolved_agent, conv = await self._load_chat_target(db, project_id, org_id, agent_hint)
+        if resolved_agent is None:
+            resolved_agent = await self._resolve_agent(db, org_id, agent_hint)
+        is_new = False
+        if conv is None:
+            if project is not None:
+                # Inserted together with the first two messages once the reply is ready.
+                conv = Conversation(id=str(uuid.uuid4()), project_id=project.id, org_id=org_id, title="Conversation", message_count=0)
+                is_new = True
+            else:
+                conv = (await db.execute(select(Conversation).where(Conversation.org_id == org_id).limit(1))).scalars().first()
+                if conv is None:
+                    raise RuntimeError("conversation requires a valid project")
+        history = [] if is_new else await self._build_history(db, conv)
+        # End the read transaction so no pooled connection is held while the LLM runs.
+        await db.commit()
+        return resolved_agent, conv, is_new, history
+
+    async def _persist_turn(
+        self,
+        db: AsyncSession,
+        conv: Conversation,
+        is_new: bool,
+        user_msg: Message,
+        ai_msg: Message,
+    ) -> None:
+        now = datetime.now(timezone.utc)
+        ai_msg.created_at = now
+        tokens = ai_msg.total_tokens or 0
+        cost = ai_msg.cost_usd or 0
+        try:
+            if is_new:
+                is_new = await self._claim_new_conversation(db, conv, user_msg, ai_msg)
+            if is_new:
+                conv.message_count = 2
+                conv.last_message_at = now
+                conv.total_tokens_used = tokens
+                conv.total_cost_usd = cost
+                db.add(conv)
+            else:
+                await db.execute(
+                    update(Conversation)
+                    .where(Conversation.id == conv.id)
+                    .values(
+                        message_count=func.coalesce(Conversation.message_count, 0) + 2,
+                        last_message_at=now,
+                        total_tokens_used=func.coalesce(Conversation.total_tokens_used, 0) + tokens,
+                        total_cost_usd=func.coalesce(Conversation.total_cost_usd, 0) + cost,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            db.add_all([user_msg, ai_msg])
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+    async def _claim_new_conversation(self, db: AsyncSession, conv: Conversation, *messages: Message) -> bool:
+        """Whether `conv` should still be inserted as the project's first conversation.
+
+        The project row lock serialises first turns: a concurrent first turn
+        that committed while the LLM ran is found here, and this turn's
+        messages (and `conv.id`) are moved onto that conversation instead.
+        """
+        await db.execute(select(Project.id).where(Project.id == conv.project_id).with_for_update())
+        existing = (
+            await db.execute(
+                select(Conversation.id)
+                .where(Conversation.project_id == conv.project_id)
+                .order_by(Conversation.created_at.asc())
+                .limit(1)
+            )
+        ).scalar()
+        if existing is None:
+            return True
+        conv.id = existing
+        for msg in messages:
+            msg.conversation_id = existing
+        return False
+
+    def _new_user_message(self, conv: Conversation, org_id: str, user_id: str, query: str, attachment: Optional[str]) -> Message:
+        return Message(
+            id=str(uuid.uuid4()),
+            conversation_id=conv.id,
+            project_id=conv.project_id,
+            org_id=org_id,
+            role=MessageRole.USER,
+            user_id=user_id,
+            content=query,
+            status=MessageStatus.SENT,
+            attachments=[attachment] if attachment else [],
+            # Set explicitly: both rows share one transaction, so server now() would tie.
+            created_at=datetime.now(timezone.utc),
+        )
+
+    def _apply_usage(self, msg: Message, scope: UsageScope, started: float) -> None:
+        msg.prompt_tokens = scope.prompt_tokens
+        msg.completion_tokens = scope.completion_tokens
+        msg.total_tokens = scope.total_tokens
+        msg.cost_usd = scope.cost_usd
+        msg.response_time_ms = int((time.monotonic() - started) * 1000)
+        answer = next((r for r in reversed(scope.records) if r.endpoint.startswith("agent_")), None)
+        if answer is not None:
+            msg.llm_provider = answer.provider
+            msg.llm_model = answer.model
+            msg.time_to_first_token_ms = answer.time_to_first_token_ms
+        scope.message_id = msg.id
+
+    @staticmethod
+    def _agent_key(agent_id: Optional[str], framework: Optional[str], model: Optional[str]) -> str:
+        return f"{agent_id or '-'}|{(framework or 'pydantic').lower()}|{model or '-'}"
+
+    @staticmethod
+    def _cache_metadata(hit: Optional[CachedAnswer]) -> dict:
+        if hit is None:
+            return {}
+        return {"answer_cache": {"hit": True, "similarity": round(hit.similarity, 4)}}
+
+    async def _enrich(
+        self,
+        org_id: str,
+        user_id: str,
+        query: str,
+        project_id: Optional[str],
+        agent_key: str,
+        attachment: Optional[str],
+        history: List[ChatMessage],
+    ) -> Tuple[str, Optional[CacheProbe], Optional[CachedAnswer]]:
+        """Enriched prompt, plus the answer cache probe and hit when the cache applies."""
+        # Enrich the query with Reasoning (Neo4j + Pinecone)
+        from src.application.reasoning.pipeline import enrich_context
+
+        vectors = None
+        # Attachments and earlier turns change the answer but not the retrieval
+        # fingerprint, so only standalone questions are cached.
+        if answer_cache.enabled and not attachment and not history:
+            vectors = await embed_query(query)
+        enriched = await enrich_context(
+            query, user_id=user_id, query_vector=vectors[0] if vectors else None, org_id=org_id, project_id=project_id
         )
-        return [m.content for m in msgs if m.content]
-
-    def _get_or_create_conversation(self, db: Session, project: Optional[Project], org_id: str) -> Conversation:
-        if project:
-            conv = db.query(Conversation).filter(Conversation.project_id == project.id).first()
-            if conv:
-                return conv
-            conv = Conversation(project_id=project.id, org_id=org_id, title="Conversation")
-            db.add(conv)
-            db.commit()
-            db.refresh(conv)
-            return conv
-        conv = db.query(Conversation).filter(Conversation.org_id == org_id).first()
-        if conv:
-            return conv
-        raise RuntimeError("conversation requires a valid project")
+        if vectors is None:
+            return enriched.prompt, None, None
+        probe = CacheProbe(
+            org_id=org_id,
+            agent_key=agent_key,
+            fingerprint=enriched.fingerprint,
+            vector=vectors[1],
+            doc_ids=enriched.doc_ids,
+        )
+        hit = answer_cache.lookup(probe)
+        ANSWER_CACHE_REQUESTS.labels(result="hit" if hit is not None else "miss").inc()
+        return enriched.prompt, probe, hit
 
     def _build_agent_config(self, agent: Optional[Agent]) -> AgentConfig:
         role = agent.display_name if agent and agent.display_name else "General Agent"
@@ -71,7 +255,7 @@ class ConversationService:
 
     async def chat(
         self,
-        db: Session,
+        db: AsyncSession,
         user_id: str,
         org_id: str,
         query: str,
@@ -81,51 +265,63 @@ class ConversationService:
         agent: Optional[str],
         attachment: Optional[str],
     ) -> ChatAgentResponse:
-        # Do not override global model here; routing layer handles model selection safely
-        project = db.query(Project).filter(Project.id == project_id).first() if project_id else None
-        history = self._build_history(db, project_id)
-        resolved_agent = self._resolve_agent(db, project, org_id, agent)
-        conv = self._get_or_create_conversation(db, project, org_id)
-        user_msg = Message(
-            conversation_id=conv.id,
-            project_id=conv.project_id,
-            org_id=org_id,
-            role=MessageRole.USER,
-            user_id=user_id,
-            content=query,
-            status=MessageStatus.SENT,
-            attachments=[attachment] if attachment else [],
-        )
-        db.add(user_msg)
-        db.commit()
-        db.refresh(user_msg)
+        # `model` is a request-scoped override; it never touches process-wide defaults
+        resolved_agent, conv, is_new, history = await self._prepare_turn(db, org_id, project_id, agent)
+        user_msg = self._new_user_message(conv, org_id, user_id, query, attachment)
         config = self._build_agent_config(resolved_agent)
-        
-        # Enrich the query with Reasoning (Neo4j + Pinecone)
-        from src.application.reasoning.pipeline import context_enrich
-        # We pass attachment as doc_id if it exists
-        enriched_query = await context_enrich(query, user_id=user_id)
-        
-        ctx = ChatContext(project_id=project_id or "default", history=history, query=enriched_query, additional_context=attachment or "")
-        agent_runner = ExecuterAgent(self.provider, config, framework=framework or "pydantic")
-        resp = await agent_runner.run(ctx)
-        ai_msg = Message(
-            conversation_id=conv.id,
-            project_id=conv.project_id,
-            org_id=org_id,
-            role=MessageRole.ASSISTANT,
-            agent_id=resolved_agent.id if resolved_agent else None,
-            content=resp.response,
-            status=MessageStatus.SENT,
-        )
-        db.add(ai_msg)
-        db.commit()
-        db.refresh(ai_msg)
+        agent_id = resolved_agent.id if resolved_agent else None
+        started = time.monotonic()
+        with usage_scope(org_id=org_id, project_id=conv.project_id, user_id=user_id, agent_id=agent_id, conversation_id=conv.id) as scope:
+            try:
+                enriched_query, probe, hit = await self._enrich(
+                    org_id,
+                    user_id,
+                    query,
+                    conv.project_id,
+                    self._agent_key(agent_id, framework, model),
+                    attachment,
+                    history,
+                )
+                if hit is not None:
+                    resp = ChatAgentResponse(response=hit.response, tool_calls=[], citations=hit.citations)
+                else:
+                    ctx = ChatContext(
+                        project_id=project_id or "default",
+                        history=history,
+                        history_summary=conv.summary or "",
+                        query=enriched_query,
+                        additional_context=attachment or "",
+                    )
+                    agent_runner = ExecuterAgent(self.provider, config, framework=framework or "pydantic", model=model)
+                    resp = await agent_runner.run(ctx)
+                ai_msg = Message(
+                    id=str(uuid.uuid4()),
+                    conversation_id=conv.id,
+                    project_id=conv.project_id,
+                    org_id=org_id,
+                    role=MessageRole.ASSISTANT,
+                    agent_id=agent_id,
+                    content=resp.response,
+                    status=MessageStatus.SENT,
+                    metadata_=self._cache_metadata(hit),
+                )
+                self._apply_usage(ai_msg, scope, started)
+                await self._persist_turn(db, conv, is_new, user_msg, ai_msg)
+                scope.conversation_id = conv.id
+                if probe is not None and hit is None:
+                    answer_cache.store(probe, resp.response, resp.citations)
+            except BaseException:
+                # Nothing was written; keep the usage rows FK-safe.
+                scope.message_id = None
+                if is_new:
+                    scope.conversation_id = None
+                raise
+        conversation_summarizer.schedule(conv.id)
         return resp
 
     async def chat_stream(
         self,
-        db: Session,
+        db: AsyncSession,
         user_id: str,
         org_id: str,
         query: str,
@@ -135,65 +331,149 @@ class ConversationService:
         agent: Optional[str],
         attachment: Optional[str],
     ) -> AsyncGenerator[ChatAgentResponse, None]:
-        # Do not override global model here; routing layer handles model selection safely
-        project = db.query(Project).filter(Project.id == project_id).first() if project_id else None
-        history = self._build_history(db, project_id)
-        resolved_agent = self._resolve_agent(db, project, org_id, agent)
-        conv = self._get_or_create_conversation(db, project, org_id)
-        user_msg = Message(
-            conversation_id=conv.id,
-            project_id=conv.project_id,
-            org_id=org_id,
-            role=MessageRole.USER,
-            user_id=user_id,
-            content=query,
-            status=MessageStatus.SENT,
-            attachments=[attachment] if attachment else [],
-        )
-        db.add(user_msg)
-        db.commit()
-        db.refresh(user_msg)
+        # `model` is a request-scoped override; it never touches process-wide defaults
+        resolved_agent, conv, is_new, history = await self._prepare_turn(db, org_id, project_id, agent)
+        user_msg = self._new_user_message(conv, org_id, user_id, query, attachment)
         config = self._build_agent_config(resolved_agent)
-        
-        # Enrich the query with Reasoning (Neo4j + Pinecone)
-        from src.application.reasoning.pipeline import context_enrich
-        enriched_query = await context_enrich(query, user_id=user_id)
-        
-        ctx = ChatContext(project_id=project_id or "default", history=history, query=enriched_query, additional_context=attachment or "")
-        agent_runner = ExecuterAgent(self.provider, config, framework=framework or "pydantic")
-        full = []
-        print("Agent running...",enriched_query)
-        async for chunk in agent_runner.run_stream(ctx):
-            if chunk.response:
-                full.append(chunk.response)
-            yield chunk
-        ai_msg = Message(
-            conversation_id=conv.id,
-            project_id=conv.project_id,
-            org_id=org_id,
-            role=MessageRole.ASSISTANT,
-            agent_id=resolved_agent.id if resolved_agent else None,
-            content="".join(full),
-            status=MessageStatus.SENT,
-        )
-        db.add(ai_msg)
-        db.commit()
-        db.refresh(ai_msg)
-
-    def get_chat_history(self, db: Session, org_id: str, project_id: str) -> dict:
-        conv = (
-            db.query(Conversation)
-            .filter(Conversation.project_id == project_id, Conversation.org_id == org_id)
-            .first()
-        )
-        msgs = (
-            db.query(Message)
-            .filter(Message.project_id == project_id)
-            .order_by(Message.created_at.asc())
-            .all()
-        )
+        agent_id = resolved_agent.id if resolved_agent else None
+        started = time.monotonic()
+        persisted = False
+        with usage_scope(org_id=org_id, project_id=conv.project_id, user_id=user_id, agent_id=agent_id, conversation_id=conv.id) as scope:
+            try:
+                enriched_query, probe, hit = await self._enrich(
+                    org_id,
+                    user_id,
+                    query,
+                    conv.project_id,
+                    self._agent_key(agent_id, framework, model),
+                    attachment,
+                    history,
+                )
+                full = []
+                citations: List[str] = []
+                status = MessageStatus.SENT
+                interrupted: Optional[BaseException] = None
+                try:
+                    if hit is not None:
+                        full.append(hit.response)
+                        yield ChatAgentResponse(response=hit.response, tool_calls=[], citations=hit.citations)
+                    else:
+                        ctx = ChatContext(
+                            project_id=project_id or "default",
+                            history=history,
+                            history_summary=conv.summary or "",
+                            query=enriched_query,
+                            additional_context=attachment or "",
+                        )
+                        agent_runner = ExecuterAgent(self.provider, config, framework=framework or "pydantic", model=model)
+                        async for chunk in agent_runner.run_stream(ctx):
+                            if chunk.response:
+                                full.append(chunk.response)
+                            citations.extend(c for c in chunk.citations if c not in citations)
+                            yield chunk
+                except (asyncio.CancelledError, GeneratorExit) as e:
+                    # Client went away; keep the partial answer and what it cost.
+                    status = MessageStatus.CANCELLED
+                    interrupted = e
+                ai_msg = Message(
+                    id=str(uuid.uuid4()),
+                    conversation_id=conv.id,
+                    project_id=conv.project_id,
+                    org_id=org_id,
+                    role=MessageRole.ASSISTANT,
+                    agent_id=agent_id,
+                    content="".join(full),
+                    status=status,
+                    metadata_=self._cache_metadata(hit),
+                )
+                self._apply_usage(ai_msg, scope, started)
+                await asyncio.shield(self._persist_turn(db, conv, is_new, user_msg, ai_msg))
+                persisted = True
+                scope.conversation_id = conv.id
+                if interrupted is not None:
+                    raise interrupted
+                if probe is not None and hit is None:
+                    answer_cache.store(probe, ai_msg.content, citations)
+            except BaseException:
+                if not persisted:
+                    # Nothing was written; keep the usage rows FK-safe.
+                    scope.message_id = None
+                    if is_new:
+                        scope.conversation_id = None
+                raise
+        conversation_summarizer.schedule(conv.id)
+
+    def _history_filter(self, org_id: str, project_id: str):
+        return and_(Message.project_id == project_id, Message.org_id == org_id)
+
+    async def get_chat_history(
+        self,
+        db: AsyncSession,
+        org_id: str,
+        project_id: str,
+        limit: int = 50,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> dict:
+        """One page of history in ascending order.
+
+        Without cursors this is the newest `limit` messages; `before`/`after`
+        page towards older/newer messages. `next_cursor` (pass as `before`) is
+        set while older messages exist, `newer_cursor` (pass as `after`) is
+        the newest message on the page, and `has_more` says whether the
+        requested direction continues.
+        """
+        conv_id = (
+            await db.execute(
+                select(Conversation.id)
+                .where(Conversation.project_id == project_id, Conversation.org_id == org_id)
+                .limit(1)
+            )
+        ).scalar()
+        query = select(*HISTORY_COLUMNS).where(self._history_filter(org_id, project_id))
+        before_key, after_key = decode_cursor(before), decode_cursor(after)
+        if before_key:
+            query = query.where(tuple_(Message.created_at, Message.id) < tuple_(*before_key))
+        if after_key:
+            query = query.where(tuple_(Message.created_at, Message.id) > tuple_(*after_key))
+        forward = bool(after_key and not before_key)
+        if forward:
+            query = query.order_by(Message.created_at.asc(), Message.id.asc())
+        else:
+            query = query.order_by(Message.created_at.desc(), Message.id.desc())
+        rows = (await db.execute(query.limit(limit + 1))).mappings().all()
+        has_more = len(rows) > limit
+        rows = list(rows[:limit])
+        if not forward:
+            rows.reverse()
+        next_cursor = newer_cursor = None
+        if rows:
+            # A forward page always has older messages: at least the `after` anchor.
+            if forward or has_more:
+                next_cursor = encode_cursor(rows[0]["created_at"], rows[0]["id"])
+            newer_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
         return {
-            "conversation_id": conv.id if conv else None,
+            "conversation_id": conv_id,
             "project_id": project_id,
-            "messages": msgs,
+            "messages": rows,
+            "next_cursor": next_cursor,
+            "newer_cursor": newer_cursor,
+            "has_more": has_more,
         }
+
+    async def iter_chat_history(
+        self, db: AsyncSession, org_id: str, project_id: str, batch_size: int = 500
+    ) -> AsyncGenerator[dict, None]:
+        """Every message in ascending order, fetched in keyset batches."""
+        last_key = None
+        while True:
+            query = select(*HISTORY_COLUMNS).where(self._history_filter(org_id, project_id))
+            if last_key is not None:
+                query = query.where(tuple_(Message.created_at, Message.id) > tuple_(*last_key))
+            query = query.order_by(Message.created_at.asc(), Message.id.asc()).limit(batch_size)
+            rows = (await db.execute(query)).mappings().all()
+            for row in rows:
+                yield dict(row)
+            if len(rows) < batch_size:
+                return
+            last_key = (rows[-1]["created_at"], rows[-1]["id"])
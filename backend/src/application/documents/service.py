@@ -1,9 +1,12 @@
+from datetime import datetime
 from pathlib import Path
-from typing import Optional, List
-from sqlalchemy.orm import Session
+from typing import Optional, List, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.infrastructure.database.models import Document, DocumentStatus, DocumentType, DocumentScope
-from src.infrastructure.database.repositories.document_repository import DocumentRepository
+from src.infrastructure.database.repositories.document_repository import DocumentFilters, DocumentRepository
 from src.application.graph.service import GraphService
+from src.infrastructure.llm.usage import usage_scope
+from src.application.conversations.answer_cache import answer_cache
 
 class DocumentService:
     def __init__(self, repo: DocumentRepository, graph: Optional[GraphService] = None):
@@ -27,7 +30,7 @@ class DocumentService:
 
     async def upload(
         self,
-        db: Session,
+        db: AsyncSession,
         org_id: str,
         user_id: str,
         original_filename: str,
@@ -74,26 +77,37 @@ class DocumentService:
             category=category,
             tags=tags or [],
         )
-        doc = self.repo.create(doc)
+        doc = await self.repo.create(doc)
 
         try:
-            await self.graph.ingest_and_persist(
-                file_path=target_path,
-                doc_id=doc.id,
-                version_id=str(doc.version),
-                title=doc.title or doc.original_filename,
-                doc_type=doc.file_type.value,
-                content_hash=None,
-            )
+            with usage_scope(org_id=org_id, user_id=user_id):
+                await self.graph.ingest_and_persist(
+                    file_path=target_path,
+                    doc_id=doc.id,
+                    version_id=str(doc.version),
+                    title=doc.title or doc.original_filename,
+                    doc_type=doc.file_type.value,
+                    content_hash=None,
+                    org_id=org_id,
+                    project_id=doc.project_id,
+                )
             doc.status = DocumentStatus.INGESTED
+            # Cached answers built on an earlier version of this document are stale.
+            answer_cache.invalidate_documents(org_id, [doc.id, doc.parent_document_id])
         except Exception as exc:
             doc.status = DocumentStatus.FAILED
             doc.ingestion_error = str(exc)
 
-        return self.repo.update(doc)
+        return await self.repo.update(doc)
 
-    def list_by_org(self, org_id: str) -> List[Document]:
-        return self.repo.get_by_org(org_id)
+    async def list_by_org(
+        self,
+        org_id: str,
+        filters: Optional[DocumentFilters] = None,
+        limit: int = 50,
+        before: Optional[Tuple[datetime, str]] = None,
+    ) -> Tuple[List[Document], bool]:
+        return await self.repo.list_by_org(org_id, filters=filters, limit=limit, before=before)
 
-    def get(self, document_id: str) -> Optional[Document]:
-        return self.repo.get_by_id(document_id)
+    async def get(self, document_id: str) -> Optional[Document]:
+        return await self.repo.get_by_id(document_id)
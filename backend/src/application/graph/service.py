@@ -17,6 +17,8 @@ class GraphService:
         title: str,
         doc_type: str,
         content_hash: Optional[str] = None,
+        org_id: Optional[str] = None,
+        project_id: Optional[str] = None,
     ) -> List[Dict]:
         
         logger.info(f"Starting ingestion for doc_id={doc_id}, version={version_id}")
@@ -49,7 +51,7 @@ class GraphService:
         if vector_segments:
             try:
                 logger.info(f"Persisting {len(vector_segments)} segments to Pinecone (vector DB)")
-                persist_to_pinecone(vector_segments)
+                persist_to_pinecone(vector_segments, org_id=org_id, project_id=project_id)
                 logger.info("Pinecone persistence complete")
             except Exception as e:
                 # Log error but don't fail the entire operation
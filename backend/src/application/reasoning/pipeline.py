@@ -1,10 +1,17 @@
+import asyncio
+import json
+from dataclasses import dataclass, field
 from typing import Optional, List
 import logging
 from pydantic import BaseModel, Field
-from src.infrastructure.vector.retriever import retrieve_context
+from src.application.conversations.answer_cache import context_fingerprint
+from src.config.settings import settings
+from src.infrastructure.vector.retriever import retrieve_context, retrieve_hybrid
 from src.application.reasoning.state_builder import build_state
+from src.application.reasoning.rerank import match_text, rerank_and_pack
 from src.infrastructure.llm.provider_service import ProviderService
 from src.infrastructure.graph.schema import ALLOWED_NODE_TYPES, ALLOWED_RELATIONSHIPS
+from src.infrastructure.observability.metrics import CONTEXT_ENRICH_SECONDS, FAILURES, timed
 
 logger = logging.getLogger(__name__)
 
@@ -35,7 +42,8 @@ async def classify_intent(question: str, user_id: str = "system") -> str:
         result = await svc.call_llm_with_structured_output(
             messages=[{"role": "user", "content": prompt}],
             output_schema=IntentSchema,
-            config_type="inference"
+            config_type="inference",
+            hedge=True,
         )
         return result.intent.lower()
     except Exception as e:
@@ -56,17 +64,65 @@ INTENT_CATEGORY_MAP = {
     "general_inquiry": ALL_CATEGORIES
 }
 
+@dataclass
+class EnrichedContext:
+    prompt: str
+    fingerprint: str
+    doc_ids: List[str] = field(default_factory=list)
+
+
+def _node_key(entry: dict) -> str:
+    versions = ",".join(sorted(str(v) for v in entry["properties"].get("source_versions") or []))
+    return f"{entry['type']}:{entry['normalized_name']}:{entry['source_doc_id']}:{versions}"
+
+
 async def context_enrich(
     question: str,
     active_version: Optional[str] = None, 
     allowed_categories: Optional[List[str]] = None,
-    user_id: str = "system"
+    user_id: str = "system",
+    org_id: Optional[str] = None,
+    project_id: Optional[str] = None,
 ) -> str:
     """
     Enriches the user query with Strategic State (Neo4j) and Supporting Context (Pinecone).
     """
+    enriched = await enrich_context(
+        question, active_version, allowed_categories, user_id, org_id=org_id, project_id=project_id
+    )
+    return enriched.prompt
+
+
+async def enrich_context(
+    question: str,
+    active_version: Optional[str] = None,
+    allowed_categories: Optional[List[str]] = None,
+    user_id: str = "system",
+    query_vector: Optional[List[float]] = None,
+    org_id: Optional[str] = None,
+    project_id: Optional[str] = None,
+) -> EnrichedContext:
+    """
+    context_enrich plus a fingerprint of the retrieved segments and graph nodes.
+    """
+    with timed(CONTEXT_ENRICH_SECONDS, stage="total"):
+        return await _enrich_context(
+            question, active_version, allowed_categories, user_id, query_vector, org_id, project_id
+        )
+
+
+async def _enrich_context(
+    question: str,
+    active_version: Optional[str],
+    allowed_categories: Optional[List[str]],
+    user_id: str,
+    query_vector: Optional[List[float]],
+    org_id: Optional[str],
+    project_id: Optional[str],
+) -> EnrichedContext:
     # 1. Classify Intent to optimize retrieval scope
-    intent = await classify_intent(question, user_id)
+    with timed(CONTEXT_ENRICH_SECONDS, stage="intent"):
+        intent = await classify_intent(question, user_id)
     logger.info(f"Intent classified as: {intent}")
 
     if allowed_categories is None:
@@ -79,43 +135,61 @@ async def context_enrich(
     context_matches = []
     
     try:
-        matches = retrieve_context(
-            query=question,
-            active_version=active_version, 
-            allowed_categories=allowed_categories,
-            top_k=5
-        )
+        retrieve = retrieve_hybrid if settings.retrieval_hybrid_enabled else retrieve_context
+        # Pinecone and the chunk store are blocking clients.
+        with timed(CONTEXT_ENRICH_SECONDS, stage="retrieve"):
+            matches = await asyncio.to_thread(
+                retrieve,
+                query=question,
+                active_version=active_version,
+                allowed_categories=allowed_categories,
+                top_k=settings.rerank_candidate_k if settings.rerank_enabled else settings.retrieval_top_k,
+                vector=query_vector,
+                org_id=org_id,
+                project_id=project_id
+            )
         
         if matches:
             context_matches = matches
             
     except Exception as e:
+        FAILURES.labels(component="retrieval").inc()
         logger.error(f"Failed to retrieve context: {e}")
+
+    if context_matches and settings.rerank_enabled:
+        # Over-fetched above; keep the best, non-redundant few that fit the budget.
+        try:
+            with timed(CONTEXT_ENRICH_SECONDS, stage="rerank"):
+                context_matches = await asyncio.to_thread(
+                    rerank_and_pack,
+                    question,
+                    context_matches,
+                    settings.retrieval_top_k,
+                    settings.retrieval_context_token_budget,
+                )
+        except Exception as e:
+            FAILURES.labels(component="rerank").inc()
+            logger.error(f"Rerank failed, using retrieval order: {e}")
+            context_matches = context_matches[:settings.retrieval_top_k]
     
     # 2. Build Strategic State (Neo4j)
     # Filtered by keyword match only (attachment scoping removed)
+    strategic_state = []
     try:
-        strategic_state = build_state(query_text=question)
-        import json
+        with timed(CONTEXT_ENRICH_SECONDS, stage="graph_state"):
+            strategic_state = await asyncio.to_thread(build_state, query_text=question)
         # Pretty print for better LLM readability
         strategic_state_str = json.dumps(strategic_state, indent=2)
     except Exception as e:
+        FAILURES.labels(component="graph_state").inc()
         logger.error(f"Failed to build strategic state: {e}")
         strategic_state_str = "No strategic state available."
 
     # 3. Format Context String for Prompt
     context_str = "No supporting context available."
     if context_matches:
-        # Extract the actual text content from metadata, assuming key is 'text' or 'chunk_text'
-        # Adjust based on your actual metadata schema. 
-        # Usually metadata={'text': '...', 'doc_id': '...'}
-        formatted_matches = []
-        for m in context_matches:
-            meta = m['text']
-            # safely get text
-            content = meta.get('text') or meta.get('chunk_text') or str(meta)
-            formatted_matches.append(f"- {content} (Score: {m['score']:.2f})")
-        
+        # Scores are for ranking only; they cost tokens and tell the model nothing.
+        formatted_matches = [f"- {match_text(m) or m['text']}" for m in context_matches]
         context_str = "\n\n".join(formatted_matches)
 
     # 4. Build reasoning input
@@ -129,4 +203,10 @@ SUPPORTING CONTEXT (Pinecone – explanatory):
 QUESTION:
 {question}
 """
-    return agent_input
+    doc_ids = {m['text'].get('doc_id') for m in context_matches if isinstance(m['text'], dict)}
+    doc_ids.update(entry['source_doc_id'] for entry in strategic_state)
+    fingerprint = context_fingerprint(
+        [m.get('id') or '' for m in context_matches],
+        [_node_key(entry) for entry in strategic_state],
+    )
+    return EnrichedContext(prompt=agent_input, fingerprint=fingerprint, doc_ids=sorted(d for d in doc_ids if d and d != "unknown"))
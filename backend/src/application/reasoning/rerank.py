@@ -0,0 +1,120 @@
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from src.config.settings import settings
+from src.infrastructure.llm.usage import estimate_tokens
+from src.infrastructure.vector.sparse import tokenize
+
+logger = logging.getLogger(__name__)
+
+_cross_encoder = None
+_cross_encoder_failed = False
+
+
+def _get_cross_encoder():
+    """Optional local cross-encoder (sentence-transformers); imported on first use."""
+    global _cross_encoder, _cross_encoder_failed
+    if _cross_encoder is not None or _cross_encoder_failed or not settings.rerank_model:
+        return _cross_encoder
+    try:
+        from sentence_transformers import CrossEncoder
+
+        _cross_encoder = CrossEncoder(settings.rerank_model, device="cpu")
+    except Exception as e:
+        logger.error(f"Rerank model {settings.rerank_model} unavailable, using lexical+dense scoring: {e}")
+        _cross_encoder_failed = True
+    return _cross_encoder
+
+
+def match_text(match: Dict[str, Any]) -> str:
+    meta = match.get("text")
+    if isinstance(meta, dict):
+        return meta.get("text") or meta.get("chunk_text") or ""
+    return str(meta or "")
+
+
+def _pages(match: Dict[str, Any]) -> Set[str]:
+    meta = match.get("text")
+    if not isinstance(meta, dict):
+        return set()
+    return {str(p) for p in meta.get("page_numbers") or []}
+
+
+def _doc_id(match: Dict[str, Any]) -> Optional[str]:
+    meta = match.get("text")
+    return meta.get("doc_id") if isinstance(meta, dict) else None
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _min_max(values: Sequence[Optional[float]]) -> List[float]:
+    present = [v for v in values if v is not None]
+    if not present:
+        return [0.0] * len(values)
+    lo, hi = min(present), max(present)
+    span = hi - lo
+    return [0.0 if v is None else (1.0 if span == 0 else (v - lo) / span) for v in values]
+
+
+def relevance_scores(question: str, matches: List[Dict[str, Any]]) -> List[float]:
+    """Cross-encoder scores when a local model is configured, else lexical + dense."""
+    texts = [match_text(m) for m in matches]
+    model = _get_cross_encoder()
+    if model is not None:
+        return _min_max([float(s) for s in model.predict([(question, t) for t in texts])])
+    query_terms = set(tokenize(question))
+    lexical = [
+        len(query_terms & set(tokenize(t))) / len(query_terms) if query_terms else 0.0
+        for t in texts
+    ]
+    dense = _min_max([m.get("dense_score") for m in matches])
+    w = settings.rerank_dense_weight
+    return [w * d + (1 - w) * lex for d, lex in zip(dense, lexical)]
+
+
+def rerank_and_pack(
+    question: str,
+    matches: List[Dict[str, Any]],
+    top_k: int,
+    token_budget: int,
+) -> List[Dict[str, Any]]:
+    """Rerank candidates, pick a diverse set with MMR and keep what fits the token budget.
+
+    Near-duplicates (same document, overlapping pages, token Jaccard above
+    rerank_duplicate_threshold) are dropped outright; otherwise MMR trades
+    relevance against similarity to segments already chosen.
+    """
+    if not matches:
+        return []
+    relevance = relevance_scores(question, matches)
+    tokens = [set(tokenize(match_text(m))) for m in matches]
+    lam = settings.rerank_mmr_lambda
+    remaining = sorted(range(len(matches)), key=lambda i: (-relevance[i], matches[i].get("id") or ""))
+    selected: List[int] = []
+    used = 0
+    while remaining and len(selected) < top_k:
+        best, best_score = None, None
+        for i in remaining:
+            redundancy = max((_jaccard(tokens[i], tokens[j]) for j in selected), default=0.0)
+            score = lam * relevance[i] - (1 - lam) * redundancy
+            if best_score is None or score > best_score:
+                best, best_score = i, score
+        remaining.remove(best)
+        duplicate = any(
+            _doc_id(matches[best]) == _doc_id(matches[j])
+            and (_pages(matches[best]) & _pages(matches[j]) or not _pages(matches[best]))
+            and _jaccard(tokens[best], tokens[j]) >= settings.rerank_duplicate_threshold
+            for j in selected
+        )
+        if duplicate:
+            continue
+        cost = estimate_tokens(match_text(matches[best]))
+        if used + cost > token_budget:
+            continue
+        used += cost
+        selected.append(best)
+    return [dict(matches[i], score=relevance[i]) for i in selected]
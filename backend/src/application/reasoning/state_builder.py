@@ -1,6 +1,10 @@
+import logging
 from typing import List, Dict, Any, Optional
 from src.infrastructure.graph.neo4j_client import get_neo4j_client
 from src.infrastructure.graph.schema import EXTRACTABLE_NODE_TYPES
+from src.infrastructure.observability.metrics import BUILD_STATE_SECONDS, FAILURES, timed
+
+logger = logging.getLogger(__name__)
 
 def build_state(doc_ids: Optional[List[str]] = None, query_text: Optional[str] = None) -> List[Dict[str, Any]]:
     """
@@ -59,7 +63,8 @@ def build_state(doc_ids: Optional[List[str]] = None, query_text: Optional[str] =
     
     client = get_neo4j_client()
     try:
-        results = client.run(final_query, parameters=params)
+        with timed(BUILD_STATE_SECONDS):
+            results = client.run(final_query, parameters=params)
         
         state = []
         seen_ids = set()
@@ -100,5 +105,6 @@ def build_state(doc_ids: Optional[List[str]] = None, query_text: Optional[str] =
             
         return state
     except Exception as e:
-        print(f"Error in build_state: {e}")
+        FAILURES.labels(component="graph_state").inc()
+        logger.error(f"Error in build_state: {e}")
         return []
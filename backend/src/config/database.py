@@ -1,4 +1,7 @@
+from typing import Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from src.config.settings import settings
@@ -8,25 +11,133 @@ if "${SUPABASE_DB_PASSWORD}" in db_url:
     db_url = db_url.replace("${SUPABASE_DB_PASSWORD}", settings.supabase_db_password or "")
 elif "postgres:@" in db_url and settings.supabase_db_password:
     db_url = db_url.replace("postgres:@", f"postgres:{settings.supabase_db_password}@")
+
+
+def _pool_kwargs(share: float) -> dict:
+    """This engine's part of the per-process pool budget.
+
+    The sync and async engines each hold their own connections, so
+    db_pool_size/db_max_overflow are split between them rather than
+    granted to both; at most size + overflow connections per process.
+    """
+    share = min(max(share, 0.0), 1.0)
+    return {
+        "pool_size": max(1, round(settings.db_pool_size * share)),
+        "max_overflow": max(0, round(settings.db_max_overflow * share)),
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+# libpq sslmode values; asyncpg's `ssl` argument accepts the same names with the same meaning.
+SSL_MODES = ("disable", "allow", "prefer", "require", "verify-ca", "verify-full")
+
+
+def _query_param(url: str, name: str) -> Optional[str]:
+    if "?" not in url:
+        return None
+    for param in url.split("?", 1)[1].split("&"):
+        key, _, value = param.partition("=")
+        if key == name:
+            return value
+    return None
+
+
+def _asyncpg_ssl(url: str) -> Optional[str]:
+    """The URL's sslmode as asyncpg's `ssl` argument; Supabase hosts default to require."""
+    mode = _query_param(url, "sslmode")
+    if mode is None:
+        return "require" if "supabase.co" in url else None
+    if mode not in SSL_MODES:
+        raise ValueError(f"Unsupported sslmode {mode!r}; expected one of {', '.join(SSL_MODES)}")
+    return mode
+
+
+def _strip_query_param(url: str, name: str) -> str:
+    if "?" not in url:
+        return url
+    base, query = url.split("?", 1)
+    params = [p for p in query.split("&") if p and not p.startswith(f"{name}=")]
+    return base + ("?" + "&".join(params) if params else "")
+
+
+def _async_url(url: str) -> str:
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            url = "postgresql+asyncpg://" + url[len(prefix):]
+            break
+    # asyncpg takes ssl via connect_args, not libpq's sslmode.
+    url = _strip_query_param(url, "sslmode")
+    if url.startswith("postgresql+asyncpg://") and "prepared_statement_cache_size=" not in url:
+        # SQLAlchemy's own prepared statement cache; 0 is required behind pgbouncer in transaction mode.
+        url += ("&" if "?" in url else "?") + f"prepared_statement_cache_size={settings.db_statement_cache_size}"
+    return url
+
+
 if db_url.startswith("sqlite"):
     engine = create_engine(db_url, connect_args={"check_same_thread": False})
 else:
-    if "postgresql+asyncpg" in db_url:
-        db_url = db_url.replace("postgresql+asyncpg", "postgresql+psycopg2")
-    if "supabase.co" in db_url and "sslmode=" not in db_url:
-        db_url = db_url + ("&sslmode=require" if "?" in db_url else "?sslmode=require")
-    engine = create_engine(db_url)
+    sync_url = db_url
+    if "postgresql+asyncpg" in sync_url:
+        sync_url = sync_url.replace("postgresql+asyncpg", "postgresql+psycopg2")
+    if "supabase.co" in sync_url and "sslmode=" not in sync_url:
+        sync_url = sync_url + ("&sslmode=require" if "?" in sync_url else "?sslmode=require")
+    engine = create_engine(sync_url, **_pool_kwargs(settings.db_sync_pool_share))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_db_url = _async_url(db_url)
+if async_db_url.startswith("sqlite"):
+    async_engine = create_async_engine(async_db_url)
+else:
+    async_connect_args = {"statement_cache_size": settings.db_statement_cache_size}
+    ssl_mode = _asyncpg_ssl(db_url)
+    if ssl_mode is not None:
+        async_connect_args["ssl"] = ssl_mode
+    async_engine = create_async_engine(
+        async_db_url,
+        connect_args=async_connect_args,
+        **_pool_kwargs(1.0 - settings.db_sync_pool_share),
+    )
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
-if settings.auto_create_tables:
+
+def pool_status(pool) -> dict:
+    """Checked-out connections against capacity; pools without a fixed size (SQLite) report only their class."""
+    status = {"pool": type(pool).__name__}
+    if not (hasattr(pool, "checkedout") and hasattr(pool, "size")):
+        return status
+    capacity = pool.size() + max(0, getattr(pool, "_max_overflow", settings.db_max_overflow))
+    checked_out = pool.checkedout()
+    status.update(
+        size=pool.size(),
+        checked_out=checked_out,
+        overflow=pool.overflow(),
+        capacity=capacity,
+        saturation=round(checked_out / capacity, 3) if capacity else None,
+    )
+    return status
+
+
+def init_db() -> None:
+    """Create missing tables when auto_create_tables is on; called at app startup, not import."""
+    if not settings.auto_create_tables:
+        return
     from src.infrastructure.database import models  # noqa: F401
     Base.metadata.create_all(bind=engine)
 
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,8 +1,10 @@
-from typing import Generator
-from neo4j import Session
+from typing import TYPE_CHECKING, Generator
 from src.infrastructure.graph.neo4j_client import get_neo4j_client
 
-def get_graph_session() -> Generator[Session, None, None]:
+if TYPE_CHECKING:
+    from neo4j import Session
+
+def get_graph_session() -> Generator["Session", None, None]:
     client = get_neo4j_client()
     s = client.session()
     try:
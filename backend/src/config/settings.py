@@ -13,27 +13,128 @@ class Settings(BaseSettings):
     supabase_service_role_key: Optional[str] = None
     supabase_db_password: Optional[str] = None
     auto_create_tables: bool = True
+    # Per-process budget, split between the sync and async engines by db_sync_pool_share.
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_sync_pool_share: float = 0.5
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 100  # set to 0 behind pgbouncer / Supabase pooler
     
     # Security
     jwt_secret: Optional[str] = "dev-secret-key-change-in-production"
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    auth_principal_cache_ttl_seconds: float = 60.0
+    auth_principal_cache_max_entries: int = 10000
+    # Embed id/org_id/role_id/status in tokens and skip the user lookup entirely.
+    # Role or status changes then only take effect when the token expires.
+    auth_stateless_claims: bool = False
     
     # LLM Providers
     openai_api_key: Optional[str] = None
     claude_api_key: Optional[str] = None
     perplexity_api_key: Optional[str] = None
-    
+
+    # LLM resilience
+    llm_max_retries: int = 4
+    llm_retry_base_delay: float = 1.0
+    llm_retry_max_delay: float = 20.0
+    llm_retry_budget_ratio: float = 0.2
+    llm_retry_budget_min_tokens: float = 10.0
+    llm_circuit_failure_threshold: int = 5
+    llm_circuit_reset_seconds: float = 30.0
+    chat_request_timeout_seconds: float = 120.0
+    llm_failover_enabled: bool = True
+    llm_chat_fallback_models: str = ""  # comma separated, defaults to AVAILABLE_MODELS order
+    llm_inference_fallback_models: str = ""
+    llm_max_fallbacks: int = 2
+    llm_hedge_default_delay: float = 3.0
+    llm_hedge_min_samples: int = 20
+
+    # LLM usage accounting
+    usage_buffer_capacity: int = 10000
+    usage_flush_batch_size: int = 500
+    usage_flush_interval_seconds: float = 2.0
+    quota_enforcement_enabled: bool = True
+    quota_refresh_interval_seconds: float = 60.0
+
+    # Conversation history
+    history_max_turns: int = 20
+    history_token_budget: int = 4000
+    history_summary_min_new_messages: int = 6
+    history_summary_max_words: int = 250
+    # Upper bound on what one summary refresh folds; a backlog is folded over several refreshes
+    history_summary_batch_messages: int = 100
+    history_summary_batch_tokens: int = 8000
+
+    # Chat streaming
+    stream_coalesce_ms: int = 50
+    stream_coalesce_max_chars: int = 512
+    stream_heartbeat_seconds: float = 15.0
+    stream_disconnect_poll_seconds: float = 1.0
+
+    # Embeddings
+    # Matryoshka truncation for text-embedding-3 models; 0 keeps the model's full size (3072).
+    # The Pinecone index and local namespaces must be rebuilt at the new size.
+    embedding_dimensions: int = 0
+
+    # Retrieval
+    retrieval_hybrid_enabled: bool = True
+    retrieval_top_k: int = 5
+    retrieval_candidate_k: int = 20
+    retrieval_rrf_k: int = 60
+    sparse_index_path: str = "storage/index/sparse"  # one JSON shard per org namespace
+    rerank_enabled: bool = True
+    rerank_candidate_k: int = 30
+    rerank_model: str = ""  # e.g. cross-encoder/ms-marco-MiniLM-L-6-v2; empty = lexical + dense scoring
+    rerank_dense_weight: float = 0.6
+    rerank_mmr_lambda: float = 0.7
+    rerank_duplicate_threshold: float = 0.8
+    retrieval_context_token_budget: int = 1500
+
+    # Semantic answer cache (opt-in)
+    answer_cache_enabled: bool = False
+    answer_cache_similarity_threshold: float = 0.95
+    answer_cache_ttl_seconds: float = 3600.0
+    answer_cache_max_entries: int = 5000
+    answer_cache_quantization: str = "none"  # none, int8 or binary
+    # Used instead of the threshold above when binary scores cannot reach it
+    answer_cache_binary_similarity_threshold: float = 0.76
+
+    # CrewAI
+    crewai_max_workers: int = 4
+    crewai_timeout_seconds: float = 300.0
+
     # Vector Database
     pinecone_api_key: Optional[str] = None
     pinecone_environment: Optional[str] = "us-east-1-aws"
     pinecone_index_name: str = "quickstart"
+    pinecone_namespace_mode: str = "org"  # none, org or project
+    pinecone_metadata_text: bool = False  # legacy: keep full segment text in vector metadata
+    vector_backend: str = "pinecone"  # pinecone or local
+    local_vector_path: str = "storage/index/vectors"
+    local_vector_ivf_lists: int = 0  # 0 = exact flat search
+    local_vector_ivf_nprobe: int = 8
+    local_vector_quantization: str = "none"  # none, int8 or binary; applies to new namespaces
 
     # Graph Database (Neo4j)
     neo4j_uri: Optional[str] = None
     neo4j_username: Optional[str] = None
     neo4j_password: Optional[str] = None
     
+    # Readiness probes (/ready)
+    ready_required_checks: str = "database"  # comma separated: database, graph, vector, llm
+    ready_cache_seconds: float = 5.0
+    ready_probe_timeout_seconds: float = 2.0
+    ready_pool_saturation_threshold: float = 0.9
+
+    # Metrics (/metrics, needs prometheus_client)
+    metrics_enabled: bool = True
+    # Scrapers must connect from one of these networks, and not through a proxy that adds X-Forwarded-For.
+    metrics_allowed_networks: str = "127.0.0.0/8,::1/128,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16"
+
     # Logging
     log_level: str = "INFO"
     
@@ -23,9 +23,15 @@ class ChatAgentResponse(BaseModel):
     citations: List[str] = Field(..., description="List of file names referenced in the response")
 
 
+class ChatMessage(BaseModel):
+    role: str = Field(..., description="'user' or 'assistant'")
+    content: str
+
+
 class ChatContext(BaseModel):
     project_id: str
-    history: List[str]
+    history: List[ChatMessage] = []
+    history_summary: str = ""
     query: str
     additional_context: str = ""
 
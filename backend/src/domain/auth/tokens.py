@@ -1,10 +1,10 @@
 from abc import ABC, abstractmethod
-from typing import Optional, Dict
+from typing import Any, Optional, Dict
 
 
 class TokenProvider(ABC):
     @abstractmethod
-    def create(self, subject: str) -> str:
+    def create(self, subject: str, claims: Optional[Dict[str, Any]] = None) -> str:
         pass
 
     @abstractmethod
@@ -1,15 +1,93 @@
-from typing import AsyncGenerator
-from crewai import Agent as CrewAgent, Crew, Task
+import asyncio
+import contextvars
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Callable, List, Optional
 
-from src.domain.agents.base import AgentConfig, ChatAgent, ChatAgentResponse, ChatContext, TaskConfig
+from src.config.settings import settings
+from src.domain.agents.base import (
+    AgentConfig,
+    ChatAgent,
+    ChatAgentResponse,
+    ChatContext,
+    TaskConfig,
+    ToolCallEventType,
+    ToolCallResponse,
+)
+from src.infrastructure.llm.exceptions import LLMDeadlineExceededError
+from src.infrastructure.llm.retry import remaining_time
+
+if TYPE_CHECKING:
+    from crewai import Task
+
+# crew.kickoff() blocks for the whole run; keep it off the event loop and cap
+# how many crews run at once. Crews hold live LLM clients and tool objects, so
+# they cannot be shipped to a process pool.
+_executor = ThreadPoolExecutor(max_workers=settings.crewai_max_workers, thread_name_prefix="crewai")
+_DONE = object()
+
+
+class CrewAborted(Exception):
+    """Raised from a step callback to stop a crew whose caller has gone away."""
+
+
+def crew_queue_depth() -> int:
+    """Crew runs submitted but not yet picked up by a worker thread."""
+    return _executor._work_queue.qsize()
+
+
+def shutdown_crew_executor() -> None:
+    _executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    return str(getattr(value, "raw", None) or value)
+
+
+def _step_events(step: Any) -> List[ToolCallResponse]:
+    """Tool call/result events for a CrewAI step (AgentAction, ToolResult or AgentFinish)."""
+    tool = getattr(step, "tool", None)
+    if not tool:
+        return []
+    call_id = str(uuid.uuid4())
+    tool_input = getattr(step, "tool_input", None)
+    events = [
+        ToolCallResponse(
+            call_id=call_id,
+            event_type=ToolCallEventType.CALL,
+            tool_name=str(tool),
+            tool_response=_text(getattr(step, "thought", None)),
+            tool_call_details={"input": tool_input if isinstance(tool_input, (dict, str)) else str(tool_input)},
+        )
+    ]
+    result = getattr(step, "result", None)
+    if result is not None:
+        events.append(
+            ToolCallResponse(
+                call_id=call_id,
+                event_type=ToolCallEventType.RESULT,
+                tool_name=str(tool),
+                tool_response=_text(result),
+                tool_call_details={},
+            )
+        )
+    return events
 
 
 class CrewAIChatAgent(ChatAgent):
     def __init__(self, config: AgentConfig):
+        # crewai is slow to import; main imports this module for its shutdown hook.
+        from crewai import Agent as CrewAgent
+
         self.tasks = config.tasks
         self.agent = CrewAgent(role=config.role, goal=config.goal, backstory=config.backstory)
 
-    def _create_task(self, task_config: TaskConfig, ctx: ChatContext) -> Task:
+    def _create_task(self, task_config: TaskConfig, ctx: ChatContext) -> "Task":
+        from crewai import Task
+
         description = f"User Query: {ctx.query}\nProject ID: {ctx.project_id}\n{ctx.additional_context}"
         return Task(
             description=f"{task_config.description}\n\n{description}",
@@ -17,12 +95,80 @@ class CrewAIChatAgent(ChatAgent):
             agent=self.agent,
         )
 
-    async def run(self, ctx: ChatContext) -> ChatAgentResponse:
+    def _timeout(self) -> float:
+        remaining = remaining_time()
+        if remaining is None:
+            return settings.crewai_timeout_seconds
+        return max(0.0, min(settings.crewai_timeout_seconds, remaining))
+
+    async def _kickoff(
+        self,
+        ctx: ChatContext,
+        stop: threading.Event,
+        on_step: Optional[Callable[[Any], None]] = None,
+        on_task: Optional[Callable[[Any], None]] = None,
+    ) -> Any:
+        def step_callback(step: Any) -> None:
+            if stop.is_set():
+                raise CrewAborted()
+            if on_step is not None:
+                on_step(step)
+
+        def task_callback(output: Any) -> None:
+            if on_task is not None and not stop.is_set():
+                on_task(output)
+
+        from crewai import Crew
+
         task = self._create_task(self.tasks[0], ctx)
-        crew = Crew(agents=[self.agent], tasks=[task])
-        result = crew.kickoff()
-        return ChatAgentResponse(response=str(result), tool_calls=[], citations=[])
+        crew = Crew(agents=[self.agent], tasks=[task], step_callback=step_callback, task_callback=task_callback)
+        loop = asyncio.get_running_loop()
+        # Carry usage scope and deadline context vars into the worker thread.
+        call = contextvars.copy_context().run
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(_executor, call, crew.kickoff), timeout=self._timeout())
+        except asyncio.TimeoutError:
+            raise LLMDeadlineExceededError("CrewAI run exceeded its time limit")
+        finally:
+            # A running thread cannot be interrupted; the next step callback aborts it.
+            stop.set()
+
+    async def run(self, ctx: ChatContext) -> ChatAgentResponse:
+        result = await self._kickoff(ctx, threading.Event())
+        return ChatAgentResponse(response=_text(result), tool_calls=[], citations=[])
 
     async def run_stream(self, ctx: ChatContext) -> AsyncGenerator[ChatAgentResponse, None]:
-        resp = await self.run(ctx)
-        yield resp
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        streamed_text = False
+
+        def emit(item: Any) -> None:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+
+        def on_step(step: Any) -> None:
+            events = _step_events(step)
+            if events:
+                emit(ChatAgentResponse(response="", tool_calls=events, citations=[]))
+
+        def on_task(output: Any) -> None:
+            emit(ChatAgentResponse(response=_text(output), tool_calls=[], citations=[]))
+
+        run = asyncio.ensure_future(self._kickoff(ctx, stop, on_step=on_step, on_task=on_task))
+        # Worker-thread emits are scheduled before the executor future resolves, so _DONE comes last.
+        run.add_done_callback(lambda _: queue.put_nowait(_DONE))
+        try:
+            while True:
+                item = await queue.get()
+                if item is _DONE:
+                    break
+                if item.response:
+                    streamed_text = True
+                yield item
+            result = run.result()
+            if not streamed_text:
+                yield ChatAgentResponse(response=_text(result), tool_calls=[], citations=[])
+        finally:
+            stop.set()
+            if not run.done():
+                run.cancel()
@@ -1,17 +1,23 @@
+import hashlib
 import logging
 import re
-from typing import AsyncGenerator, List
+import time
+from typing import AsyncGenerator, List, Optional
 
 from pydantic_ai import Agent as PydanticAgent
 from pydantic_ai import Tool
 from pydantic_ai.messages import (
     FunctionToolCallEvent,
     FunctionToolResultEvent,
+    ModelMessage,
+    ModelRequest,
     ModelResponse,
     PartDeltaEvent,
     PartStartEvent,
+    SystemPromptPart,
     TextPart,
     TextPartDelta,
+    UserPromptPart,
 )
 from pydantic_ai.models.openai import OpenAIModel
 from pydantic_ai.models.anthropic import AnthropicModel
@@ -39,48 +45,105 @@ class PydanticChatAgent(ChatAgent):
         llm_provider: ProviderService,
         config: AgentConfig,
         tools: List[Tool] | None = None,
+        model: Optional[str] = None,
     ):
         self.tasks = config.tasks
         self.max_iter = config.max_iter
+        self.llm_provider = llm_provider
 
         tools = tools or []
         for i, tool in enumerate(tools):
             tools[i].name = re.sub(r" ", "", tool.name)
 
-        provider = llm_provider.chat_config.provider
-        api_key = llm_provider._get_api_key(llm_provider.chat_config.auth_provider)
-        model_id = llm_provider.chat_config.model.split("/")[-1]
+        chat_config = llm_provider.chat_config_for(model)
+        self.chat_config = chat_config
+        provider = chat_config.provider
+        api_key = llm_provider._get_api_key(chat_config.auth_provider)
+        model_id = chat_config.model.split("/")[-1]
 
         if provider == "openai":
-            model = OpenAIModel(model_name=model_id, provider=OpenAIProvider(api_key=api_key))
+            pydantic_model = OpenAIModel(model_name=model_id, provider=OpenAIProvider(api_key=api_key))
         elif provider == "anthropic":
-            model = AnthropicModel(model_name=model_id, provider=AnthropicProvider(api_key=api_key))
+            pydantic_model = AnthropicModel(model_name=model_id, provider=AnthropicProvider(api_key=api_key))
         else:
-            model = OpenAIModel(model_name=model_id, provider=OpenAIProvider(api_key=api_key))
+            pydantic_model = OpenAIModel(model_name=model_id, provider=OpenAIProvider(api_key=api_key))
+
+        # Everything that is identical across turns lives in the system prompt so
+        # providers can serve it from their prompt cache.
+        self.system_prompt = self._create_system_prompt(config, self.tasks[0])
 
         model_settings = {"max_tokens": 8000}
         if tools and len(tools) > 0:
             model_settings["parallel_tool_calls"] = True
+        if provider == "anthropic":
+            model_settings["anthropic_cache_instructions"] = True
+            model_settings["anthropic_cache_tool_definitions"] = True
+        elif provider == "openai":
+            # OpenAI-compatible servers behind OpenAIModel may reject the unknown field.
+            model_settings["openai_prompt_cache_key"] = hashlib.sha256(self.system_prompt.encode()).hexdigest()[:32]
 
         self.agent = PydanticAgent(
-            model=model,
+            model=pydantic_model,
             tools=tools,
-            system_prompt=f"Role: {config.role}\nGoal: {config.goal}\nBackstory: {config.backstory}. Respond to the user query",
+            system_prompt=self.system_prompt,
             retries=3,
             defer_model_check=True,
             end_strategy="exhaustive",
             model_settings=model_settings,
         )
 
+    def _create_system_prompt(self, config: AgentConfig, task_config: TaskConfig) -> str:
+        return (
+            f"Role: {config.role}\nGoal: {config.goal}\nBackstory: {config.backstory}. Respond to the user query\n\n"
+            f"TASK:\n{task_config.description}\n\n"
+            f"Expected Output:\n{task_config.expected_output}\n\n"
+            "INSTRUCTIONS:\n"
+            "1. Use the available tools to gather information\n"
+            "2. Process and synthesize the gathered information\n"
+            "3. Format your response in markdown, make sure it's well formatted\n"
+            "4. Include relevant code snippets and file references\n"
+            "5. Provide clear explanations\n"
+            "6. Verify your output before submitting\n\n"
+            "IMPORTANT:\n"
+            "- Use tools efficiently and avoid unnecessary API calls\n"
+            "- Only use the tools listed below"
+        )
+
     def _create_task_description(self, task_config: TaskConfig, ctx: ChatContext) -> str:
         return (
-            f"\n                CONTEXT:\n                User Query: {ctx.query}\n                Project ID: {ctx.project_id}\n                \n                Additional Context:\n                {ctx.additional_context if ctx.additional_context != '' else 'no additional context'}\n\n                TASK:\n                {task_config.description}\n\n                Expected Output:\n                {task_config.expected_output}\n\n                INSTRUCTIONS:\n                1. Use the available tools to gather information\n                2. Process and synthesize the gathered information\n                3. Format your response in markdown, make sure it's well formatted\n                4. Include relevant code snippets and file references\n                5. Provide clear explanations\n                6. Verify your output before submitting\n\n                IMPORTANT:\n                - Use tools efficiently and avoid unnecessary API calls\n                - Only use the tools listed below\n\n                With above information answer the user query: {ctx.query}\n            "
+            f"CONTEXT:\nUser Query: {ctx.query}\nProject ID: {ctx.project_id}\n\n"
+            f"Additional Context:\n{ctx.additional_context if ctx.additional_context != '' else 'no additional context'}\n\n"
+            f"With above information answer the user query: {ctx.query}"
         )
 
+    def _build_message_history(self, ctx: ChatContext) -> Optional[List[ModelMessage]]:
+        if not ctx.history and not ctx.history_summary:
+            return None
+        # pydantic-ai only injects the system prompt when there is no history.
+        messages: List[ModelMessage] = [ModelRequest(parts=[SystemPromptPart(content=self.system_prompt)])]
+        if ctx.history_summary:
+            # After the static prefix so it does not invalidate the prompt cache.
+            messages[0].parts.append(UserPromptPart(content=f"Summary of the earlier conversation:\n{ctx.history_summary}"))
+        for msg in ctx.history:
+            if msg.role == "assistant":
+                messages.append(ModelResponse(parts=[TextPart(content=msg.content)]))
+            elif isinstance(messages[-1], ModelRequest):
+                messages[-1].parts.append(UserPromptPart(content=msg.content))
+            else:
+                messages.append(ModelRequest(parts=[UserPromptPart(content=msg.content)]))
+        return messages
+
     async def run(self, ctx: ChatContext) -> ChatAgentResponse:
         logger.info("running pydantic-ai agent")
+        self.llm_provider.check_quota()
         task = self._create_task_description(self.tasks[0], ctx)
-        resp = await self.agent.run(user_prompt=task)
+        started = time.monotonic()
+        try:
+            resp = await self.agent.run(user_prompt=task, message_history=self._build_message_history(ctx))
+        except Exception as e:
+            self.llm_provider.record_usage(self.chat_config, "agent_run", started, error=e)
+            raise
+        self.llm_provider.record_usage(self.chat_config, "agent_run", started, resp.usage())
         response_text = None
         if isinstance(resp, str):
             response_text = resp
@@ -105,11 +168,40 @@ class PydanticChatAgent(ChatAgent):
         return ChatAgentResponse(response=response_text, tool_calls=[], citations=[])
 
     async def run_stream(self, ctx: ChatContext) -> AsyncGenerator[ChatAgentResponse, None]:
+        self.llm_provider.check_quota()
         task = self._create_task_description(self.tasks[0], ctx)
+        started = time.monotonic()
+        first_token_at = None
+        run_state: dict = {}
+        error = None
+        streamed_chars = 0
+        try:
+            async for chunk in self._stream_events(task, ctx, run_state):
+                if chunk.response and first_token_at is None:
+                    first_token_at = time.monotonic()
+                streamed_chars += len(chunk.response)
+                yield chunk
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            usage = run_state.get("usage")
+            estimate = None
+            if usage is None:
+                run = run_state.get("run")
+                usage = run.usage() if run is not None else None
+                prompt_chars = len(self.system_prompt) + len(task) + sum(len(m.content) for m in ctx.history)
+                estimate = (prompt_chars // 4 + 1, streamed_chars // 4)
+            self.llm_provider.record_usage(
+                self.chat_config, "agent_stream", started, usage, first_token_at, error, estimate=estimate
+            )
+
+    async def _stream_events(self, task: str, ctx: ChatContext, run_state: dict) -> AsyncGenerator[ChatAgentResponse, None]:
         async with self.agent.iter(
             user_prompt=task,
-            message_history=[ModelResponse([TextPart(content=msg)]) for msg in ctx.history],
+            message_history=self._build_message_history(ctx),
         ) as run:
+            run_state["run"] = run
             async for node in run:
                 if PydanticAgent.is_model_request_node(node):
                     async with node.stream(run.ctx) as request_stream:
@@ -155,4 +247,5 @@ class PydanticChatAgent(ChatAgent):
                                 )
                 elif PydanticAgent.is_end_node(node):
                     logger.info("result streamed successfully")
+            run_state["usage"] = run.usage()
 
@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, String, Boolean, ForeignKey, Integer, Text, ARRAY, Numeric, BigInteger, DateTime
+from sqlalchemy import Column, String, Boolean, ForeignKey, Integer, Text, ARRAY, Numeric, BigInteger, DateTime, Index
 from sqlalchemy.types import JSON, Enum as AlchemyEnum
 from sqlalchemy.orm import relationship
 
@@ -31,6 +31,7 @@ class MessageStatus(str, enum.Enum):
     READ = "read"
     ERROR = "error"
     DELETED = "deleted"
+    CANCELLED = "cancelled"
 
 class Conversation(Base, UUIDMixin, TimestampMixin):
     __tablename__ = "conversations"
@@ -96,6 +97,10 @@ class Conversation(Base, UUIDMixin, TimestampMixin):
 
 class Message(Base, UUIDMixin, TimestampMixin):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Keyset pagination of project history on (created_at, id).
+        Index("ix_messages_project_created_at", "project_id", "created_at", "id"),
+    )
 
     conversation_id = Column(String, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False, index=True)
     project_id = Column(String, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, String, Boolean, ForeignKey, Integer, Text, ARRAY, BigInteger, DateTime, Numeric
+from sqlalchemy import Column, String, Boolean, ForeignKey, Integer, Text, ARRAY, BigInteger, DateTime, Numeric, Index
 from sqlalchemy.types import JSON, Enum as AlchemyEnum
 from sqlalchemy.orm import relationship
 
@@ -40,6 +40,9 @@ class DocumentScope(str, enum.Enum):
 
 class Document(Base, UUIDMixin, TimestampMixin):
     __tablename__ = "documents"
+    __table_args__ = (
+        Index("ix_documents_org_created_at", "org_id", "created_at", "id"),
+    )
 
     org_id = Column(String, ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False, index=True)
     project_id = Column(String, ForeignKey("projects.id", ondelete="CASCADE"), index=True)
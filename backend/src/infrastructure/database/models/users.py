@@ -38,7 +38,7 @@ class User(Base, UUIDMixin, TimestampMixin):
     org_id = Column(String, ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
     role_id = Column(String, ForeignKey("roles.id"), nullable=False)
     
-    email = Column(String(255), nullable=False)
+    email = Column(String(255), nullable=False, index=True)
     email_verified = Column(Boolean, default=False)
     hashed_password = Column(String(255), nullable=False)
     
@@ -1,29 +1,75 @@
-from typing import Optional, List
-from sqlalchemy.orm import Session
-from src.infrastructure.database.models import Document
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, List, Tuple
+from sqlalchemy import and_, cast, exists, func, select, tuple_
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
+from src.infrastructure.database.models import Document, DocumentScope, DocumentStatus, DocumentType
+
+# Columns that can be large and are never shown in listings.
+LIST_DEFERRED_COLUMNS = (Document.extracted_text, Document.ingestion_error, Document.keywords, Document.metadata_)
+
+
+@dataclass
+class DocumentFilters:
+    status: Optional[DocumentStatus] = None
+    category: Optional[str] = None
+    file_type: Optional[DocumentType] = None
+    scope: Optional[DocumentScope] = None
+    tags: List[str] = field(default_factory=list)
+
 
 class DocumentRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def get_by_id(self, document_id: str) -> Optional[Document]:
-        return self.db.query(Document).filter(Document.id == document_id).first()
+    async def get_by_id(self, document_id: str) -> Optional[Document]:
+        result = await self.db.execute(select(Document).where(Document.id == document_id))
+        return result.scalars().first()
+
+    def _tags_clause(self, tags: List[str]):
+        if self.db.bind.dialect.name == "postgresql":
+            return cast(Document.tags, JSONB).contains(tags)
+        clauses = []
+        for tag in tags:
+            each = func.json_each(Document.tags).table_valued("value")
+            clauses.append(exists(select(1).select_from(each).where(each.c.value == tag)))
+        return and_(*clauses)
 
-    def get_by_org(self, org_id: str) -> List[Document]:
-        return (
-            self.db.query(Document)
-            .filter(Document.org_id == org_id)
-            .order_by(Document.created_at.desc())
-            .all()
-        )
+    async def list_by_org(
+        self,
+        org_id: str,
+        filters: Optional[DocumentFilters] = None,
+        limit: int = 50,
+        before: Optional[Tuple[datetime, str]] = None,
+    ) -> Tuple[List[Document], bool]:
+        """Newest first; returns the page and whether older documents remain."""
+        query = select(Document).options(*(defer(column) for column in LIST_DEFERRED_COLUMNS)).where(Document.org_id == org_id)
+        filters = filters or DocumentFilters()
+        if filters.status:
+            query = query.where(Document.status == filters.status)
+        if filters.category:
+            query = query.where(Document.category == filters.category)
+        if filters.file_type:
+            query = query.where(Document.file_type == filters.file_type)
+        if filters.scope:
+            query = query.where(Document.scope == filters.scope)
+        if filters.tags:
+            query = query.where(self._tags_clause(filters.tags))
+        if before:
+            query = query.where(tuple_(Document.created_at, Document.id) < tuple_(*before))
+        query = query.order_by(Document.created_at.desc(), Document.id.desc()).limit(limit + 1)
+        rows = list((await self.db.execute(query)).scalars().all())
+        return rows[:limit], len(rows) > limit
 
-    def create(self, document: Document) -> Document:
+    async def create(self, document: Document) -> Document:
         self.db.add(document)
-        self.db.commit()
-        self.db.refresh(document)
+        await self.db.commit()
+        await self.db.refresh(document)
         return document
 
-    def update(self, document: Document) -> Document:
-        self.db.commit()
-        self.db.refresh(document)
+    async def update(self, document: Document) -> Document:
+        await self.db.commit()
+        await self.db.refresh(document)
         return document
@@ -1,7 +1,9 @@
-from typing import Optional, Any, Dict, List
-from neo4j import GraphDatabase, Driver, Session
+from typing import TYPE_CHECKING, Optional, Any, Dict, List
 from src.config.settings import settings
 
+if TYPE_CHECKING:
+    from neo4j import Driver, Session
+
 _client: Optional["Neo4jClient"] = None
 
 class Neo4jClient:
@@ -12,13 +14,15 @@ class Neo4jClient:
             # We don't want to modify the URI blindly, but for the specific case of 
             # connection failures seen in dev, using ssc is a safe workaround
             uri = uri.replace("neo4j+s://", "neo4j+ssc://")
-            
-        self._driver: Driver = GraphDatabase.driver(uri, auth=(username, password))
+
+        from neo4j import GraphDatabase
+
+        self._driver: "Driver" = GraphDatabase.driver(uri, auth=(username, password))
 
     def verify(self) -> None:
         self._driver.verify_connectivity()
 
-    def session(self, database: Optional[str] = None) -> Session:
+    def session(self, database: Optional[str] = None) -> "Session":
         if database:
             return self._driver.session(database=database)
         return self._driver.session()
@@ -28,6 +32,23 @@ class Neo4jClient:
             result = s.run(query, parameters or {})
             return [r.data() for r in result]
 
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connections in use vs the driver's pool size; reads driver internals, so best effort."""
+        try:
+            pool = self._driver._pool
+            max_size = pool.pool_config.max_connection_pool_size
+            addresses = list(pool.connections)
+            open_count = sum(len(pool.connections[a]) for a in addresses)
+            in_use = sum(pool.in_use_connection_count(a) for a in addresses)
+        except Exception:
+            return {}
+        return {
+            "open": open_count,
+            "in_use": in_use,
+            "max_size": max_size,
+            "saturation": round(in_use / max_size, 3) if max_size else None,
+        }
+
     def close(self) -> None:
         self._driver.close()
 
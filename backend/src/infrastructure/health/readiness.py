@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Probe -> (ok, detail). Probes for unconfigured dependencies return ok with configured=False.
+Probe = Callable[[], Awaitable[Tuple[bool, Dict[str, Any]]]]
+
+
+@dataclass
+class ProbeResult:
+    name: str
+    ok: bool
+    required: bool
+    latency_ms: float
+    detail: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+async def probe_database() -> Tuple[bool, Dict[str, Any]]:
+    from sqlalchemy import text
+
+    from src.config.database import async_engine, engine, pool_status
+
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    pools = {"async": pool_status(async_engine.pool), "sync": pool_status(engine.pool)}
+    saturation = max((p.get("saturation") or 0.0) for p in pools.values())
+    saturated = saturation >= settings.ready_pool_saturation_threshold
+    return not saturated, {"pools": pools, "saturated": saturated}
+
+
+async def probe_graph() -> Tuple[bool, Dict[str, Any]]:
+    if not (settings.neo4j_uri and settings.neo4j_username and settings.neo4j_password):
+        return True, {"configured": False}
+    from src.infrastructure.graph.neo4j_client import get_neo4j_client
+
+    client = get_neo4j_client()
+    await asyncio.to_thread(client.verify)
+    pool = client.pool_stats()
+    saturated = (pool.get("saturation") or 0.0) >= settings.ready_pool_saturation_threshold
+    return not saturated, {"pool": pool, "saturated": saturated}
+
+
+async def probe_vector() -> Tuple[bool, Dict[str, Any]]:
+    if settings.vector_backend != "local" and not settings.pinecone_api_key:
+        return True, {"configured": False}
+    from src.infrastructure.vector.client import get_vector_store
+
+    # describe_index_stats on Pinecone; a directory scan for the local store.
+    counts = await asyncio.to_thread(get_vector_store().namespaces)
+    return True, {"backend": settings.vector_backend, "namespaces": len(counts), "vectors": sum(counts.values())}
+
+
+# Cheapest authenticated call per provider; providers without one report circuit state only.
+_LLM_PROBES = {
+    "openai": ("https://api.openai.com/v1/models", lambda key: {"Authorization": f"Bearer {key}"}),
+    "anthropic": (
+        "https://api.anthropic.com/v1/models?limit=1",
+        lambda key: {"x-api-key": key, "anthropic-version": "2023-06-01"},
+    ),
+}
+
+
+async def probe_llm() -> Tuple[bool, Dict[str, Any]]:
+    import httpx
+
+    from src.infrastructure.llm.retry import get_resilience_snapshot
+
+    keys = {"openai": settings.openai_api_key, "anthropic": settings.claude_api_key}
+    providers: Dict[str, Dict[str, Any]] = {
+        name: {"circuit_state": state.get("circuit_state")} for name, state in get_resilience_snapshot().items()
+    }
+    async with httpx.AsyncClient(timeout=settings.ready_probe_timeout_seconds) as client:
+        for name, (url, headers) in _LLM_PROBES.items():
+            if not keys[name]:
+                continue
+            started = time.perf_counter()
+            entry = providers.setdefault(name, {})
+            try:
+                resp = await client.get(url, headers=headers(keys[name]))
+                entry["ok"] = resp.status_code < 500 and resp.status_code != 429
+                entry["status_code"] = resp.status_code
+            except Exception as e:
+                entry["ok"] = False
+                entry["error"] = type(e).__name__
+            entry["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    ok = all(p.get("ok", True) and p.get("circuit_state") != "open" for p in providers.values())
+    return ok, {"providers": providers}
+
+
+PROBES: Dict[str, Probe] = {
+    "database": probe_database,
+    "graph": probe_graph,
+    "vector": probe_vector,
+    "llm": probe_llm,
+}
+
+
+class ReadinessChecker:
+    """Runs the dependency probes concurrently and caches the report.
+
+    Concurrent callers share one in-flight check, so a load balancer polling
+    every worker cannot fan out into a probe storm. Only probes listed in
+    `required` make the worker unready; the rest are reported for
+    diagnostics, since draining every worker over a shared provider outage
+    would not help.
+    """
+
+    def __init__(self, probes: Dict[str, Probe], required: List[str], cache_seconds: float, timeout_seconds: float):
+        self.probes = probes
+        self.required = set(required)
+        self.cache_seconds = cache_seconds
+        self.timeout_seconds = timeout_seconds
+        self._report: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def _run(self, name: str, probe: Probe) -> ProbeResult:
+        started = time.perf_counter()
+        try:
+            ok, detail = await asyncio.wait_for(probe(), timeout=self.timeout_seconds)
+            error = None
+        except asyncio.TimeoutError:
+            ok, detail, error = False, {}, f"timed out after {self.timeout_seconds:g}s"
+        except Exception as e:
+            ok, detail, error = False, {}, f"{type(e).__name__}: {e}"
+        if error:
+            logger.warning(f"Readiness probe {name} failed: {error}")
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        return ProbeResult(name=name, ok=ok, required=name in self.required, latency_ms=latency_ms, detail=detail, error=error)
+
+    async def check(self) -> Dict[str, Any]:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            now = time.monotonic()
+            if self._report is not None and now - self._checked_at < self.cache_seconds:
+                return dict(self._report, cached=True, age_seconds=round(now - self._checked_at, 2))
+            results = await asyncio.gather(*(self._run(name, probe) for name, probe in self.probes.items()))
+            ready = all(r.ok for r in results if r.required)
+            degraded = [r.name for r in results if not r.ok and not r.required]
+            self._report = {
+                "status": "ready" if ready and not degraded else ("degraded" if ready else "unready"),
+                "ready": ready,
+                "checks": {r.name: asdict(r) for r in results},
+            }
+            self._checked_at = time.monotonic()
+            return dict(self._report, cached=False, age_seconds=0.0)
+
+
+readiness_checker = ReadinessChecker(
+    PROBES,
+    required=[name.strip() for name in settings.ready_required_checks.split(",") if name.strip()],
+    cache_seconds=settings.ready_cache_seconds,
+    timeout_seconds=settings.ready_probe_timeout_seconds,
+)
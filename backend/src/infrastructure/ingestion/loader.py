@@ -1,9 +1,9 @@
-import fitz
-from docx import Document
 from pathlib import Path
 from typing import List, Dict
 
 def load_pdf(path: Path) -> List[Dict]:
+    import fitz
+
     doc = fitz.open(str(path))
 
     pages: List[Dict] = []
@@ -18,6 +18,7 @@ def load_pdf(path: Path) -> List[Dict]:
 
 def load_docx(path: Path) -> List[Dict]:
     import zipfile
+    from docx import Document
     if not zipfile.is_zipfile(path):
         # Fallback to text if it's named .docx but isn't a zip
         return load_text(path)
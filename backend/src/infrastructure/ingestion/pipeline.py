@@ -1,14 +1,22 @@
 from pathlib import Path
 from typing import List, Dict
 import asyncio
+import time
 from src.infrastructure.ingestion.loader import load_document
 from src.infrastructure.ingestion.segmenter import segment_pages
 from src.infrastructure.ingestion.classifier import classify_segment
 from src.infrastructure.ingestion.extractor import extract_facts
 from src.infrastructure.ingestion.validator import validate_segment
+from src.infrastructure.observability.metrics import (
+    FAILURES,
+    INGESTION_PAGES,
+    INGESTION_PAGES_PER_SECOND,
+    INGESTION_SEGMENTS_PENDING,
+)
 
 
 async def run_ingestion(file_path: Path, doc_id: str, version_id: str) -> List[Dict]:
+    started = time.perf_counter()
     pages = load_document(file_path)
     segments = segment_pages(pages)
     
@@ -16,18 +24,30 @@ async def run_ingestion(file_path: Path, doc_id: str, version_id: str) -> List[D
     sem = asyncio.Semaphore(5)
 
     async def process_one(seg: Dict) -> Dict:
-        async with sem:
-            seg["doc_id"] = doc_id
-            seg["doc_version"] = version_id
-            if seg.get("page_numbers"):
-                seg["segment_id"] = f"{version_id}:page_{seg['page_numbers'][0]}"
-            
-            # Process sequentially per segment to avoid dict race conditions
-            # but segments are processed in parallel
-            seg = await classify_segment(seg)
-            seg = await extract_facts(seg)
-            seg = validate_segment(seg)
-            return seg
+        try:
+            async with sem:
+                seg["doc_id"] = doc_id
+                seg["doc_version"] = version_id
+                if seg.get("page_numbers"):
+                    seg["segment_id"] = f"{version_id}:page_{seg['page_numbers'][0]}"
 
-    processed = await asyncio.gather(*[process_one(s) for s in segments])
+                # Process sequentially per segment to avoid dict race conditions
+                # but segments are processed in parallel
+                seg = await classify_segment(seg)
+                seg = await extract_facts(seg)
+                seg = validate_segment(seg)
+                return seg
+        finally:
+            INGESTION_SEGMENTS_PENDING.dec()
+
+    INGESTION_SEGMENTS_PENDING.inc(len(segments))
+    try:
+        processed = await asyncio.gather(*[process_one(s) for s in segments])
+    except Exception:
+        FAILURES.labels(component="ingestion").inc()
+        raise
+    elapsed = time.perf_counter() - started
+    INGESTION_PAGES.inc(len(pages))
+    if pages and elapsed > 0:
+        INGESTION_PAGES_PER_SECOND.observe(len(pages) / elapsed)
     return list(processed)
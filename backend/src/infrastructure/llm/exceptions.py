@@ -1,2 +1,35 @@
 class UnsupportedProviderError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(f"Circuit open for provider '{provider}', retry after {retry_after:.1f}s")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+class RetryBudgetExhaustedError(Exception):
+    def __init__(self, provider: str, cause: Exception):
+        super().__init__(f"Retry budget exhausted for provider '{provider}': {cause}")
+        self.provider = provider
+        self.cause = cause
+
+
+class LLMDeadlineExceededError(Exception):
+    pass
+
+
+class QuotaExceededError(Exception):
+    def __init__(self, org_id: str, limit: int, used: int, retry_after: float):
+        super().__init__(f"Monthly token quota exceeded for organization '{org_id}' ({used}/{limit})")
+        self.org_id = org_id
+        self.limit = limit
+        self.used = used
+        self.retry_after = retry_after
+
+
+class UnknownModelError(ValueError):
+    def __init__(self, model: str):
+        super().__init__(f"Unknown model '{model}'")
+        self.model = model
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from src.infrastructure.llm.exceptions import (
+    CircuitOpenError,
+    LLMDeadlineExceededError,
+    RetryBudgetExhaustedError,
+)
+from src.infrastructure.llm.retry import RetrySettings, is_recoverable_error, remaining_time
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies per model."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(model)
+            if samples is None:
+                samples = deque(maxlen=self.window)
+                self._samples[model] = samples
+            samples.append(seconds)
+
+    def percentile(self, model: str, pct: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            samples = list(self._samples.get(model, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        samples.sort()
+        idx = min(len(samples) - 1, int(round(pct * (len(samples) - 1))))
+        return samples[idx]
+
+    def p95(self, model: str, min_samples: int = 1) -> Optional[float]:
+        return self.percentile(model, 0.95, min_samples=min_samples)
+
+
+latency_tracker = LatencyTracker()
+
+
+def should_fail_over(error: Exception) -> bool:
+    if isinstance(error, LLMDeadlineExceededError):
+        return False
+    if isinstance(error, (CircuitOpenError, RetryBudgetExhaustedError)):
+        return True
+    return is_recoverable_error(error, RetrySettings())
+
+
+async def call_with_failover(
+    candidates: List[Any],
+    attempt: Callable[[Any], Awaitable[Any]],
+    describe: Callable[[Any], str] = str,
+) -> Any:
+    last_error: Optional[Exception] = None
+    for i, candidate in enumerate(candidates):
+        try:
+            return await attempt(candidate)
+        except Exception as e:
+            last_error = e
+            is_last = i == len(candidates) - 1
+            if is_last or not should_fail_over(e):
+                raise
+            logger.warning("LLM call on %s failed (%s), failing over to %s", describe(candidate), e, describe(candidates[i + 1]))
+    if last_error is not None:
+        raise last_error
+    raise RuntimeError("No LLM candidates configured")
+
+
+async def call_hedged(
+    primary: Callable[[], Awaitable[Any]],
+    secondary: Callable[[], Awaitable[Any]],
+    hedge_after: float,
+) -> Any:
+    """Run `primary`; start `secondary` once `primary` has been pending for
+    `hedge_after` seconds (or has failed over), and return the first success."""
+    remaining = remaining_time()
+    if remaining is not None and remaining <= hedge_after:
+        return await primary()
+
+    primary_task = asyncio.ensure_future(primary())
+    try:
+        done, _ = await asyncio.wait({primary_task}, timeout=hedge_after)
+    except BaseException:
+        primary_task.cancel()
+        raise
+    errors: List[BaseException] = []
+    if done:
+        error = primary_task.exception()
+        if error is None:
+            return primary_task.result()
+        if not should_fail_over(error):
+            raise error
+        errors.append(error)
+    else:
+        logger.info("Primary LLM call exceeded %.2fs, sending hedged request", hedge_after)
+
+    secondary_task = asyncio.ensure_future(secondary())
+    pending = {secondary_task} if done else {primary_task, secondary_task}
+    try:
+        while pending:
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                if task.exception() is None:
+                    return task.result()
+                errors.append(task.exception())
+        raise errors[-1]
+    finally:
+        for task in pending:
+            task.cancel()
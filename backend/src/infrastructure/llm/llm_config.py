@@ -1,8 +1,15 @@
-from typing import Dict, Any, Optional
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Any, FrozenSet, Mapping, Optional, Tuple
 import os
+import threading
+
+from src.infrastructure.llm.exceptions import UnknownModelError
 
 DEFAULT_CHAT_MODEL = "openai/gpt-5.1"
 DEFAULT_INFERENCE_MODEL = "openai/gpt-4.1-mini"
+FALLBACK_CHAT_MODEL = "openai/gpt-4o"
+FALLBACK_INFERENCE_MODEL = "openai/gpt-4.1-mini"
 
 MODEL_CONFIG_MAP = {
     "openai/gpt-4.1-mini": {
@@ -53,6 +60,18 @@ MODEL_CONFIG_MAP = {
         "base_url": None,
         "api_version": None,
     },
+    "openai/o4-mini": {
+        "provider": "openai",
+        "default_params": {"temperature": 0.3},
+        "capabilities": {
+            "supports_pydantic": True,
+            "supports_streaming": True,
+            "supports_vision": True,
+            "supports_tool_parallelism": True,
+        },
+        "base_url": None,
+        "api_version": None,
+    },
     "anthropic/claude-haiku-4-5-20251001": {
         "provider": "anthropic",
         "default_params": {"temperature": 0.2, "max_tokens": 8000},
@@ -193,6 +212,41 @@ MODEL_CONFIG_MAP = {
 }
 
 
+@dataclass(frozen=True)
+class LLMEnvironment:
+    """Process-level LLM settings, read from the environment once at startup."""
+
+    chat_model: Optional[str]
+    inference_model: Optional[str]
+    api_base: Optional[str]
+    api_version: Optional[str]
+    capability_overrides: Mapping[str, bool]
+    multimodal_enabled: bool
+    allowed_models: FrozenSet[str] = frozenset()  # accepted as request overrides besides MODEL_CONFIG_MAP
+
+    @classmethod
+    def from_env(cls) -> "LLMEnvironment":
+        overrides = {
+            "supports_pydantic": _normalize_bool_env("LLM_SUPPORTS_PYDANTIC"),
+            "supports_streaming": _normalize_bool_env("LLM_SUPPORTS_STREAMING"),
+            "supports_vision": _normalize_bool_env("LLM_SUPPORTS_VISION"),
+            "supports_tool_parallelism": _normalize_bool_env(
+                "LLM_SUPPORTS_TOOL_PARALLELISM"
+            ),
+        }
+        return cls(
+            chat_model=os.environ.get("CHAT_MODEL"),
+            inference_model=os.environ.get("INFERENCE_MODEL"),
+            api_base=os.environ.get("LLM_API_BASE"),
+            api_version=os.environ.get("LLM_API_VERSION"),
+            capability_overrides=MappingProxyType({k: v for k, v in overrides.items() if v is not None}),
+            multimodal_enabled=bool(_normalize_bool_env("LLM_SUPPORTS_VISION")),
+            allowed_models=frozenset(
+                m.strip() for m in os.environ.get("LLM_ALLOWED_MODELS", "").split(",") if is_valid_model_string(m.strip())
+            ),
+        )
+
+
 class LLMProviderConfig:
     def __init__(
         self,
@@ -203,30 +257,37 @@ class LLMProviderConfig:
         base_url: Optional[str] = None,
         api_version: Optional[str] = None,
         auth_provider: Optional[str] = None,
+        environment: Optional[LLMEnvironment] = None,
     ):
-        self.provider = provider
-        self.auth_provider = auth_provider or provider
-        self.model = model
-        self.default_params = default_params
-        self.capabilities = dict(capabilities) if capabilities else {}
+        env = environment or get_llm_config_registry().environment
+        capabilities = dict(capabilities) if capabilities else {}
+        capabilities.update(env.capability_overrides)
 
-        env_base_url = os.environ.get("LLM_API_BASE")
-        env_api_version = os.environ.get("LLM_API_VERSION")
+        # Configs are shared between concurrent requests through the registry,
+        # so they are read-only once built.
+        object.__setattr__(self, "provider", provider)
+        object.__setattr__(self, "auth_provider", auth_provider or provider)
+        object.__setattr__(self, "model", model)
+        object.__setattr__(self, "default_params", MappingProxyType(dict(default_params)))
+        object.__setattr__(self, "capabilities", MappingProxyType(capabilities))
+        object.__setattr__(self, "base_url", base_url or env.api_base)
+        object.__setattr__(self, "api_version", api_version or env.api_version)
+        object.__setattr__(self, "_environment", env)
 
-        self.base_url = base_url or env_base_url
-        self.api_version = api_version or env_api_version
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"LLMProviderConfig is immutable, use with_provider() instead of setting '{name}'")
 
-        capability_overrides = {
-            "supports_pydantic": _normalize_bool_env("LLM_SUPPORTS_PYDANTIC"),
-            "supports_streaming": _normalize_bool_env("LLM_SUPPORTS_STREAMING"),
-            "supports_vision": _normalize_bool_env("LLM_SUPPORTS_VISION"),
-            "supports_tool_parallelism": _normalize_bool_env(
-                "LLM_SUPPORTS_TOOL_PARALLELISM"
-            ),
-        }
-        for key, override in capability_overrides.items():
-            if override is not None:
-                self.capabilities[key] = override
+    def with_provider(self, provider: str) -> "LLMProviderConfig":
+        return LLMProviderConfig(
+            provider=provider,
+            model=self.model,
+            default_params=dict(self.default_params),
+            capabilities=dict(self.capabilities),
+            base_url=self.base_url,
+            api_version=self.api_version,
+            auth_provider=provider,
+            environment=self._environment,
+        )
 
     def get_llm_params(self, api_key: str) -> Dict[str, Any]:
         params = {
@@ -247,6 +308,14 @@ def _normalize_bool_env(var_name: str) -> Optional[bool]:
     return raw_value.strip().lower() in {"1", "true", "yes", "on"}
 
 
+def is_valid_model_string(model_string: Optional[str]) -> bool:
+    return bool(
+        model_string
+        and model_string.strip().lower() not in {"string", "null", "none"}
+        and "/" in model_string
+    )
+
+
 def parse_model_string(model_string: str) -> tuple[str, str]:
     try:
         parts = model_string.split("/")
@@ -263,11 +332,11 @@ def parse_model_string(model_string: str) -> tuple[str, str]:
         return "openai", DEFAULT_CHAT_MODEL
 
 
-def get_config_for_model(model_string: str) -> Dict[str, Any]:
+def get_config_for_model(model_string: str, environment: Optional[LLMEnvironment] = None) -> Dict[str, Any]:
     if model_string in MODEL_CONFIG_MAP:
         return MODEL_CONFIG_MAP[model_string]
     provider, _ = parse_model_string(model_string)
-    env_base_url = os.environ.get("LLM_API_BASE")
+    env = environment or get_llm_config_registry().environment
     supports_pydantic = provider in {
         "openai",
         "anthropic",
@@ -279,7 +348,7 @@ def get_config_for_model(model_string: str) -> Dict[str, Any]:
         "provider": provider,
         "default_params": {"temperature": 0.3},
         "capabilities": {
-            "supports_pydantic": supports_pydantic or bool(env_base_url),
+            "supports_pydantic": supports_pydantic or bool(env.api_base),
             "supports_streaming": True,
             "supports_vision": provider in {"openai", "anthropic"},
             "supports_tool_parallelism": provider in {"openai", "anthropic"},
@@ -290,35 +359,108 @@ def get_config_for_model(model_string: str) -> Dict[str, Any]:
     }
 
 
-def build_llm_provider_config(
-    user_pref: dict, config_type: str = "chat"
-) -> LLMProviderConfig:
-    if config_type == "chat":
-        model_string = (
-            os.environ.get("CHAT_MODEL")
-            or user_pref.get("chat_model")
-            or DEFAULT_CHAT_MODEL
+class LLMConfigRegistry:
+    """Immutable model configs built once per process.
+
+    Requests pick a model by passing an override; only the process-wide
+    defaults can change at runtime, and they are swapped atomically.
+
+    Only known models are cached: MODEL_CONFIG_MAP, LLM_ALLOWED_MODELS and
+    the configured defaults. Request overrides must name one of them, so
+    clients cannot grow the cache (or metric label sets) without bound.
+    """
+
+    def __init__(self, environment: LLMEnvironment):
+        self.environment = environment
+        self._lock = threading.Lock()
+        chat_model = environment.chat_model or DEFAULT_CHAT_MODEL
+        inference_model = environment.inference_model or DEFAULT_INFERENCE_MODEL
+        self._defaults: Tuple[str, str] = (
+            chat_model if is_valid_model_string(chat_model) else FALLBACK_CHAT_MODEL,
+            inference_model if is_valid_model_string(inference_model) else FALLBACK_INFERENCE_MODEL,
         )
-        if not model_string or model_string.strip().lower() in {"string", "null", "none"} or "/" not in model_string:
-            model_string = "openai/gpt-4o"
-    else:
-        model_string = (
-            os.environ.get("INFERENCE_MODEL")
-            or user_pref.get("inference_model")
-            or DEFAULT_INFERENCE_MODEL
+        self._configs: Dict[str, LLMProviderConfig] = {}
+        for model_string in (*MODEL_CONFIG_MAP, *sorted(environment.allowed_models), *self._defaults):
+            if model_string not in self._configs:
+                self._configs[model_string] = self._build(model_string)
+
+    def _build(self, model_string: str) -> LLMProviderConfig:
+        _, full_model_name = parse_model_string(model_string)
+        config_data = get_config_for_model(full_model_name, self.environment)
+        return LLMProviderConfig(
+            provider=config_data["provider"],
+            model=full_model_name,
+            default_params=dict(config_data["default_params"]),
+            capabilities=config_data.get("capabilities", {}),
+            base_url=config_data.get("base_url"),
+            api_version=config_data.get("api_version"),
+            auth_provider=config_data.get("auth_provider"),
+            environment=self.environment,
         )
-        if not model_string or model_string.strip().lower() in {"string", "null", "none"} or "/" not in model_string:
-            model_string = "openai/gpt-4.1-mini"
-
-    provider, full_model_name = parse_model_string(model_string)
-    config_data = get_config_for_model(full_model_name).copy()
-
-    return LLMProviderConfig(
-        provider=config_data["provider"],
-        model=full_model_name,
-        default_params=dict(config_data["default_params"]),
-        capabilities=config_data.get("capabilities", {}),
-        base_url=config_data.get("base_url"),
-        api_version=config_data.get("api_version"),
-        auth_provider=config_data.get("auth_provider"),
-    )
+
+    def is_known(self, model_string: Optional[str]) -> bool:
+        return model_string in self._configs
+
+    def get(self, model_string: str) -> LLMProviderConfig:
+        config = self._configs.get(model_string)
+        if config is not None:
+            return config
+        # Server-configured models outside the known set (fallback lists) are built per call, not cached.
+        return self._build(model_string)
+
+    def default_model(self, config_type: str = "chat") -> str:
+        chat_model, inference_model = self._defaults
+        return chat_model if config_type == "chat" else inference_model
+
+    def resolve(self, config_type: str = "chat", model_override: Optional[str] = None) -> LLMProviderConfig:
+        if not is_valid_model_string(model_override):
+            return self.get(self.default_model(config_type))
+        if not self.is_known(model_override):
+            raise UnknownModelError(model_override)
+        return self._configs[model_override]
+
+    def set_defaults(self, chat_model: Optional[str] = None, inference_model: Optional[str] = None) -> None:
+        with self._lock:
+            current_chat, current_inference = self._defaults
+            self._defaults = (
+                chat_model if is_valid_model_string(chat_model) else current_chat,
+                inference_model if is_valid_model_string(inference_model) else current_inference,
+            )
+            # An admin-chosen default becomes a known model; copy-on-write keeps lock-free readers safe.
+            configs = dict(self._configs)
+            for model_string in self._defaults:
+                if model_string not in configs:
+                    configs[model_string] = self._build(model_string)
+            self._configs = configs
+
+
+_registry: Optional[LLMConfigRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def init_llm_config_registry(environment: Optional[LLMEnvironment] = None) -> LLMConfigRegistry:
+    with _registry_lock:
+        return _init_registry_locked(environment or LLMEnvironment.from_env())
+
+
+def get_llm_config_registry() -> LLMConfigRegistry:
+    registry = _registry
+    if registry is None:
+        with _registry_lock:
+            registry = _registry
+            if registry is None:
+                registry = _init_registry_locked(LLMEnvironment.from_env())
+    return registry
+
+
+def _init_registry_locked(environment: LLMEnvironment) -> LLMConfigRegistry:
+    global _registry
+    _registry = LLMConfigRegistry(environment)
+    return _registry
+
+
+def build_llm_provider_config(
+    user_pref: dict, config_type: str = "chat", model_override: Optional[str] = None
+) -> LLMProviderConfig:
+    pref_key = "chat_model" if config_type == "chat" else "inference_model"
+    return get_llm_config_registry().resolve(config_type, model_override or user_pref.get(pref_key))
@@ -1,35 +1,15 @@
+import asyncio
 import logging
 import os
 import json
-import random
+import threading
 import time
-import asyncio
-from functools import wraps
-from typing import List, Dict, Any, Union, AsyncGenerator, Optional
+from typing import TYPE_CHECKING, List, Dict, Any, Union, AsyncGenerator, Optional, Tuple
 
 from pydantic import BaseModel
 
-try:
+if TYPE_CHECKING:
     from pydantic_ai.models import Model
-except Exception:
-    class _AnyModel:
-        pass
-    Model = _AnyModel
-
-try:
-    from litellm import litellm, AsyncOpenAI, acompletion
-except Exception:
-    class _LiteLLMStub:
-        num_retries = 0
-    litellm = _LiteLLMStub()
-    AsyncOpenAI = None
-    async def acompletion(*args, **kwargs):
-        raise RuntimeError("litellm not available")
-
-try:
-    import instructor
-except Exception:
-    instructor = None
 
 logger = logging.getLogger(__name__)
 
@@ -42,185 +22,71 @@ from src.api.v1.provider.schemas import (
     ModelInfo,
 )
 from src.infrastructure.llm.llm_config import (
+    MODEL_CONFIG_MAP,
     LLMProviderConfig,
     build_llm_provider_config,
     get_config_for_model,
+    get_llm_config_registry,
+    is_valid_model_string,
 )
 from src.infrastructure.llm.exceptions import UnsupportedProviderError
+from src.infrastructure.llm.retry import RetrySettings, robust_llm_call
+from src.infrastructure.llm.failover import call_hedged, call_with_failover, latency_tracker
+from src.infrastructure.llm.usage import UsageRecord, current_usage_scope, record_usage, tokens_from_usage
+from src.infrastructure.llm.quota import quota_engine
+from src.infrastructure.observability.metrics import LLM_CALL_SECONDS, LLM_TIME_TO_FIRST_TOKEN_SECONDS
+from src.config.settings import settings
+
+# litellm, instructor and pydantic-ai pull in every provider SDK and take
+# seconds to import; they load on the first LLM call instead of at boot.
+_litellm = None
+_instructor = None
+_instructor_missing = False
+_import_lock = threading.Lock()
+
+
+def get_litellm():
+    global _litellm
+    if _litellm is None:
+        with _import_lock:
+            if _litellm is None:
+                try:
+                    import litellm as module
+                except Exception as e:
+                    raise RuntimeError(f"litellm not available: {e}") from e
+                # Retries are owned by `robust_llm_call`; a second layer inside litellm would
+                # multiply attempts against an already overloaded provider.
+                module.num_retries = 0
+                module.modify_params = True
+                _litellm = module
+    return _litellm
+
+
+def _get_instructor():
+    global _instructor, _instructor_missing
+    if _instructor is None and not _instructor_missing:
+        with _import_lock:
+            if _instructor is None and not _instructor_missing:
+                try:
+                    import instructor as module
+
+                    _instructor = module
+                except Exception:
+                    _instructor_missing = True
+    return _instructor
 
-try:
-    from pydantic_ai.models.openai import OpenAIModel
-    from pydantic_ai.models.anthropic import AnthropicModel
-    from pydantic_ai.providers.openai import OpenAIProvider
-    from pydantic_ai.providers.anthropic import AnthropicProvider
-except Exception:
-    OpenAIModel = AnthropicModel = OpenAIProvider = AnthropicProvider = None
 
-try:
-    import litellm as _litellm_mod
-    litellm = _litellm_mod
-except Exception:
-    pass
+async def acompletion(*args, **kwargs):
+    return await get_litellm().acompletion(*args, **kwargs)
 
 
 class _ConfigProvider:
     def get_is_multimodal_enabled(self) -> bool:
-        val = os.environ.get("LLM_SUPPORTS_VISION")
-        if val is None:
-            return False
-        return val.strip().lower() in {"1", "true", "yes", "on"}
+        return get_llm_config_registry().environment.multimodal_enabled
 
 
 config_provider = _ConfigProvider()
 
-litellm.num_retries = getattr(litellm, "num_retries", 5)
-
-OVERLOAD_ERROR_PATTERNS = {
-    "anthropic": ["overloaded", "overloaded_error", "capacity", "rate limit exceeded"],
-    "openai": [
-        "rate_limit_exceeded",
-        "capacity",
-        "overloaded",
-        "server_error",
-        "timeout",
-    ],
-    "general": [
-        "timeout",
-        "insufficient capacity",
-        "server_error",
-        "internal_server_error",
-    ],
-}
-
-
-class RetrySettings:
-    def __init__(
-        self,
-        max_retries: int = 8,
-        min_delay: float = 1.0,
-        max_delay: float = 120.0,
-        base_delay: float = 2.0,
-        jitter_factor: float = 0.2,
-        step_increase: float = 1.8,
-        retry_on_timeout: bool = True,
-        retry_on_overloaded: bool = True,
-        retry_on_rate_limit: bool = True,
-        retry_on_server_error: bool = True,
-    ):
-        self.max_retries = max_retries
-        self.min_delay = min_delay
-        self.max_delay = max_delay
-        self.base_delay = base_delay
-        self.jitter_factor = jitter_factor
-        self.step_increase = step_increase
-        self.retry_on_timeout = retry_on_timeout
-        self.retry_on_overloaded = retry_on_overloaded
-        self.retry_on_rate_limit = retry_on_rate_limit
-        self.retry_on_server_error = retry_on_server_error
-
-
-def identify_provider_from_error(error: Exception) -> str:
-    error_str = str(error).lower()
-    for provider in ["anthropic", "openai", "cohere", "azure"]:
-        if provider.lower() in error_str.lower():
-            return provider
-    return "unknown"
-
-
-def is_recoverable_error(error: Exception, settings: RetrySettings) -> bool:
-    error_str = str(error).lower()
-    provider = identify_provider_from_error(error)
-    if settings.retry_on_timeout and "timeout" in error_str:
-        return True
-    if settings.retry_on_overloaded:
-        overload_patterns = (
-            OVERLOAD_ERROR_PATTERNS.get(provider, [])
-            + OVERLOAD_ERROR_PATTERNS["general"]
-        )
-        if any(pattern in error_str for pattern in overload_patterns):
-            return True
-    if settings.retry_on_rate_limit and any(
-        limit_pattern in error_str
-        for limit_pattern in [
-            "rate limit",
-            "rate_limit",
-            "ratelimit",
-            "requests per minute",
-        ]
-    ):
-        return True
-    if settings.retry_on_server_error and any(
-        server_err in error_str
-        for server_err in [
-            "server_error",
-            "internal_server_error",
-            "500",
-            "502",
-            "503",
-            "504",
-        ]
-    ):
-        return True
-    return False
-
-
-def calculate_backoff_time(retry_count: int, settings: RetrySettings) -> float:
-    delay = min(settings.max_delay, settings.base_delay * (settings.step_increase**retry_count))
-    jitter = random.uniform(1 - settings.jitter_factor, 1 + settings.jitter_factor)
-    final_delay = max(settings.min_delay, min(settings.max_delay, delay * jitter))
-    return final_delay
-
-
-def custom_litellm_retry_handler(retry_count: int, exception: Exception) -> bool:
-    settings = RetrySettings(max_retries=getattr(litellm, "num_retries", 5))
-    if not is_recoverable_error(exception, settings):
-        return False
-    delay = calculate_backoff_time(retry_count, settings)
-    provider = identify_provider_from_error(exception)
-    logging.warning(
-        f"{provider.capitalize()} API error: {str(exception)}. "
-        f"Retry {retry_count}/{settings.max_retries}, "
-        f"waiting {delay:.2f}s before next attempt..."
-    )
-    time.sleep(delay)
-    return True
-
-
-def robust_llm_call(settings: Optional[RetrySettings] = None):
-    if settings is None:
-        settings = RetrySettings()
-
-    def decorator(func):
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            retries = 0
-            last_exception = None
-            while retries <= settings.max_retries:
-                try:
-                    return await func(*args, **kwargs)
-                except Exception as e:
-                    last_exception = e
-                    if not is_recoverable_error(e, settings):
-                        raise
-                    provider = identify_provider_from_error(e)
-                    if retries >= settings.max_retries:
-                        logging.error(
-                            f"Max retries ({settings.max_retries}) exceeded for {provider} API call. "
-                            f"Last error: {str(e)}"
-                        )
-                        raise
-                    delay = calculate_backoff_time(retries, settings)
-                    logging.warning(
-                        f"{provider.capitalize()} API error: {str(e)}. "
-                        f"Retry {retries+1}/{settings.max_retries}, "
-                        f"waiting {delay:.2f}s before next attempt..."
-                    )
-                    await asyncio.sleep(delay)
-                    retries += 1
-            raise last_exception
-        return wrapper
-    return decorator
-
 
 AVAILABLE_MODELS = [
     AvailableModelOption(
@@ -347,20 +213,112 @@ PLATFORM_PROVIDERS = list(
 
 
 class ProviderService:
-    def __init__(self, user_id: str):
-        try:
-            litellm.modify_params = True
-        except Exception:
-            pass
+    def __init__(
+        self,
+        user_id: str,
+        chat_model: Optional[str] = None,
+        inference_model: Optional[str] = None,
+        org_id: Optional[str] = None,
+    ):
         self.user_id = user_id
-        user_config: Dict[str, Any] = {}
-        self.chat_config = build_llm_provider_config(user_config, config_type="chat")
-        self.inference_config = build_llm_provider_config(user_config, config_type="inference")
-        self.retry_settings = RetrySettings(max_retries=8, base_delay=2.0, max_delay=120.0)
+        self.org_id = org_id
+        registry = get_llm_config_registry()
+        self.chat_config = registry.resolve("chat", chat_model)
+        self.inference_config = registry.resolve("inference", inference_model)
+        self.retry_settings = RetrySettings(
+            max_retries=settings.llm_max_retries,
+            base_delay=settings.llm_retry_base_delay,
+            max_delay=settings.llm_retry_max_delay,
+        )
 
     @classmethod
-    def create(cls, user_id: str):
-        return cls(user_id)
+    def create(
+        cls,
+        user_id: str,
+        chat_model: Optional[str] = None,
+        inference_model: Optional[str] = None,
+        org_id: Optional[str] = None,
+    ):
+        return cls(user_id, chat_model=chat_model, inference_model=inference_model, org_id=org_id)
+
+    def _quota_org_id(self) -> Optional[str]:
+        if self.org_id:
+            return self.org_id
+        scope = current_usage_scope()
+        return scope.org_id if scope is not None else None
+
+    def check_quota(self) -> None:
+        quota_engine.check(self._quota_org_id())
+
+    def record_usage(
+        self,
+        config: LLMProviderConfig,
+        endpoint: str,
+        started: float,
+        usage: Any = None,
+        first_token_at: Optional[float] = None,
+        error: Optional[BaseException] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        estimate: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        prompt_tokens, completion_tokens = tokens_from_usage(usage)
+        metadata = dict(metadata or {})
+        if estimate is not None and not completion_tokens:
+            # Cancelled streams never receive the provider's final usage chunk.
+            prompt_tokens = prompt_tokens or estimate[0]
+            completion_tokens = estimate[1]
+            metadata["estimated_tokens"] = True
+        cancelled = isinstance(error, (asyncio.CancelledError, GeneratorExit))
+        if cancelled:
+            status = "cancelled"
+        else:
+            status = "error" if error else "success"
+        quota_engine.consume(self._quota_org_id(), prompt_tokens + completion_tokens)
+        config_type = self._config_type(config)
+        # Label values must stay bounded: only registry-known models get their own series.
+        model_label = config.model if get_llm_config_registry().is_known(config.model) else "other"
+        LLM_CALL_SECONDS.labels(model=model_label, config_type=config_type, endpoint=endpoint, status=status).observe(
+            time.monotonic() - started
+        )
+        if first_token_at:
+            LLM_TIME_TO_FIRST_TOKEN_SECONDS.labels(model=model_label, config_type=config_type).observe(first_token_at - started)
+        record_usage(
+            UsageRecord(
+                provider=config.provider,
+                model=config.model,
+                endpoint=endpoint,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                duration_ms=int((time.monotonic() - started) * 1000),
+                time_to_first_token_ms=int((first_token_at - started) * 1000) if first_token_at else None,
+                status=status,
+                error_code=type(error).__name__ if error and not cancelled else None,
+                error_message=str(error)[:2000] if error and not cancelled else None,
+                org_id=self.org_id,
+                user_id=self.user_id if self.user_id and self.user_id != "system" else None,
+                metadata=metadata,
+            )
+        )
+
+    def _config_type(self, config: LLMProviderConfig) -> str:
+        if config.model == self.chat_config.model:
+            return "chat"
+        if config.model == self.inference_config.model:
+            return "inference"
+        return "fallback"
+
+    def _routing_provider_for(
+        self,
+        config: Optional[LLMProviderConfig] = None,
+        model_identifier: Optional[str] = None,
+        config_type: str = "chat",
+        **_: Any,
+    ) -> str:
+        if config is not None:
+            return config.auth_provider
+        if model_identifier:
+            return get_config_for_model(model_identifier).get("auth_provider") or model_identifier.split("/")[0]
+        return self._config_for(config_type).auth_provider
 
     async def list_available_llms(self) -> List[ProviderInfo]:
         providers = {
@@ -377,22 +335,21 @@ class ProviderService:
         return AvailableModelsResponse(models=AVAILABLE_MODELS)
 
     async def set_global_ai_provider(self, request: SetProviderRequest):
+        registry = get_llm_config_registry()
+        registry.set_defaults(chat_model=request.chat_model, inference_model=request.inference_model)
         if request.chat_model:
-            os.environ["CHAT_MODEL"] = request.chat_model
             self.chat_config = build_llm_provider_config({"chat_model": request.chat_model}, "chat")
         if request.inference_model:
-            os.environ["INFERENCE_MODEL"] = request.inference_model
             self.inference_config = build_llm_provider_config({"inference_model": request.inference_model}, "inference")
         return {"message": "AI provider configuration updated successfully"}
 
     def _get_api_key(self, provider: str) -> str | None:
-        env_key = os.getenv("LLM_API_KEY", None)
-        if env_key:
-            return env_key
-        env_key = os.getenv(f"{provider.upper()}_API_KEY")
-        if env_key:
-            return env_key
-        return None
+        # A provider's own key wins, so a failover to another provider never sends it LLM_API_KEY.
+        return self._get_provider_api_key(provider) or os.getenv("LLM_API_KEY") or None
+
+    @staticmethod
+    def _get_provider_api_key(provider: str) -> str | None:
+        return os.getenv(f"{provider.upper()}_API_KEY") or None
 
     def _build_llm_params(self, config: LLMProviderConfig) -> Dict[str, Any]:
         api_key = self._get_api_key(config.auth_provider)
@@ -416,7 +373,6 @@ class ProviderService:
             referer = os.environ.get("OPENROUTER_SITE_URL")
             title = os.environ.get("OPENROUTER_APP_TITLE")
             if not referer or not title:
-                from src.config.settings import settings
                 referer = referer or "http://localhost:8000"
                 title = title or getattr(settings, "app_name", "AI Backend")
             extra_headers = {
@@ -430,21 +386,12 @@ class ProviderService:
         return {key: value for key, value in params.items() if value is not None}
 
     def _build_config_for_model_identifier(self, model_identifier: str) -> LLMProviderConfig:
-        config_data = get_config_for_model(model_identifier).copy()
-        default_params = dict(config_data.get("default_params", {}))
-        return LLMProviderConfig(
-            provider=config_data["provider"],
-            model=model_identifier,
-            default_params=default_params,
-            capabilities=config_data.get("capabilities", {}),
-            base_url=config_data.get("base_url"),
-            api_version=config_data.get("api_version"),
-            auth_provider=config_data.get("auth_provider"),
-        )
+        return get_llm_config_registry().get(model_identifier)
 
     async def get_global_ai_provider(self) -> GetProviderResponse:
-        chat_model_id = os.environ.get("CHAT_MODEL") or "openai/gpt-4o"
-        inference_model_id = os.environ.get("INFERENCE_MODEL") or "openai/gpt-4.1-mini"
+        registry = get_llm_config_registry()
+        chat_model_id = registry.default_model("chat")
+        inference_model_id = registry.default_model("inference")
         chat_provider = chat_model_id.split("/")[0] if chat_model_id else ""
         chat_model_name = chat_model_id
         inference_provider = inference_model_id.split("/")[0] if inference_model_id else ""
@@ -465,169 +412,270 @@ class ProviderService:
         config = self.chat_config if config_type == "chat" else self.inference_config
         return config.capabilities.get("supports_pydantic", False)
 
+    def _config_for(self, config_type: str = "chat") -> LLMProviderConfig:
+        return self.chat_config if config_type == "chat" else self.inference_config
+
+    def chat_config_for(self, model: Optional[str] = None) -> LLMProviderConfig:
+        if is_valid_model_string(model):
+            return get_llm_config_registry().resolve("chat", model)
+        return self.chat_config
+
+    def _fallback_chain(self, config_type: str = "chat") -> List[LLMProviderConfig]:
+        primary = self._config_for(config_type)
+        chain = [primary]
+        if not settings.llm_failover_enabled:
+            return chain
+        configured = settings.llm_chat_fallback_models if config_type == "chat" else settings.llm_inference_fallback_models
+        if configured:
+            candidate_ids = [model_id.strip() for model_id in configured.split(",") if model_id.strip()]
+        else:
+            candidate_ids = [
+                model.id
+                for model in AVAILABLE_MODELS
+                if (model.is_chat_model if config_type == "chat" else model.is_inference_model)
+                and model.id in MODEL_CONFIG_MAP
+            ]
+            # An incident usually takes out a whole provider, so try other providers first.
+            candidate_ids.sort(
+                key=lambda model_id: (
+                    MODEL_CONFIG_MAP[model_id].get("auth_provider") or MODEL_CONFIG_MAP[model_id]["provider"]
+                ) == primary.auth_provider
+            )
+        for model_id in candidate_ids:
+            if len(chain) > settings.llm_max_fallbacks:
+                break
+            if model_id == primary.model or any(c.model == model_id for c in chain):
+                continue
+            config = self._build_config_for_model_identifier(model_id)
+            # LLM_API_KEY belongs to the primary's provider; other providers need their own key.
+            if config.auth_provider == primary.auth_provider:
+                has_key = self._get_api_key(config.auth_provider)
+            else:
+                has_key = self._get_provider_api_key(config.auth_provider)
+            if not has_key:
+                continue
+            chain.append(config)
+        return chain
+
     @robust_llm_call()
-    async def call_llm_with_specific_model(
+    async def _complete_with_config(
         self,
-        model_identifier: str,
+        config: LLMProviderConfig,
         messages: list,
-        output_schema: Optional[BaseModel] = None,
         stream: bool = False,
         **kwargs,
-    ) -> Union[str, AsyncGenerator[str, None], Any]:
-        config = self._build_config_for_model_identifier(model_identifier)
+    ) -> Union[str, AsyncGenerator[str, None]]:
         params = self._build_llm_params(config)
         params.update(kwargs)
-        routing_provider = config.provider
-        try:
-            if output_schema:
-                request_kwargs = {key: params[key] for key in ("api_key", "base_url", "api_version") if key in params}
-                if config.provider == "ollama":
-                    ollama_base_root = (
-                        params.get("base_url")
-                        or config.base_url
-                        or os.environ.get("LLM_API_BASE")
-                        or "http://localhost:11434"
-                    )
-                    ollama_base_url = ollama_base_root.rstrip("/") + "/v1"
-                    ollama_api_key = params.get("api_key") or os.environ.get("OLLAMA_API_KEY", "ollama")
-                    client = instructor.from_openai(
-                        AsyncOpenAI(base_url=ollama_base_url, api_key=ollama_api_key),
-                        mode=instructor.Mode.JSON,
-                    )
-                    ollama_request_kwargs = {key: value for key, value in request_kwargs.items() if key not in {"base_url", "api_key", "api_version"}}
-                    response = await client.chat.completions.create(
-                        model=params["model"].split("/")[-1],
-                        messages=messages,
-                        response_model=output_schema,
-                        temperature=params.get("temperature", 0.3),
-                        max_tokens=params.get("max_tokens"),
-                        **ollama_request_kwargs,
-                    )
-                else:
-                    client = instructor.from_litellm(acompletion, mode=instructor.Mode.JSON)
-                    response = await client.chat.completions.create(
-                        model=params["model"],
-                        messages=messages,
-                        response_model=output_schema,
-                        strict=True,
-                        temperature=params.get("temperature", 0.3),
-                        max_tokens=params.get("max_tokens"),
-                        **request_kwargs,
-                    )
-                return response
-            else:
-                if stream:
-                    async def generator() -> AsyncGenerator[str, None]:
-                        response = await acompletion(messages=messages, stream=True, **params)
-                        async for chunk in response:
-                            yield chunk.choices[0].delta.content or ""
-                    return generator()
-                else:
-                    response = await acompletion(messages=messages, **params)
-                    return response.choices[0].message.content
-        except Exception as e:
-            logging.error(f"Error calling LLM with model {model_identifier}: {e}, provider: {routing_provider}")
-            raise e
-
-    @robust_llm_call()
-    async def call_llm(self, messages: list, stream: bool = False, config_type: str = "chat") -> Union[str, AsyncGenerator[str, None]]:
-        config = self.chat_config if config_type == "chat" else self.inference_config
-        params = self._build_llm_params(config)
-        routing_provider = config.provider
+        started = time.monotonic()
         try:
             if stream:
+                # Open the stream here so connection and overload errors reach the retry layer.
+                response = await acompletion(
+                    messages=messages, stream=True, stream_options={"include_usage": True}, **params
+                )
+
                 async def generator() -> AsyncGenerator[str, None]:
-                    response = await acompletion(messages=messages, stream=True, **params)
-                    async for chunk in response:
-                        yield chunk.choices[0].delta.content or ""
+                    first_token_at = None
+                    usage = None
+                    error = None
+                    streamed_chars = 0
+                    try:
+                        async for chunk in response:
+                            usage = getattr(chunk, "usage", None) or usage
+                            if not chunk.choices:
+                                continue
+                            content = chunk.choices[0].delta.content or ""
+                            if content and first_token_at is None:
+                                first_token_at = time.monotonic()
+                            streamed_chars += len(content)
+                            yield content
+                    except BaseException as e:
+                        error = e
+                        raise
+                    finally:
+                        estimate = None
+                        if usage is None:
+                            estimate = (self._prompt_token_estimate(messages), streamed_chars // 4)
+                        self.record_usage(config, "completion_stream", started, usage, first_token_at, error, estimate=estimate)
+                        if error is not None:
+                            # Release the provider connection instead of draining the stream.
+                            close = getattr(response, "aclose", None)
+                            if close is not None:
+                                try:
+                                    await close()
+                                except Exception:
+                                    pass
                 return generator()
-            else:
-                response = await acompletion(messages=messages, **params)
-                return response.choices[0].message.content
+            response = await acompletion(messages=messages, **params)
+            latency_tracker.record(config.model, time.monotonic() - started)
+            self.record_usage(config, "completion", started, getattr(response, "usage", None))
+            return response.choices[0].message.content
         except Exception as e:
-            logging.error(f"Error calling LLM: {e}, provider: {routing_provider}")
+            logging.error(f"Error calling LLM with model {config.model}: {e}, provider: {config.provider}")
+            self.record_usage(config, "completion_stream" if stream else "completion", started, error=e)
             raise e
 
+    @staticmethod
+    def _prompt_token_estimate(messages: list) -> int:
+        return sum(len(str(m.get("content", ""))) for m in messages) // 4 + 1
+
+    def _record_failed_structured(
+        self, config: LLMProviderConfig, started: float, messages: list, error: BaseException
+    ) -> None:
+        # A hedge loser is cancelled after its request went out; the prompt was still billed.
+        cancelled = isinstance(error, asyncio.CancelledError)
+        estimate = (self._prompt_token_estimate(messages), 0) if cancelled else None
+        self.record_usage(config, "structured", started, error=error, estimate=estimate)
+
     @robust_llm_call()
-    async def call_llm_with_structured_output(self, messages: list, output_schema: BaseModel, config_type: str = "chat") -> Any:
-        config = self.chat_config if config_type == "chat" else self.inference_config
+    async def _structured_with_config(
+        self,
+        config: LLMProviderConfig,
+        messages: list,
+        output_schema: BaseModel,
+        **kwargs,
+    ) -> Any:
         params = self._build_llm_params(config)
-        routing_provider = config.provider
+        params.update(kwargs)
         request_kwargs = {key: params[key] for key in ("api_key", "base_url", "api_version") if key in params}
-        try:
-            if instructor is not None:
-                if config.provider == "ollama":
-                    ollama_base_root = (
-                        params.get("base_url")
-                        or config.base_url
-                        or os.environ.get("LLM_API_BASE")
-                        or "http://localhost:11434"
-                    )
-                    ollama_base_url = ollama_base_root.rstrip("/") + "/v1"
-                    ollama_api_key = params.get("api_key") or os.environ.get("OLLAMA_API_KEY", "ollama")
-                    client = instructor.from_openai(
-                        AsyncOpenAI(base_url=ollama_base_url, api_key=ollama_api_key),
-                        mode=instructor.Mode.JSON,
-                    )
-                    ollama_request_kwargs = {key: value for key, value in request_kwargs.items() if key not in {"base_url", "api_key", "api_version"}}
-                    response = await client.chat.completions.create(
-                        model=params["model"].split("/")[-1],
-                        messages=messages,
-                        response_model=output_schema,
-                        temperature=params.get("temperature", 0.3),
-                        max_tokens=params.get("max_tokens"),
-                        **ollama_request_kwargs,
-                    )
-                else:
-                    client = instructor.from_litellm(acompletion, mode=instructor.Mode.JSON)
-                    response = await client.chat.completions.create(
-                        model=params["model"],
-                        messages=messages,
-                        response_model=output_schema,
-                        strict=True,
-                        temperature=params.get("temperature", 0.3),
-                        max_tokens=params.get("max_tokens"),
-                        **request_kwargs,
-                    )
-                return response
+        started = time.monotonic()
+        instructor = _get_instructor()
+        if instructor is not None:
+            if config.provider == "ollama":
+                ollama_base_root = (
+                    params.get("base_url")
+                    or config.base_url
+                    or os.environ.get("LLM_API_BASE")
+                    or "http://localhost:11434"
+                )
+                ollama_base_url = ollama_base_root.rstrip("/") + "/v1"
+                ollama_api_key = params.get("api_key") or os.environ.get("OLLAMA_API_KEY", "ollama")
+                from openai import AsyncOpenAI
+
+                client = instructor.from_openai(
+                    AsyncOpenAI(base_url=ollama_base_url, api_key=ollama_api_key),
+                    mode=instructor.Mode.JSON,
+                )
+                ollama_request_kwargs = {key: value for key, value in request_kwargs.items() if key not in {"base_url", "api_key", "api_version"}}
+                create = client.chat.completions.create_with_completion(
+                    model=params["model"].split("/")[-1],
+                    messages=messages,
+                    response_model=output_schema,
+                    temperature=params.get("temperature", 0.3),
+                    max_tokens=params.get("max_tokens"),
+                    **ollama_request_kwargs,
+                )
             else:
-                fields = []
-                try:
-                    if hasattr(output_schema, "model_fields"):
-                        fields = list(output_schema.model_fields.keys())
-                    elif hasattr(output_schema, "__fields__"):
-                        fields = list(output_schema.__fields__.keys())
-                except Exception:
-                    fields = []
-                extra = {
-                    "role": "system",
-                    "content": "Return a JSON object with keys: " + ", ".join(fields or ["category", "confidence", "reason"]) + ".",
-                }
-                m = messages + [extra]
-                resp = await acompletion(messages=m, **params)
-                content = resp.choices[0].message.content
-                data = {}
-                try:
-                    data = json.loads(content)
-                except Exception:
-                    for ln in content.splitlines():
-                        if ":" in ln:
-                            k, v = ln.split(":", 1)
-                            data[k.strip().lower()] = v.strip()
-                    if "category" not in data:
-                        data["category"] = "OTHERS"
-                try:
-                    mapped = {}
-                    for k in (fields or ["category", "confidence", "reason"]):
-                        mapped[k] = data.get(k) or data.get(k.lower())
-                    return output_schema(**mapped)
-                except Exception:
-                    return output_schema(**{"category": "OTHERS", "confidence": None, "reason": None})
+                client = instructor.from_litellm(acompletion, mode=instructor.Mode.JSON)
+                create = client.chat.completions.create_with_completion(
+                    model=params["model"],
+                    messages=messages,
+                    response_model=output_schema,
+                    strict=True,
+                    temperature=params.get("temperature", 0.3),
+                    max_tokens=params.get("max_tokens"),
+                    **request_kwargs,
+                )
+            try:
+                response, completion = await create
+            except (Exception, asyncio.CancelledError) as e:
+                self._record_failed_structured(config, started, messages, e)
+                raise
+            latency_tracker.record(config.model, time.monotonic() - started)
+            self.record_usage(config, "structured", started, getattr(completion, "usage", None))
+            return response
+
+        fields = []
+        try:
+            if hasattr(output_schema, "model_fields"):
+                fields = list(output_schema.model_fields.keys())
+            elif hasattr(output_schema, "__fields__"):
+                fields = list(output_schema.__fields__.keys())
+        except Exception:
+            fields = []
+        extra = {
+            "role": "system",
+            "content": "Return a JSON object with keys: " + ", ".join(fields or ["category", "confidence", "reason"]) + ".",
+        }
+        m = messages + [extra]
+        try:
+            resp = await acompletion(messages=m, **params)
+        except (Exception, asyncio.CancelledError) as e:
+            self._record_failed_structured(config, started, m, e)
+            raise
+        latency_tracker.record(config.model, time.monotonic() - started)
+        self.record_usage(config, "structured", started, getattr(resp, "usage", None))
+        content = resp.choices[0].message.content
+        data = {}
+        try:
+            data = json.loads(content)
+        except Exception:
+            for ln in content.splitlines():
+                if ":" in ln:
+                    k, v = ln.split(":", 1)
+                    data[k.strip().lower()] = v.strip()
+            if "category" not in data:
+                data["category"] = "OTHERS"
+        try:
+            mapped = {}
+            for k in (fields or ["category", "confidence", "reason"]):
+                mapped[k] = data.get(k) or data.get(k.lower())
+            return output_schema(**mapped)
+        except Exception:
+            return output_schema(**{"category": "OTHERS", "confidence": None, "reason": None})
+
+    async def call_llm_with_specific_model(
+        self,
+        model_identifier: str,
+        messages: list,
+        output_schema: Optional[BaseModel] = None,
+        stream: bool = False,
+        **kwargs,
+    ) -> Union[str, AsyncGenerator[str, None], Any]:
+        self.check_quota()
+        config = self._build_config_for_model_identifier(model_identifier)
+        if output_schema:
+            return await self._structured_with_config(config=config, messages=messages, output_schema=output_schema, **kwargs)
+        return await self._complete_with_config(config=config, messages=messages, stream=stream, **kwargs)
+
+    async def call_llm(self, messages: list, stream: bool = False, config_type: str = "chat") -> Union[str, AsyncGenerator[str, None]]:
+        self.check_quota()
+        return await call_with_failover(
+            self._fallback_chain(config_type),
+            lambda config: self._complete_with_config(config=config, messages=messages, stream=stream),
+            describe=lambda config: config.model,
+        )
+
+    async def call_llm_with_structured_output(
+        self,
+        messages: list,
+        output_schema: BaseModel,
+        config_type: str = "chat",
+        hedge: bool = False,
+    ) -> Any:
+        self.check_quota()
+        chain = self._fallback_chain(config_type)
+
+        def attempt(config: LLMProviderConfig):
+            return self._structured_with_config(config=config, messages=messages, output_schema=output_schema)
+
+        try:
+            if hedge and len(chain) > 1:
+                hedge_after = (
+                    latency_tracker.p95(chain[0].model, min_samples=settings.llm_hedge_min_samples)
+                    or settings.llm_hedge_default_delay
+                )
+                return await call_hedged(
+                    lambda: attempt(chain[0]),
+                    lambda: call_with_failover(chain[1:], attempt, describe=lambda config: config.model),
+                    hedge_after,
+                )
+            return await call_with_failover(chain, attempt, describe=lambda config: config.model)
         except Exception as e:
             logging.error(f"LLM call with structured output failed: {e}")
             return output_schema(**{"category": "OTHERS", "confidence": None, "reason": None})
 
-    @robust_llm_call()
     async def call_llm_multimodal(
         self,
         messages: List[Dict[str, Any]],
@@ -640,8 +688,8 @@ class ProviderService:
             return await self.call_llm(messages, stream=stream, config_type=config_type)
         if not images:
             return await self.call_llm(messages, stream=stream, config_type=config_type)
-        config = self.chat_config if config_type == "chat" else self.inference_config
-        params = self._build_llm_params(config)
+        self.check_quota()
+        config = self._config_for(config_type)
         routing_provider = config.provider
         if images:
             validated_images = self._validate_images_for_multimodal(images)
@@ -649,19 +697,7 @@ class ProviderService:
                 messages = self._format_multimodal_messages(messages, validated_images, routing_provider)
             else:
                 images = None
-        try:
-            if stream:
-                async def generator() -> AsyncGenerator[str, None]:
-                    response = await acompletion(messages=messages, stream=True, **params)
-                    async for chunk in response:
-                        yield chunk.choices[0].delta.content or ""
-                return generator()
-            else:
-                response = await acompletion(messages=messages, **params)
-                return response.choices[0].message.content
-        except Exception as e:
-            logging.error(f"Error calling multimodal LLM: {e}, provider: {routing_provider}")
-            raise e
+        return await self._complete_with_config(config=config, messages=messages, stream=stream)
 
     def _format_multimodal_messages(
         self,
@@ -776,12 +812,11 @@ class ProviderService:
         ]
         return any(vision_model in model_name for vision_model in vision_models)
 
-    def get_pydantic_model(self, provider: str | None = None, model: str | None = None) -> Model | None:
+    def get_pydantic_model(self, provider: str | None = None, model: str | None = None) -> Optional["Model"]:
         target_model = model or self.chat_config.model
         config = self._build_config_for_model_identifier(target_model)
         if provider:
-            config.provider = provider
-            config.auth_provider = provider
+            config = config.with_provider(provider)
         api_key = self._get_api_key(config.auth_provider)
         if not api_key and config.auth_provider == "ollama":
             api_key = os.environ.get("OLLAMA_API_KEY", "ollama")
@@ -799,11 +834,17 @@ class ProviderService:
             provider_kwargs["api_version"] = config.api_version
         openai_like_providers = {"openai", "openrouter", "azure", "ollama"}
         if config.auth_provider in openai_like_providers:
+            from pydantic_ai.models.openai import OpenAIModel
+            from pydantic_ai.providers.openai import OpenAIProvider
+
             if config.auth_provider == "ollama":
                 base_url_root = config.base_url or os.environ.get("LLM_API_BASE") or "http://localhost:11434"
                 provider_kwargs["base_url"] = base_url_root.rstrip("/") + "/v1"
             return OpenAIModel(model_name=model_name, provider=OpenAIProvider(api_key=api_key, **provider_kwargs))
         if config.provider == "anthropic":
+            from pydantic_ai.models.anthropic import AnthropicModel
+            from pydantic_ai.providers.anthropic import AnthropicProvider
+
             anthropic_kwargs = {key: value for key, value in provider_kwargs.items() if key != "api_version"}
             return AnthropicModel(model_name=model_name, provider=AnthropicProvider(api_key=api_key, **anthropic_kwargs))
         raise UnsupportedProviderError(f"Provider '{config.provider}' is not supported for Pydantic-based agents.")
\ No newline at end of file
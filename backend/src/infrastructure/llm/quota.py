@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from src.config.settings import settings
+from src.infrastructure.llm.exceptions import QuotaExceededError
+
+logger = logging.getLogger(__name__)
+
+
+def current_period(now: Optional[datetime] = None) -> str:
+    now = now or datetime.now(timezone.utc)
+    return now.strftime("%Y-%m")
+
+
+def period_start(now: Optional[datetime] = None) -> datetime:
+    now = now or datetime.now(timezone.utc)
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def seconds_until_period_end(now: Optional[datetime] = None) -> float:
+    now = now or datetime.now(timezone.utc)
+    start = period_start(now)
+    if start.month == 12:
+        end = start.replace(year=start.year + 1, month=1)
+    else:
+        end = start.replace(month=start.month + 1)
+    return max(0.0, (end - now).total_seconds())
+
+
+class QuotaStore(ABC):
+    """Per-org monthly token counters and limits.
+
+    Implementations must be cheap enough to hit on every LLM call; a shared
+    store (e.g. Redis) can replace the in-process one for multi-worker deploys.
+    """
+
+    @abstractmethod
+    def get_limit(self, org_id: str) -> Optional[int]:
+        ...
+
+    @abstractmethod
+    def get_usage(self, org_id: str, period: str) -> int:
+        ...
+
+    @abstractmethod
+    def add_usage(self, org_id: str, period: str, tokens: int) -> int:
+        ...
+
+    @abstractmethod
+    def sync(self, period: str, limits: Dict[str, Optional[int]], usage: Dict[str, int]) -> None:
+        ...
+
+
+class InMemoryQuotaStore(QuotaStore):
+    def __init__(self):
+        self._limits: Dict[str, Optional[int]] = {}
+        self._usage: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def get_limit(self, org_id: str) -> Optional[int]:
+        return self._limits.get(org_id)
+
+    def get_usage(self, org_id: str, period: str) -> int:
+        return self._usage.get((org_id, period), 0)
+
+    def add_usage(self, org_id: str, period: str, tokens: int) -> int:
+        with self._lock:
+            total = self._usage.get((org_id, period), 0) + tokens
+            self._usage[(org_id, period)] = total
+            return total
+
+    def sync(self, period: str, limits: Dict[str, Optional[int]], usage: Dict[str, int]) -> None:
+        with self._lock:
+            self._limits = dict(limits)
+            # Local counters may be ahead of the DB while usage rows sit in the write buffer.
+            for org_id, tokens in usage.items():
+                key = (org_id, period)
+                self._usage[key] = max(self._usage.get(key, 0), tokens)
+            self._usage = {key: value for key, value in self._usage.items() if key[1] == period}
+
+
+class QuotaEngine:
+    """Enforces Organization.max_monthly_tokens without touching the DB per call.
+
+    Limits and month-to-date usage are reloaded in the background with one
+    aggregate query; calls in between are counted locally.
+    """
+
+    def __init__(self, store: QuotaStore, refresh_interval: float, enabled: bool = True):
+        self.store = store
+        self.refresh_interval = refresh_interval
+        self.enabled = enabled
+        self._task: Optional[asyncio.Task] = None
+
+    def check(self, org_id: Optional[str]) -> None:
+        if not self.enabled or not org_id:
+            return
+        limit = self.store.get_limit(org_id)
+        if not limit or limit <= 0:
+            return
+        used = self.store.get_usage(org_id, current_period())
+        if used >= limit:
+            raise QuotaExceededError(org_id, limit, used, seconds_until_period_end())
+
+    def consume(self, org_id: Optional[str], tokens: int) -> None:
+        if not org_id or tokens <= 0:
+            return
+        self.store.add_usage(org_id, current_period(), tokens)
+
+    def remaining(self, org_id: str) -> Optional[int]:
+        limit = self.store.get_limit(org_id)
+        if not limit or limit <= 0:
+            return None
+        return max(0, limit - self.store.get_usage(org_id, current_period()))
+
+    def _load(self) -> Tuple[Dict[str, Optional[int]], Dict[str, int]]:
+        from sqlalchemy import func
+
+        from src.config.database import SessionLocal
+        from src.infrastructure.database.models.logs import LLMUsageLog
+        from src.infrastructure.database.models.organizations import Organization
+
+        db = SessionLocal()
+        try:
+            limits = {org_id: limit for org_id, limit in db.query(Organization.id, Organization.max_monthly_tokens).all()}
+            usage_rows = (
+                db.query(LLMUsageLog.org_id, func.coalesce(func.sum(LLMUsageLog.total_tokens), 0))
+                .filter(LLMUsageLog.created_at >= period_start())
+                .group_by(LLMUsageLog.org_id)
+                .all()
+            )
+            return limits, {org_id: int(total) for org_id, total in usage_rows}
+        finally:
+            db.close()
+
+    async def refresh(self) -> None:
+        period = current_period()
+        limits, usage = await asyncio.to_thread(self._load)
+        self.store.sync(period, limits, usage)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Token quota refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        if not self.enabled or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+quota_engine = QuotaEngine(
+    InMemoryQuotaStore(),
+    refresh_interval=settings.quota_refresh_interval_seconds,
+    enabled=settings.quota_enforcement_enabled,
+)
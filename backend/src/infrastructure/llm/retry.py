@@ -0,0 +1,398 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from src.config.settings import settings as app_settings
+from src.infrastructure.llm.exceptions import (
+    CircuitOpenError,
+    LLMDeadlineExceededError,
+    RetryBudgetExhaustedError,
+)
+
+logger = logging.getLogger(__name__)
+
+OVERLOAD_ERROR_PATTERNS = {
+    "anthropic": ["overloaded", "overloaded_error", "capacity", "rate limit exceeded"],
+    "openai": [
+        "rate_limit_exceeded",
+        "capacity",
+        "overloaded",
+        "server_error",
+        "timeout",
+    ],
+    "general": [
+        "timeout",
+        "insufficient capacity",
+        "server_error",
+        "internal_server_error",
+    ],
+}
+
+
+class RetrySettings:
+    def __init__(
+        self,
+        max_retries: int = 8,
+        min_delay: float = 1.0,
+        max_delay: float = 120.0,
+        base_delay: float = 2.0,
+        jitter_factor: float = 0.2,
+        step_increase: float = 1.8,
+        retry_on_timeout: bool = True,
+        retry_on_overloaded: bool = True,
+        retry_on_rate_limit: bool = True,
+        retry_on_server_error: bool = True,
+    ):
+        self.max_retries = max_retries
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.base_delay = base_delay
+        self.jitter_factor = jitter_factor
+        self.step_increase = step_increase
+        self.retry_on_timeout = retry_on_timeout
+        self.retry_on_overloaded = retry_on_overloaded
+        self.retry_on_rate_limit = retry_on_rate_limit
+        self.retry_on_server_error = retry_on_server_error
+
+
+def identify_provider_from_error(error: Exception) -> str:
+    error_str = str(error).lower()
+    for provider in ["anthropic", "openai", "cohere", "azure"]:
+        if provider.lower() in error_str.lower():
+            return provider
+    return "unknown"
+
+
+def is_overload_error(error: Exception) -> bool:
+    error_str = str(error).lower()
+    provider = identify_provider_from_error(error)
+    patterns = OVERLOAD_ERROR_PATTERNS.get(provider, []) + OVERLOAD_ERROR_PATTERNS["general"]
+    return any(pattern in error_str for pattern in patterns) or "rate limit" in error_str or "429" in error_str
+
+
+def is_recoverable_error(error: Exception, settings: RetrySettings) -> bool:
+    error_str = str(error).lower()
+    provider = identify_provider_from_error(error)
+    if settings.retry_on_timeout and (isinstance(error, asyncio.TimeoutError) or "timeout" in error_str):
+        return True
+    if settings.retry_on_overloaded:
+        overload_patterns = (
+            OVERLOAD_ERROR_PATTERNS.get(provider, [])
+            + OVERLOAD_ERROR_PATTERNS["general"]
+        )
+        if any(pattern in error_str for pattern in overload_patterns):
+            return True
+    if settings.retry_on_rate_limit and any(
+        limit_pattern in error_str
+        for limit_pattern in [
+            "rate limit",
+            "rate_limit",
+            "ratelimit",
+            "requests per minute",
+        ]
+    ):
+        return True
+    if settings.retry_on_server_error and any(
+        server_err in error_str
+        for server_err in [
+            "server_error",
+            "internal_server_error",
+            "500",
+            "502",
+            "503",
+            "504",
+        ]
+    ):
+        return True
+    return False
+
+
+def calculate_backoff_time(retry_count: int, settings: RetrySettings) -> float:
+    delay = min(settings.max_delay, settings.base_delay * (settings.step_increase**retry_count))
+    jitter = random.uniform(1 - settings.jitter_factor, 1 + settings.jitter_factor)
+    final_delay = max(settings.min_delay, min(settings.max_delay, delay * jitter))
+    return final_delay
+
+
+_deadline: ContextVar[Optional[float]] = ContextVar("llm_deadline", default=None)
+
+
+@contextmanager
+def llm_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Bound every LLM call made inside this block (including retries) by `seconds`.
+
+    Nested deadlines never extend an outer one.
+    """
+    if not seconds or seconds <= 0:
+        yield
+        return
+    new_deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        new_deadline = min(current, new_deadline)
+    token = _deadline.set(new_deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def _deadline_expired() -> bool:
+    # The event loop may fire wait_for's timer up to one clock tick early.
+    remaining = remaining_time()
+    return remaining is not None and remaining <= 0.001
+
+
+class RetryBudget:
+    """Token bucket shared by every caller of one provider.
+
+    Each first attempt deposits `ratio` tokens and each retry withdraws one, so
+    retries stay a bounded fraction of traffic no matter how many callers fail
+    at once.
+    """
+
+    def __init__(self, ratio: float, min_tokens: float, max_tokens: Optional[float] = None):
+        self.ratio = ratio
+        self.max_tokens = max_tokens if max_tokens is not None else max(min_tokens, 1.0) * 10
+        self._tokens = min_tokens
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def retry_after(self) -> float:
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            # Half-open: let a single probe through.
+            if self._probe_in_flight:
+                return False
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_overload(self) -> None:
+        with self._lock:
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                return
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def record_other_failure(self) -> None:
+        with self._lock:
+            self._probe_in_flight = False
+
+
+class RetryMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, float]] = {}
+
+    def incr(self, provider: str, key: str, value: float = 1.0) -> None:
+        with self._lock:
+            bucket = self._data.setdefault(
+                provider,
+                {
+                    "calls": 0,
+                    "retries": 0,
+                    "backoff_seconds": 0.0,
+                    "budget_exhausted": 0,
+                    "circuit_rejections": 0,
+                    "deadline_exceeded": 0,
+                    "failures": 0,
+                },
+            )
+            bucket[key] = bucket.get(key, 0) + value
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {provider: dict(values) for provider, values in self._data.items()}
+
+
+retry_metrics = RetryMetrics()
+
+_budgets: Dict[str, RetryBudget] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_retry_budget(provider: str) -> RetryBudget:
+    with _registry_lock:
+        budget = _budgets.get(provider)
+        if budget is None:
+            budget = RetryBudget(
+                ratio=app_settings.llm_retry_budget_ratio,
+                min_tokens=app_settings.llm_retry_budget_min_tokens,
+            )
+            _budgets[provider] = budget
+        return budget
+
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    with _registry_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                failure_threshold=app_settings.llm_circuit_failure_threshold,
+                reset_timeout=app_settings.llm_circuit_reset_seconds,
+            )
+            _breakers[provider] = breaker
+        return breaker
+
+
+def get_resilience_snapshot() -> Dict[str, Any]:
+    with _registry_lock:
+        providers = set(_budgets) | set(_breakers)
+        budgets = dict(_budgets)
+        breakers = dict(_breakers)
+    metrics = retry_metrics.snapshot()
+    return {
+        provider: {
+            **metrics.get(provider, {}),
+            "budget_tokens": round(budgets[provider].tokens, 2) if provider in budgets else None,
+            "circuit_state": breakers[provider].state if provider in breakers else CircuitBreaker.CLOSED,
+        }
+        for provider in sorted(providers | set(metrics))
+    }
+
+
+def _resolve_provider(args: tuple, kwargs: dict) -> str:
+    owner = args[0] if args else None
+    resolver: Optional[Callable[..., str]] = getattr(owner, "_routing_provider_for", None)
+    if resolver is not None:
+        try:
+            return resolver(**kwargs)
+        except Exception:
+            pass
+    return "unknown"
+
+
+def robust_llm_call(settings: Optional[RetrySettings] = None):
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            retry_settings = settings or getattr(args[0] if args else None, "retry_settings", None) or RetrySettings()
+            provider = _resolve_provider(args, kwargs)
+            breaker = get_circuit_breaker(provider)
+            budget = get_retry_budget(provider)
+            budget.record_request()
+            retry_metrics.incr(provider, "calls")
+            retries = 0
+            while True:
+                if not breaker.allow_request():
+                    retry_metrics.incr(provider, "circuit_rejections")
+                    raise CircuitOpenError(provider, breaker.retry_after())
+                remaining = remaining_time()
+                if remaining is not None and remaining <= 0:
+                    retry_metrics.incr(provider, "deadline_exceeded")
+                    raise LLMDeadlineExceededError(f"Deadline exceeded before calling {provider}")
+                try:
+                    if remaining is not None:
+                        result = await asyncio.wait_for(func(*args, **kwargs), timeout=remaining)
+                    else:
+                        result = await func(*args, **kwargs)
+                    breaker.record_success()
+                    return result
+                except Exception as e:
+                    if isinstance(e, asyncio.TimeoutError) and _deadline_expired():
+                        breaker.record_other_failure()
+                        retry_metrics.incr(provider, "deadline_exceeded")
+                        raise LLMDeadlineExceededError(f"Deadline exceeded while calling {provider}") from e
+                    if is_overload_error(e):
+                        breaker.record_overload()
+                    else:
+                        breaker.record_other_failure()
+                    if not is_recoverable_error(e, retry_settings):
+                        retry_metrics.incr(provider, "failures")
+                        raise
+                    if retries >= retry_settings.max_retries:
+                        retry_metrics.incr(provider, "failures")
+                        logger.error(
+                            f"Max retries ({retry_settings.max_retries}) exceeded for {provider} API call. "
+                            f"Last error: {str(e)}"
+                        )
+                        raise
+                    delay = calculate_backoff_time(retries, retry_settings)
+                    remaining = remaining_time()
+                    if remaining is not None and delay >= remaining:
+                        retry_metrics.incr(provider, "deadline_exceeded")
+                        raise LLMDeadlineExceededError(
+                            f"Deadline leaves {max(remaining, 0):.2f}s, backoff needs {delay:.2f}s"
+                        ) from e
+                    if not budget.try_acquire():
+                        retry_metrics.incr(provider, "budget_exhausted")
+                        raise RetryBudgetExhaustedError(provider, e) from e
+                    logger.warning(
+                        f"{provider.capitalize()} API error: {str(e)}. "
+                        f"Retry {retries+1}/{retry_settings.max_retries}, "
+                        f"waiting {delay:.2f}s before next attempt..."
+                    )
+                    retry_metrics.incr(provider, "retries")
+                    retry_metrics.incr(provider, "backoff_seconds", delay)
+                    await asyncio.sleep(delay)
+                    retries += 1
+        return wrapper
+    return decorator
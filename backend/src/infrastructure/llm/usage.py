@@ -0,0 +1,367 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# USD per 1M (prompt, completion) tokens at list price.
+MODEL_PRICING_PER_MILLION: Dict[str, Tuple[float, float]] = {
+    "openai/gpt-5.1": (1.25, 10.00),
+    "openai/gpt-4.1": (2.00, 8.00),
+    "openai/gpt-4.1-mini": (0.40, 1.60),
+    "openai/gpt-4o": (2.50, 10.00),
+    "openai/o4-mini": (1.10, 4.40),
+    "anthropic/claude-opus-4-1-20250805": (15.00, 75.00),
+    "anthropic/claude-sonnet-4-5-20250929": (3.00, 15.00),
+    "anthropic/claude-sonnet-4-20250514": (3.00, 15.00),
+    "anthropic/claude-3-7-sonnet-20250219": (3.00, 15.00),
+    "anthropic/claude-haiku-4-5-20251001": (1.00, 5.00),
+    "anthropic/claude-3-5-haiku-20241022": (0.80, 4.00),
+    "openrouter/deepseek/deepseek-chat-v3-0324": (0.27, 1.10),
+    "openrouter/meta-llama/llama-3.3-70b-instruct": (0.13, 0.40),
+    "openrouter/google/gemini-2.0-flash-001": (0.10, 0.40),
+    "openrouter/google/gemini-2.5-pro-preview": (1.25, 10.00),
+    "openrouter/google/gemini-2.0-flash-exp:free": (0.0, 0.0),
+}
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text; close enough for budgeting.
+    return len(text) // 4 + 1
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    pricing = MODEL_PRICING_PER_MILLION.get(model)
+    if pricing is None:
+        return None
+    prompt_price, completion_price = pricing
+    return round((prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000, 6)
+
+
+def tokens_from_usage(usage: Any) -> Tuple[int, int]:
+    """Normalize litellm / openai / pydantic-ai usage objects to (prompt, completion)."""
+    if usage is None:
+        return 0, 0
+    if isinstance(usage, dict):
+        get = usage.get
+    else:
+        def get(key, default=None):
+            return getattr(usage, key, default)
+    prompt = get("prompt_tokens") or get("input_tokens") or get("request_tokens") or 0
+    completion = get("completion_tokens") or get("output_tokens") or get("response_tokens") or 0
+    return int(prompt), int(completion)
+
+
+@dataclass
+class UsageRecord:
+    provider: str
+    model: str
+    endpoint: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    duration_ms: Optional[int] = None
+    time_to_first_token_ms: Optional[int] = None
+    status: str = "success"
+    error_code: Optional[str] = None
+    error_message: Optional[str] = None
+    org_id: Optional[str] = None
+    project_id: Optional[str] = None
+    user_id: Optional[str] = None
+    agent_id: Optional[str] = None
+    conversation_id: Optional[str] = None
+    message_id: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def cost_usd(self) -> Optional[float]:
+        return estimate_cost(self.model, self.prompt_tokens, self.completion_tokens)
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        if not self.completion_tokens or not self.duration_ms:
+            return None
+        generation_ms = self.duration_ms - (self.time_to_first_token_ms or 0)
+        if generation_ms <= 0:
+            return None
+        return round(self.completion_tokens / (generation_ms / 1000), 2)
+
+    def to_row(self) -> Dict[str, Any]:
+        return {
+            "org_id": self.org_id,
+            "project_id": self.project_id,
+            "user_id": self.user_id,
+            "agent_id": self.agent_id,
+            "conversation_id": self.conversation_id,
+            "message_id": self.message_id,
+            "provider": self.provider[:50],
+            "model": self.model[:100],
+            "endpoint": self.endpoint[:100],
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "cost_usd": self.cost_usd,
+            "request_duration_ms": self.duration_ms,
+            "time_to_first_token_ms": self.time_to_first_token_ms,
+            "tokens_per_second": self.tokens_per_second,
+            "status": self.status,
+            "error_code": self.error_code,
+            "error_message": self.error_message,
+            "metadata_": self.metadata,
+            "created_at": self.created_at,
+        }
+
+
+class UsageScope:
+    """Attribution for every LLM call made while the scope is active.
+
+    Records are held until the scope closes so that rows referencing the
+    conversation or message are only written once those rows exist.
+    """
+
+    def __init__(
+        self,
+        org_id: Optional[str] = None,
+        project_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        agent_id: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+    ):
+        self.org_id = org_id
+        self.project_id = project_id
+        self.user_id = user_id
+        self.agent_id = agent_id
+        self.conversation_id = conversation_id
+        self.message_id: Optional[str] = None
+        self.records: List[UsageRecord] = []
+
+    def add(self, record: UsageRecord) -> None:
+        self.records.append(record)
+
+    @property
+    def prompt_tokens(self) -> int:
+        return sum(r.prompt_tokens for r in self.records)
+
+    @property
+    def completion_tokens(self) -> int:
+        return sum(r.completion_tokens for r in self.records)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def cost_usd(self) -> Optional[float]:
+        costs = [r.cost_usd for r in self.records if r.cost_usd is not None]
+        return round(sum(costs), 6) if costs else None
+
+    def first_token_ms(self) -> Optional[int]:
+        for record in self.records:
+            if record.time_to_first_token_ms is not None:
+                return record.time_to_first_token_ms
+        return None
+
+    def _attribute(self, record: UsageRecord) -> UsageRecord:
+        for attr in ("org_id", "project_id", "user_id", "agent_id", "conversation_id", "message_id"):
+            if getattr(record, attr) is None:
+                setattr(record, attr, getattr(self, attr))
+        return record
+
+    def drain(self) -> List[UsageRecord]:
+        records, self.records = self.records, []
+        return [self._attribute(r) for r in records]
+
+
+_current_scope: ContextVar[Optional[UsageScope]] = ContextVar("llm_usage_scope", default=None)
+
+
+def current_usage_scope() -> Optional[UsageScope]:
+    return _current_scope.get()
+
+
+@contextmanager
+def usage_scope(**attribution: Optional[str]) -> Iterator[UsageScope]:
+    parent = _current_scope.get()
+    scope = UsageScope(**attribution)
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        try:
+            _current_scope.reset(token)
+        except ValueError:
+            # async generators can be finalized from a different context
+            _current_scope.set(parent)
+        records = scope.drain()
+        if parent is not None:
+            for record in records:
+                parent.add(record)
+        else:
+            usage_recorder.record_many(records)
+
+
+def record_usage(record: UsageRecord) -> None:
+    """Hot-path entry point: never touches the database."""
+    scope = _current_scope.get()
+    if scope is not None:
+        scope.add(record)
+    else:
+        usage_recorder.record(record)
+
+
+# Attribution columns that may point at rows which were rolled back or deleted.
+_OPTIONAL_REFERENCES = ("project_id", "user_id", "agent_id", "conversation_id", "message_id")
+
+
+def _detached(row: Dict[str, Any]) -> Dict[str, Any]:
+    """The row with its optional references cleared; the originals are kept in metadata."""
+    dropped = {key: row[key] for key in _OPTIONAL_REFERENCES if row.get(key)}
+    metadata = dict(row.get("metadata_") or {}, detached_references=dropped)
+    return dict(row, metadata_=metadata, **{key: None for key in _OPTIONAL_REFERENCES})
+
+
+class UsageRecorder:
+    """Ring buffer of usage records drained by a background bulk-insert task."""
+
+    def __init__(self, capacity: int, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: Deque[UsageRecord] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.dropped = 0
+        self.written = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def record(self, record: UsageRecord) -> None:
+        self.record_many([record])
+
+    def record_many(self, records: List[UsageRecord]) -> None:
+        if not records:
+            return
+        with self._lock:
+            overflow = len(self._buffer) + len(records) - (self._buffer.maxlen or 0)
+            if overflow > 0:
+                self.dropped += overflow
+            self._buffer.extend(records)
+            full = len(self._buffer) >= self.batch_size
+        if full and self._wakeup is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def _take_batch(self) -> List[UsageRecord]:
+        with self._lock:
+            n = min(self.batch_size, len(self._buffer))
+            return [self._buffer.popleft() for _ in range(n)]
+
+    def _write_batch(self, batch: List[UsageRecord]) -> None:
+        from src.config.database import SessionLocal
+        from src.infrastructure.database.models.logs import LLMUsageLog
+
+        # org_id is required on the table; unattributed calls only feed metrics.
+        rows = [r.to_row() for r in batch if r.org_id]
+        self.skipped += len(batch) - len(rows)
+        if not rows:
+            return
+        db = SessionLocal()
+        try:
+            db.bulk_insert_mappings(LLMUsageLog, rows)
+            db.commit()
+            self.written += len(rows)
+        except IntegrityError as e:
+            # Usually one row referencing a conversation or message that was never
+            # committed; don't let it take the rest of the batch down with it.
+            db.rollback()
+            logger.warning(f"LLM usage batch of {len(rows)} rejected ({e.orig}); retrying row by row")
+            self._write_rows(db, LLMUsageLog, rows)
+        except Exception as e:
+            db.rollback()
+            self.failed += len(rows)
+            logger.error(f"Failed to write {len(rows)} LLM usage records: {e}")
+        finally:
+            db.close()
+
+    def _write_rows(self, db, model, rows: List[Dict[str, Any]]) -> None:
+        """Insert rows one savepoint at a time, dropping optional references a row's FKs reject."""
+        written = 0
+        for row in rows:
+            for candidate in (row, _detached(row)):
+                try:
+                    with db.begin_nested():
+                        db.bulk_insert_mappings(model, [candidate])
+                except IntegrityError:
+                    continue
+                written += 1
+                break
+            else:
+                self.failed += 1
+                logger.error(f"Dropping LLM usage record for org {row['org_id']}: rejected even without references")
+        try:
+            db.commit()
+            self.written += written
+        except Exception as e:
+            db.rollback()
+            self.failed += written
+            logger.error(f"Failed to write {written} LLM usage records: {e}")
+
+    async def flush(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            await asyncio.to_thread(self._write_batch, batch)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"LLM usage flush failed: {e}")
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+usage_recorder = UsageRecorder(
+    capacity=settings.usage_buffer_capacity,
+    batch_size=settings.usage_flush_batch_size,
+    flush_interval=settings.usage_flush_interval_seconds,
+)
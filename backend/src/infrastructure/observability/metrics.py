@@ -0,0 +1,161 @@
+import ipaddress
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Mapping, Optional, Tuple
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+except Exception:
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+    REGISTRY = Counter = Gauge = Histogram = generate_latest = None
+    CounterMetricFamily = GaugeMetricFamily = None
+
+logger = logging.getLogger(__name__)
+
+_PREFIX = "railvision_"
+
+# Seconds; LLM calls and streams run long, storage round trips short.
+_LLM_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0, 120.0)
+_FAST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class _NoopMetric:
+    """Stands in for every metric when prometheus_client is not installed."""
+
+    def labels(self, *args: Any, **kwargs: Any) -> "_NoopMetric":
+        return self
+
+    def observe(self, value: float) -> None:
+        pass
+
+    def inc(self, amount: float = 1.0) -> None:
+        pass
+
+    def dec(self, amount: float = 1.0) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        pass
+
+
+def _histogram(name: str, doc: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = _FAST_BUCKETS):
+    if Histogram is None:
+        return _NoopMetric()
+    return Histogram(_PREFIX + name, doc, labels, buckets=buckets)
+
+
+def _counter(name: str, doc: str, labels: Tuple[str, ...] = ()):
+    if Counter is None:
+        return _NoopMetric()
+    return Counter(_PREFIX + name, doc, labels)
+
+
+def _gauge(name: str, doc: str, labels: Tuple[str, ...] = ()):
+    if Gauge is None:
+        return _NoopMetric()
+    return Gauge(_PREFIX + name, doc, labels)
+
+
+LLM_CALL_SECONDS = _histogram(
+    "llm_call_seconds", "LLM call latency", ("model", "config_type", "endpoint", "status"), _LLM_BUCKETS
+)
+LLM_TIME_TO_FIRST_TOKEN_SECONDS = _histogram(
+    "llm_time_to_first_token_seconds", "Time to the first streamed token", ("model", "config_type"), _LLM_BUCKETS
+)
+CONTEXT_ENRICH_SECONDS = _histogram("context_enrich_seconds", "context_enrich stage timings", ("stage",), _LLM_BUCKETS)
+BUILD_STATE_SECONDS = _histogram("build_state_seconds", "Neo4j strategic state query time")
+VECTOR_OP_SECONDS = _histogram("vector_op_seconds", "Vector store call latency", ("backend", "operation"))
+INGESTION_PAGES_PER_SECOND = _histogram(
+    "ingestion_pages_per_second", "Pages processed per second per document", buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50)
+)
+INGESTION_PAGES = _counter("ingestion_pages_total", "Pages ingested")
+INGESTION_SEGMENTS_PENDING = _gauge("ingestion_segments_pending", "Segments waiting for or in classification/extraction")
+QUEUE_DEPTH = _gauge("queue_depth", "Items waiting in in-process queues", ("queue",))
+ANSWER_CACHE_REQUESTS = _counter("answer_cache_requests_total", "Semantic answer cache lookups", ("result",))
+FAILURES = _counter("failures_total", "Failures that were handled and degraded the result", ("component",))
+
+
+@contextmanager
+def timed(metric: Any, **labels: str) -> Iterator[None]:
+    """Observe the block's wall time, including when it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        (metric.labels(**labels) if labels else metric).observe(time.perf_counter() - started)
+
+
+def track_queue(name: str, depth: Callable[[], float]) -> None:
+    """Report `depth()` as queue_depth{queue=name}; evaluated at scrape time only."""
+    QUEUE_DEPTH.labels(queue=name).set_function(depth)
+
+
+class _ResilienceCollector:
+    """Exposes retry_metrics and circuit state at scrape time instead of double counting on the hot path."""
+
+    def collect(self):
+        from src.infrastructure.llm.retry import CircuitBreaker, get_resilience_snapshot
+
+        events = CounterMetricFamily(_PREFIX + "llm_resilience_events", "LLM calls, retries and rejections", labels=("provider", "event"))
+        backoff = CounterMetricFamily(_PREFIX + "llm_retry_backoff_seconds", "Time spent backing off between retries", labels=("provider",))
+        circuit = GaugeMetricFamily(_PREFIX + "llm_circuit_open", "1 while the provider circuit is open", labels=("provider",))
+        for provider, values in get_resilience_snapshot().items():
+            for event in ("calls", "retries", "budget_exhausted", "circuit_rejections", "deadline_exceeded", "failures"):
+                events.add_metric((provider, event), values.get(event) or 0)
+            backoff.add_metric((provider,), values.get("backoff_seconds") or 0.0)
+            circuit.add_metric((provider,), 1.0 if values.get("circuit_state") == CircuitBreaker.OPEN else 0.0)
+        yield events
+        yield backoff
+        yield circuit
+
+
+_collector_registered = False
+
+
+def register_collectors() -> None:
+    global _collector_registered
+    if REGISTRY is None or _collector_registered:
+        return
+    REGISTRY.register(_ResilienceCollector())
+    _collector_registered = True
+
+
+def parse_networks(spec: str) -> List[Any]:
+    """Comma separated CIDRs; invalid entries are logged and skipped."""
+    networks = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(entry, strict=False))
+        except ValueError:
+            logger.warning(f"Ignoring invalid metrics network {entry!r}")
+    return networks
+
+
+def scrape_allowed(client_host: Optional[str], headers: Mapping[str, str], networks: List[Any]) -> bool:
+    """True for direct connections from an allowed network.
+
+    Requests relayed by a reverse proxy carry X-Forwarded-For/Forwarded and
+    are refused even though the proxy itself sits on an internal address.
+    """
+    if "x-forwarded-for" in headers or "forwarded" in headers or not client_host:
+        return False
+    try:
+        address = ipaddress.ip_address(client_host)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def render_latest() -> Optional[bytes]:
+    """Prometheus exposition text, or None when prometheus_client is missing."""
+    if generate_latest is None:
+        return None
+    return generate_latest(REGISTRY)
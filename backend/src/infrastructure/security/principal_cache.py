@@ -0,0 +1,128 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+
+from src.config.settings import settings
+from src.infrastructure.database.models import User, UserStatus
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller; carries only what request handlers read."""
+
+    id: str
+    email: Optional[str]
+    org_id: Optional[str]
+    role_id: Optional[str]
+    status: UserStatus
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, email=user.email, org_id=user.org_id, role_id=user.role_id, status=user.status)
+
+    @classmethod
+    def from_claims(cls, payload: Dict) -> Optional["Principal"]:
+        if not payload.get("uid"):
+            return None
+        try:
+            status = UserStatus(payload.get("status") or UserStatus.ACTIVE.value)
+        except ValueError:
+            return None
+        return cls(
+            id=payload["uid"],
+            email=payload.get("sub"),
+            org_id=payload.get("org_id"),
+            role_id=payload.get("role_id"),
+            status=status,
+        )
+
+
+class PrincipalCache:
+    """Short-TTL token -> Principal cache, bounded and invalidated per user."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[Principal, float]] = {}
+        self._keys_by_user: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(payload: Dict) -> Optional[str]:
+        sub = payload.get("sub")
+        if not sub:
+            return None
+        return f"{sub}:{payload.get('jti') or payload.get('exp') or ''}"
+
+    def get(self, key: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._drop(key, principal.id)
+                return None
+            return principal
+
+    def put(self, key: str, principal: Principal, token_exp: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds
+        if token_exp is not None:
+            ttl = min(ttl, max(0.0, token_exp - time.time()))
+        if ttl <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._evict_expired()
+                if len(self._entries) >= self.max_entries:
+                    oldest = next(iter(self._entries))
+                    self._drop(oldest, self._entries[oldest][0].id)
+            self._entries[key] = (principal, time.monotonic() + ttl)
+            self._keys_by_user.setdefault(principal.id, set()).add(key)
+
+    def invalidate_user(self, user_id: str) -> None:
+        with self._lock:
+            for key in self._keys_by_user.pop(user_id, set()):
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _drop(self, key: str, user_id: str) -> None:
+        self._entries.pop(key, None)
+        keys = self._keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                self._keys_by_user.pop(user_id, None)
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        for key, (principal, expires_at) in list(self._entries.items()):
+            if expires_at <= now:
+                self._drop(key, principal.id)
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.auth_principal_cache_ttl_seconds,
+    max_entries=settings.auth_principal_cache_max_entries,
+)
+
+_PRINCIPAL_FIELDS = ("email", "org_id", "role_id", "status")
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_on_update(mapper, connection, target: User) -> None:
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in _PRINCIPAL_FIELDS):
+        principal_cache.invalidate_user(target.id)
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_on_delete(mapper, connection, target: User) -> None:
+    principal_cache.invalidate_user(target.id)
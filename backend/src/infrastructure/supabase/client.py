@@ -1,13 +1,17 @@
-from typing import Optional
-from supabase import create_client, Client
+from typing import TYPE_CHECKING, Optional
 from src.config.settings import settings
 
-_client: Optional[Client] = None
+if TYPE_CHECKING:
+    from supabase import Client
 
-def get_supabase() -> Client:
+_client: Optional["Client"] = None
+
+def get_supabase() -> "Client":
     global _client
     if _client is None:
         if not settings.supabase_url or not settings.supabase_anon_key:
             raise RuntimeError("Supabase URL or ANON KEY not configured in environment")
+        from supabase import create_client
+
         _client = create_client(settings.supabase_url, settings.supabase_anon_key)
     return _client
@@ -1,12 +1,15 @@
-from .client import get_index
+from .client import get_vector_store
 from .embedder import embed_text
 from .writer import upsert_segment, persist_to_pinecone
-from .retriever import retrieve_context
+from .retriever import retrieve_context, retrieve_hybrid
+from .sparse import sparse_index
 
 __all__ = [
-    "get_index",
+    "get_vector_store",
     "embed_text",
     "upsert_segment",
     "persist_to_pinecone",
-    "retrieve_context"
+    "retrieve_context",
+    "retrieve_hybrid",
+    "sparse_index"
 ]
@@ -0,0 +1,93 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.infrastructure.llm.usage import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+def save_chunks(
+    segments: List[Dict[str, Any]],
+    org_id: str,
+    project_id: Optional[str] = None,
+    embedding_model: Optional[str] = None,
+    embedding_dimension: Optional[int] = None,
+) -> None:
+    """Persist segment text in document_chunks, keyed by the Pinecone vector id.
+
+    `segments` are dicts with id, doc_id, text, page_numbers and any extra
+    metadata. Re-ingesting the same ids replaces the previous rows.
+    """
+    from src.config.database import SessionLocal
+    from src.infrastructure.database.models import DocumentChunk
+
+    ids = [s["id"] for s in segments]
+    db = SessionLocal()
+    try:
+        db.query(DocumentChunk).filter(DocumentChunk.pinecone_id.in_(ids)).delete(synchronize_session=False)
+        db.add_all(
+            DocumentChunk(
+                document_id=s["doc_id"],
+                org_id=org_id,
+                project_id=project_id,
+                chunk_index=i,
+                chunk_text=s["text"],
+                chunk_tokens=estimate_tokens(s["text"]),
+                pinecone_id=s["id"],
+                embedding_model=embedding_model,
+                embedding_dimension=embedding_dimension,
+                page_number=int(s["page_numbers"][0]) if s.get("page_numbers") else None,
+                chunk_metadata={k: v for k, v in s.items() if k not in ("id", "doc_id", "text")},
+            )
+            for i, s in enumerate(segments)
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def fetch_texts(ids: Iterable[str]) -> Dict[str, str]:
+    """Segment text for Pinecone ids, in one IN query."""
+    ids = list(dict.fromkeys(i for i in ids if i))
+    if not ids:
+        return {}
+    from src.config.database import SessionLocal
+    from src.infrastructure.database.models import DocumentChunk
+
+    db = SessionLocal()
+    try:
+        rows = db.query(DocumentChunk.pinecone_id, DocumentChunk.chunk_text).filter(DocumentChunk.pinecone_id.in_(ids)).all()
+        return {pinecone_id: text for pinecone_id, text in rows}
+    finally:
+        db.close()
+
+
+def hydrate(matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fill in metadata text for matches whose vectors no longer carry it.
+
+    Vectors written before text moved to the chunk store still have it in
+    their metadata and are returned untouched.
+    """
+    missing = [m["id"] for m in matches if isinstance(m.get("text"), dict) and not m["text"].get("text")]
+    if not missing:
+        return matches
+    try:
+        texts = fetch_texts(missing)
+    except Exception as e:
+        logger.error(f"Chunk text lookup failed for {len(missing)} segments: {e}")
+        return matches
+    hydrated = []
+    for m in matches:
+        if isinstance(m.get("text"), dict) and not m["text"].get("text"):
+            text = texts.get(m["id"])
+            if text is None:
+                # Nothing to show the model; the chunk row is gone or was never written.
+                continue
+            m = dict(m, text=dict(m["text"], text=text))
+        hydrated.append(m)
+    if len(hydrated) < len(matches):
+        logger.warning(f"Dropped {len(matches) - len(hydrated)} matches with no stored text")
+    return hydrated
@@ -1,7 +1,47 @@
-from pinecone import Pinecone
+import threading
+from typing import List, Optional
+
 from src.config.settings import settings
+from src.infrastructure.vector.store import LocalVectorStore, PineconeVectorStore, VectorStore
+
+DEFAULT_NAMESPACE = ""
+
+_store: Optional[VectorStore] = None
+_store_lock = threading.Lock()
+
+
+def get_vector_store() -> VectorStore:
+    """The configured backend: Pinecone, or the local NumPy index for dev, CI and on-prem."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if settings.vector_backend == "local":
+                    _store = LocalVectorStore(
+                        settings.local_vector_path,
+                        ivf_lists=settings.local_vector_ivf_lists,
+                        nprobe=settings.local_vector_ivf_nprobe,
+                        quantization=settings.local_vector_quantization,
+                    )
+                else:
+                    _store = PineconeVectorStore(settings.pinecone_api_key, settings.pinecone_index_name)
+    return _store
+
+
+def namespace_for(org_id: Optional[str], project_id: Optional[str] = None) -> str:
+    """Namespace a segment is written to: per org, or per org+project in "project" mode."""
+    mode = settings.pinecone_namespace_mode
+    if mode == "none" or not org_id:
+        return DEFAULT_NAMESPACE
+    if mode == "project" and project_id:
+        return f"org-{org_id}:proj-{project_id}"
+    return f"org-{org_id}"
 
-pc = Pinecone(api_key=settings.pinecone_api_key)
 
-def get_index():
-    return pc.Index(settings.pinecone_index_name)
+def read_namespaces(org_id: Optional[str], project_id: Optional[str] = None) -> List[str]:
+    """Namespaces a query must cover: the project's own plus the org-wide one."""
+    namespaces = [namespace_for(org_id, project_id)]
+    org_namespace = namespace_for(org_id)
+    if org_namespace not in namespaces:
+        namespaces.append(org_namespace)
+    return namespaces
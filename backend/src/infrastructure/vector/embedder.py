@@ -1,22 +1,38 @@
-from typing import List
-from openai import OpenAI
+import threading
+from typing import List, Optional
 from src.config.settings import settings
 
-client = OpenAI(api_key=settings.openai_api_key)
+_client = None
+_client_lock = threading.Lock()
 
 EMBEDDING_MODEL = "text-embedding-3-large"
 
+def get_openai_client():
+    """Built on first embed so workers boot without an OpenAI key or the SDK import cost."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+
+                _client = OpenAI(api_key=settings.openai_api_key)
+    return _client
+
 def embed_text(text: str) -> List[float]:
     return embed_texts([text])[0]
 
-def embed_texts(texts: List[str]) -> List[List[float]]:
+def embed_texts(texts: List[str], dimensions: Optional[int] = None) -> List[List[float]]:
+    """`dimensions` overrides settings.embedding_dimensions; 0 requests the full size."""
     if not texts:
         return []
     # Remove newlines to improve performance/quality as suggested by OpenAI sometimes, though less critical for v3
     # But crucial: Handle empty strings to avoid API errors
     sanitized = [t.replace("\n", " ") for t in texts]
-    response = client.embeddings.create(
+    dimensions = settings.embedding_dimensions if dimensions is None else dimensions
+    kwargs = {"dimensions": dimensions} if dimensions else {}
+    response = get_openai_client().embeddings.create(
         model=EMBEDDING_MODEL,
-        input=sanitized
+        input=sanitized,
+        **kwargs
     )
     return [d.embedding for d in response.data]
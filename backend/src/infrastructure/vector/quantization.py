@@ -0,0 +1,69 @@
+import math
+from typing import Optional, Tuple
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+QUANTIZATION_MODES = ("none", "int8", "binary")
+
+# Rows scored per step, so int8/binary codes are never widened to float32 all at once.
+_BLOCK_ROWS = 8192
+
+
+def check_mode(mode: str) -> str:
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown vector quantization {mode!r}; expected one of {', '.join(QUANTIZATION_MODES)}")
+    if mode != "none" and np is None:
+        raise RuntimeError("Vector quantization requires numpy")
+    return mode
+
+
+def quantize(matrix: "np.ndarray", mode: str) -> Tuple["np.ndarray", Optional["np.ndarray"]]:
+    """Encode L2-normalised float rows as (codes, per-row scales).
+
+    int8 keeps one float32 scale per row (max |x| / 127), 4x smaller than
+    float32. binary keeps only the sign bits, 32x smaller; queries stay full
+    precision, so scores are the cosine to the sign vector rather than a
+    Hamming estimate.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if mode == "int8":
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.round(matrix / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    if mode == "binary":
+        return np.packbits(matrix > 0, axis=1), None
+    return matrix, None
+
+
+def dequantize(codes: "np.ndarray", scales: Optional["np.ndarray"], mode: str, dim: int) -> "np.ndarray":
+    """Approximate float32 rows; binary rows come back as unit-norm sign vectors."""
+    if mode == "int8":
+        return np.asarray(codes, dtype=np.float32) * np.asarray(scales)[:, None]
+    if mode == "binary":
+        signs = np.unpackbits(np.asarray(codes), axis=1, count=dim).astype(np.float32) * 2 - 1
+        return signs / math.sqrt(dim)
+    return np.asarray(codes, dtype=np.float32)
+
+
+def scores(codes: "np.ndarray", scales: Optional["np.ndarray"], mode: str, dim: int, query: "np.ndarray") -> "np.ndarray":
+    """Dot products of a unit float query with every stored row."""
+    if mode == "none":
+        return np.asarray(codes @ query)
+    out = np.empty(len(codes), dtype=np.float32)
+    for start in range(0, len(codes), _BLOCK_ROWS):
+        stop = start + _BLOCK_ROWS
+        block_scales = scales[start:stop] if scales is not None else None
+        out[start:stop] = dequantize(codes[start:stop], block_scales, mode, dim) @ query
+    return out
+
+
+def bytes_per_vector(mode: str, dim: int) -> int:
+    if mode == "int8":
+        return dim + 4
+    if mode == "binary":
+        return (dim + 7) // 8
+    return dim * 4
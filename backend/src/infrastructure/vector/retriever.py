@@ -1,12 +1,24 @@
-from src.infrastructure.vector.client import get_index
+import logging
+
+from src.config.settings import settings
+from src.infrastructure.vector.chunk_store import hydrate
+from src.infrastructure.vector.client import get_vector_store, read_namespaces
 from src.infrastructure.vector.embedder import embed_text
+from src.infrastructure.vector.sparse import reciprocal_rank_fusion, sparse_index
+from src.infrastructure.observability.metrics import VECTOR_OP_SECONDS, timed
+
+logger = logging.getLogger(__name__)
 
 def retrieve_context(
     query: str,
     doc_id: str = None,
     active_version: str = None,
     allowed_categories: list[str] = None,
-    top_k: int = 5
+    top_k: int = 5,
+    vector: list[float] = None,
+    org_id: str = None,
+    project_id: str = None,
+    hydrate_text: bool = True
 ):
     """
     Retrieves execution-safe context from Pinecone.
@@ -17,12 +29,17 @@ def retrieve_context(
         active_version: Active version of the document
         allowed_categories: List of allowed categories
         top_k: Number of results to return (default 5)
+        vector: Precomputed query embedding; skips embedding `query`
+        org_id: Tenant whose namespace is searched (default namespace if None)
+        project_id: Also search the project namespace in "project" namespace mode
+        hydrate_text: Load segment text from the chunk store (one IN query)
         
     Returns:
-        List of dicts with text and score.
+        List of dicts with id, text and score.
     """
-    index = get_index()
-    vector = embed_text(query)
+    store = get_vector_store()
+    if vector is None:
+        vector = embed_text(query)
 
     filters = {}
     if doc_id:
@@ -41,12 +58,79 @@ def retrieve_context(
     if filters:
         query_kwargs["filter"] = filters
 
-    result = index.query(**query_kwargs)
+    matches = []
+    for namespace in read_namespaces(org_id, project_id):
+        with timed(VECTOR_OP_SECONDS, backend=settings.vector_backend, operation="query"):
+            matches.extend(store.query(namespace=namespace, **query_kwargs))
+    matches.sort(key=lambda m: (-m["score"], m["id"]))
 
-    return [
+    results = [
         {
+            "id": match["id"],
             "text": match["metadata"],
-            "score": match["score"]
+            "score": match["score"],
+            "dense_score": match["score"]
         }
-        for match in result["matches"]
+        for match in matches[:top_k]
     ]
+    return hydrate(results) if hydrate_text else results
+
+
+def retrieve_hybrid(
+    query: str,
+    doc_id: str = None,
+    active_version: str = None,
+    allowed_categories: list[str] = None,
+    top_k: int = 5,
+    vector: list[float] = None,
+    candidate_k: int = None,
+    rrf_k: int = None,
+    org_id: str = None,
+    project_id: str = None
+):
+    """
+    Dense (Pinecone) and sparse (BM25) candidates fused with reciprocal rank fusion.
+
+    Returns the same shape as retrieve_context; `score` is the fused RRF score and
+    `dense_score` / `sparse_score` are kept for whichever side found the segment.
+    Falls back to whichever side is available if the other fails.
+    """
+    candidate_k = candidate_k or settings.retrieval_candidate_k
+    rrf_k = rrf_k or settings.retrieval_rrf_k
+
+    dense = []
+    try:
+        dense = retrieve_context(
+            query=query,
+            doc_id=doc_id,
+            active_version=active_version,
+            allowed_categories=allowed_categories,
+            top_k=candidate_k,
+            vector=vector,
+            org_id=org_id,
+            project_id=project_id,
+            hydrate_text=False,
+        )
+    except Exception as e:
+        logger.error(f"Dense retrieval failed: {e}")
+
+    mode = settings.pinecone_namespace_mode
+    sparse = []
+    try:
+        sparse = sparse_index.search(
+            query,
+            top_k=candidate_k,
+            doc_id=doc_id,
+            doc_version=active_version,
+            categories=allowed_categories,
+            org_id=org_id if mode != "none" else None,
+            project_ids=([project_id] if project_id else []) if mode == "project" else None,
+        )
+    except Exception as e:
+        logger.error(f"Sparse retrieval failed: {e}")
+
+    by_id = {m["id"]: {"id": m["id"], "text": m["text"], "sparse_score": m["score"]} for m in sparse}
+    for m in dense:
+        by_id.setdefault(m["id"], {"id": m["id"], "text": m["text"]})["dense_score"] = m["dense_score"]
+    fused = reciprocal_rank_fusion([[m["id"] for m in dense], [m["id"] for m in sparse]], k=rrf_k)
+    return hydrate([dict(by_id[seg_id], score=score) for seg_id, score in fused[:top_k]])
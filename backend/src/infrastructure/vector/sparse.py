@@ -0,0 +1,307 @@
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote, unquote
+
+from src.config.settings import settings
+from src.infrastructure.vector.client import namespace_for
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, one process per index path
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Keeps identifiers like "BNSF-2024-017" or "12.5%" whole; their parts are indexed too.
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_./%][a-z0-9]+)*%?")
+_PART_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our that the their this to was we what "
+    "which who will with".split()
+)
+
+FORMAT_VERSION = 1
+
+
+def tokenize(text: str) -> List[str]:
+    tokens: List[str] = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        token = match.group(0)
+        if token in _STOPWORDS:
+            continue
+        tokens.append(token)
+        parts = _PART_RE.findall(token)
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if p not in _STOPWORDS)
+    return tokens
+
+
+class _Shard:
+    """Inverted index of one namespace."""
+
+    def __init__(self):
+        self.meta: Dict[str, Dict[str, Any]] = {}
+        self.tf: Dict[str, Dict[str, int]] = {}
+        self.lengths: Dict[str, int] = {}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.total_length = 0
+        self.version: Optional[Tuple[int, int]] = None  # (inode, mtime_ns) of the file it was loaded from
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def add(self, seg_id: str, tf: Dict[str, int], meta: Dict[str, Any]) -> None:
+        self.remove(seg_id)
+        self.meta[seg_id] = meta
+        self.tf[seg_id] = tf
+        length = sum(tf.values())
+        self.lengths[seg_id] = length
+        self.total_length += length
+        for term, count in tf.items():
+            self.postings.setdefault(term, {})[seg_id] = count
+
+    def remove(self, seg_id: str) -> None:
+        tf = self.tf.pop(seg_id, None)
+        if tf is None:
+            return
+        self.meta.pop(seg_id, None)
+        self.total_length -= self.lengths.pop(seg_id, 0)
+        for term in tf:
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(seg_id, None)
+                if not posting:
+                    del self.postings[term]
+
+
+class BM25Index:
+    """In-memory BM25 inverted index over segment text, one JSON shard per namespace.
+
+    Segments are sharded like the vector namespaces (per org, see
+    `namespace_for`), so an ingest rewrites only its own org's shard and a
+    search scores only that org's postings. Segment ids match the vector ids
+    (doc_id:doc_version:segment_id) so sparse and dense rankings can be fused
+    directly.
+
+    As in LocalVectorStore, writes hold an exclusive flock on the shard's
+    `.lock` file from the reload through the save and reloads hold a shared
+    one, so worker processes ingesting at once do not drop each other's
+    segments.
+    """
+
+    def __init__(self, path: Optional[str], k1: float = 1.2, b: float = 0.75):
+        self.path = Path(path) if path else None
+        self.k1 = k1
+        self.b = b
+        self._shards: Dict[str, _Shard] = {}
+        self._lock = threading.RLock()
+        self._writing = False
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(self._shard(name)) for name in self._names())
+
+    def _file(self, name: str) -> Path:
+        return self.path / f"{quote(name, safe='') or '__default__'}.json"
+
+    def _names(self) -> List[str]:
+        names = set(self._shards)
+        if self.path is not None and self.path.is_dir():
+            for file in self.path.glob("*.json"):
+                names.add("" if file.stem == "__default__" else unquote(file.stem))
+        return sorted(names)
+
+    @contextmanager
+    def _file_lock(self, name: str, exclusive: bool) -> Iterator[None]:
+        if self.path is None or fcntl is None:
+            yield
+            return
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self._file(name).with_suffix(".lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _writer(self, name: str, persist: bool) -> Iterator[_Shard]:
+        """The shard, freshly reloaded under the exclusive lock and saved before it is released."""
+        with self._lock, self._file_lock(name, exclusive=True):
+            self._writing = True
+            try:
+                shard = self._shard(name)
+                yield shard
+                if persist:
+                    self._save(name, shard)
+            finally:
+                self._writing = False
+
+    @staticmethod
+    def _version(file: Path) -> Optional[Tuple[int, int]]:
+        try:
+            stat = file.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _shard(self, name: str) -> _Shard:
+        """The shard, reloaded when another worker process has rewritten its file."""
+        shard = self._shards.get(name)
+        if shard is None:
+            shard = self._shards[name] = _Shard()
+        if self.path is None:
+            return shard
+        file = self._file(name)
+        version = self._version(file)
+        if version is None or version == shard.version:
+            return shard
+        if self._writing:
+            self._load(name, shard)
+        else:
+            with self._file_lock(name, exclusive=False):
+                self._load(name, shard)
+        return shard
+
+    def _load(self, name: str, shard: _Shard) -> None:
+        file = self._file(name)
+        try:
+            version = self._version(file)
+            payload = json.loads(file.read_text())
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load sparse index shard {file}: {e}")
+            return
+        if payload.get("format") != FORMAT_VERSION:
+            logger.warning(f"Ignoring sparse index shard {file} with unknown format {payload.get('format')}")
+            return
+        shard.__init__()
+        for seg_id, entry in payload.get("segments", {}).items():
+            shard.add(seg_id, {term: int(count) for term, count in entry["tf"].items()}, entry["meta"])
+        shard.version = version
+
+    def _save(self, name: str, shard: _Shard) -> None:
+        if self.path is None:
+            return
+        payload = {
+            "format": FORMAT_VERSION,
+            "segments": {seg_id: {"meta": shard.meta[seg_id], "tf": shard.tf[seg_id]} for seg_id in shard.tf},
+        }
+        self.path.mkdir(parents=True, exist_ok=True)
+        file = self._file(name)
+        tmp = file.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(payload, separators=(",", ":")))
+        os.replace(tmp, file)
+        shard.version = self._version(file)
+
+    def add_segments(self, segments: Iterable[Tuple[str, str, Dict[str, Any]]], persist: bool = True) -> None:
+        """Add or replace (id, text, metadata) segments, each in its org's shard."""
+        grouped: Dict[str, List[Tuple[str, Dict[str, int], Dict[str, Any]]]] = {}
+        for seg_id, text, meta in segments:
+            grouped.setdefault(namespace_for(meta.get("org_id")), []).append((seg_id, dict(Counter(tokenize(text))), meta))
+        for name, entries in grouped.items():
+            with self._writer(name, persist) as shard:
+                for seg_id, tf, meta in entries:
+                    shard.add(seg_id, tf, meta)
+
+    def remove_document(self, doc_id: str, org_id: Optional[str] = None, persist: bool = True) -> int:
+        """Drop a document's segments from its org's shard, or from every shard when org_id is None."""
+        removed = 0
+        with self._lock:
+            names = [namespace_for(org_id)] if org_id else self._names()
+        for name in names:
+            with self._writer(name, persist=False) as shard:
+                ids = [seg_id for seg_id, meta in shard.meta.items() if meta.get("doc_id") == doc_id]
+                for seg_id in ids:
+                    shard.remove(seg_id)
+                if ids and persist:
+                    self._save(name, shard)
+                removed += len(ids)
+        return removed
+
+    def _matches(
+        self,
+        meta: Dict[str, Any],
+        doc_id: Optional[str],
+        doc_version: Optional[str],
+        categories: Optional[Sequence[str]],
+        project_ids: Optional[Sequence[str]],
+    ) -> bool:
+        # None means "not scoped", like the other filters.
+        if project_ids is not None and meta.get("project_id") and meta.get("project_id") not in project_ids:
+            return False
+        if doc_id and meta.get("doc_id") != doc_id:
+            return False
+        if doc_version and meta.get("doc_version") != doc_version:
+            return False
+        if categories and meta.get("category") not in categories:
+            return False
+        return True
+
+    def search(
+        self,
+        query: str,
+        top_k: int,
+        doc_id: Optional[str] = None,
+        doc_version: Optional[str] = None,
+        categories: Optional[Sequence[str]] = None,
+        org_id: Optional[str] = None,
+        project_ids: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Top segments of the org's shard by BM25; ties break on id so results are deterministic.
+
+        Without an org_id only the default shard is searched, as with the
+        default vector namespace.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            shard = self._shard(namespace_for(org_id))
+            n = len(shard)
+            if not terms or not n:
+                return []
+            avgdl = shard.total_length / n or 1.0
+            scores: Dict[str, float] = {}
+            for term in terms:
+                posting = shard.postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for seg_id, tf in posting.items():
+                    norm = tf + self.k1 * (1 - self.b + self.b * shard.lengths[seg_id] / avgdl)
+                    scores[seg_id] = scores.get(seg_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+            results = []
+            for seg_id, score in ranked:
+                meta = shard.meta[seg_id]
+                if not self._matches(meta, doc_id, doc_version, categories, project_ids):
+                    continue
+                results.append({"id": seg_id, "text": meta, "score": score})
+                if len(results) >= top_k:
+                    break
+            return results
+
+    def save(self) -> None:
+        """Write every shard held in memory, replacing what is on disk."""
+        with self._lock:
+            for name, shard in list(self._shards.items()):
+                with self._file_lock(name, exclusive=True):
+                    self._save(name, shard)
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists; ties break on id so the order is deterministic."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+sparse_index = BM25Index(settings.sparse_index_path)
@@ -0,0 +1,431 @@
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote, unquote
+
+from src.infrastructure.vector.quantization import check_mode, dequantize, quantize, scores as quantized_scores
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, one process per store path
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class VectorStore(ABC):
+    """The subset of the Pinecone index API the app uses.
+
+    Vectors are dicts {"id", "values", "metadata"}; query results are dicts
+    {"id", "score", "metadata"} sorted by descending score.
+    """
+
+    @abstractmethod
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str = "") -> None:
+        pass
+
+    @abstractmethod
+    def query(
+        self,
+        vector: Sequence[float],
+        top_k: int,
+        namespace: str = "",
+        filter: Optional[Dict[str, Any]] = None,
+        include_metadata: bool = True,
+    ) -> List[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def fetch(self, ids: Sequence[str], namespace: str = "") -> Dict[str, Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def delete(self, ids: Sequence[str], namespace: str = "") -> None:
+        pass
+
+    @abstractmethod
+    def update_metadata(self, id: str, metadata: Dict[str, Any], namespace: str = "") -> None:
+        pass
+
+    @abstractmethod
+    def list_ids(self, namespace: str = "", limit: int = 100) -> Iterator[List[str]]:
+        pass
+
+    @abstractmethod
+    def namespaces(self) -> Dict[str, int]:
+        """Vector count per namespace."""
+
+
+def _match_value(value: Any, condition: Any) -> bool:
+    if not isinstance(condition, dict):
+        condition = {"$eq": condition}
+    values = value if isinstance(value, list) else [value]
+    for op, operand in condition.items():
+        if op == "$eq":
+            ok = operand in values
+        elif op == "$ne":
+            ok = operand not in values
+        elif op == "$in":
+            ok = any(v in operand for v in values)
+        elif op == "$nin":
+            ok = not any(v in operand for v in values)
+        else:
+            raise ValueError(f"Unsupported metadata filter operator {op}")
+        if not ok:
+            return False
+    return True
+
+
+def matches_filter(metadata: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    """Pinecone filter semantics for $eq/$ne/$in/$nin and $and/$or; list fields match any element."""
+    if not filter:
+        return True
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, f) for f in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, f) for f in condition):
+                return False
+        elif key not in metadata or not _match_value(metadata[key], condition):
+            return False
+    return True
+
+
+class PineconeVectorStore(VectorStore):
+    def __init__(self, api_key: Optional[str], index_name: str):
+        self.api_key = api_key
+        self.index_name = index_name
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self):
+        # Created on first use so importing the vector package needs no key or network.
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    from pinecone import Pinecone
+
+                    self._index = Pinecone(api_key=self.api_key).Index(self.index_name)
+        return self._index
+
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str = "") -> None:
+        self.index.upsert(vectors=vectors, namespace=namespace)
+
+    def query(self, vector, top_k, namespace="", filter=None, include_metadata=True):
+        kwargs = {"vector": list(vector), "top_k": top_k, "include_metadata": include_metadata, "namespace": namespace}
+        if filter:
+            kwargs["filter"] = filter
+        result = self.index.query(**kwargs)
+        return [
+            {"id": m["id"], "score": m["score"], "metadata": m.get("metadata") or {}}
+            for m in result["matches"]
+        ]
+
+    def fetch(self, ids, namespace=""):
+        fetched = self.index.fetch(ids=list(ids), namespace=namespace)
+        return {
+            vid: {"id": vid, "values": list(v.values or []), "metadata": dict(v.metadata or {})}
+            for vid, v in fetched.vectors.items()
+        }
+
+    def delete(self, ids, namespace=""):
+        self.index.delete(ids=list(ids), namespace=namespace)
+
+    def update_metadata(self, id, metadata, namespace=""):
+        self.index.update(id=id, set_metadata=metadata, namespace=namespace)
+
+    def list_ids(self, namespace="", limit=100):
+        for ids in self.index.list(namespace=namespace, limit=limit):
+            yield list(ids)
+
+    def namespaces(self):
+        stats = self.index.describe_index_stats()
+        return {ns: info.vector_count for ns, info in (stats.namespaces or {}).items()}
+
+
+class _Namespace:
+    def __init__(self, quantization: str):
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.vectors = None  # (n, width) codes of the L2-normalised rows, see quantization.py
+        self.scales = None  # per-row int8 scales
+        self.dim: Optional[int] = None
+        self.quantization = quantization
+        self.positions: Dict[str, int] = {}
+        self.centroids = None
+        self.assignments = None
+        self.version: Optional[Tuple[int, int]] = None  # (inode, mtime_ns) of the meta.json it was loaded from
+
+
+class LocalVectorStore(VectorStore):
+    """NumPy flat (exact) cosine index per namespace, persisted under `path`.
+
+    With `ivf_lists` > 0 a k-means coarse quantizer is trained lazily once a
+    namespace has enough vectors, and queries scan only the `nprobe` closest
+    lists. Vectors are memory-mapped on load; each process reloads a
+    namespace when its files change on disk.
+
+    Writes hold an exclusive flock on the namespace's `.lock` file from the
+    reload through the save, and reloads hold a shared one, so several
+    worker processes can share a path without losing or tearing writes.
+    Every write still rewrites the namespace's files, so writers are
+    effectively serialised and the cost of an upsert grows with the
+    namespace: batch upserts, and use Pinecone for large or write-heavy
+    corpora.
+
+    `quantization` (none, int8 or binary) applies to namespaces created from
+    now on; existing namespaces keep the encoding they were written with.
+    """
+
+    def __init__(self, path: Optional[str], ivf_lists: int = 0, nprobe: int = 8, quantization: str = "none"):
+        if np is None:
+            raise RuntimeError("The local vector store requires numpy")
+        self.path = Path(path) if path else None
+        self.ivf_lists = ivf_lists
+        self.nprobe = nprobe
+        self.quantization = check_mode(quantization)
+        self._spaces: Dict[str, _Namespace] = {}
+        self._lock = threading.RLock()
+        self._writing = False
+
+    def _dir(self, namespace: str) -> Path:
+        return self.path / (quote(namespace, safe="") or "__default__")
+
+    @contextmanager
+    def _file_lock(self, namespace: str, exclusive: bool) -> Iterator[None]:
+        if self.path is None or fcntl is None:
+            yield
+            return
+        folder = self._dir(namespace)
+        folder.mkdir(parents=True, exist_ok=True)
+        with open(folder / ".lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _writer(self, namespace: str) -> Iterator[_Namespace]:
+        """The namespace, freshly reloaded under the exclusive lock held until the caller has saved."""
+        with self._lock, self._file_lock(namespace, exclusive=True):
+            self._writing = True
+            try:
+                yield self._space(namespace)
+            finally:
+                self._writing = False
+
+    @staticmethod
+    def _version(meta_file: Path) -> Optional[Tuple[int, int]]:
+        # os.replace gives every save a new inode, so two saves within one mtime tick still differ.
+        try:
+            stat = meta_file.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _space(self, namespace: str) -> _Namespace:
+        space = self._spaces.get(namespace)
+        if space is None:
+            space = self._spaces[namespace] = _Namespace(self.quantization)
+        if self.path is not None:
+            meta_file = self._dir(namespace) / "meta.json"
+            version = self._version(meta_file)
+            if version is None or version == space.version:
+                return space
+            if self._writing:
+                self._load(space, namespace)
+            else:
+                # A writer replaces vectors.npy before meta.json; the shared lock keeps the pair consistent.
+                with self._file_lock(namespace, exclusive=False):
+                    self._load(space, namespace)
+        return space
+
+    def _load(self, space: _Namespace, namespace: str) -> None:
+        folder = self._dir(namespace)
+        space.version = self._version(folder / "meta.json")
+        payload = json.loads((folder / "meta.json").read_text())
+        space.ids = payload["ids"]
+        space.metadata = payload["metadata"]
+        space.positions = {vid: i for i, vid in enumerate(space.ids)}
+        space.quantization = payload.get("quantization", "none")
+        space.vectors = np.load(folder / "vectors.npy", mmap_mode="r") if space.ids else None
+        space.scales = np.load(folder / "scales.npy") if space.ids and space.quantization == "int8" else None
+        space.dim = payload.get("dim") or (space.vectors.shape[1] if space.vectors is not None else None)
+        space.centroids = space.assignments = None
+
+    def _save(self, space: _Namespace, namespace: str) -> None:
+        if self.path is None:
+            return
+        folder = self._dir(namespace)
+        folder.mkdir(parents=True, exist_ok=True)
+        vectors = space.vectors if space.vectors is not None else np.zeros((0, 0), dtype=np.float32)
+        with open(folder / "vectors.npy.tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(vectors))
+        os.replace(folder / "vectors.npy.tmp", folder / "vectors.npy")
+        if space.scales is not None:
+            with open(folder / "scales.npy.tmp", "wb") as f:
+                np.save(f, np.ascontiguousarray(space.scales))
+            os.replace(folder / "scales.npy.tmp", folder / "scales.npy")
+        # meta.json is written last; its inode and mtime are what other processes watch.
+        tmp = folder / "meta.json.tmp"
+        payload = {"ids": space.ids, "metadata": space.metadata, "dim": space.dim, "quantization": space.quantization}
+        tmp.write_text(json.dumps(payload, separators=(",", ":")))
+        os.replace(tmp, folder / "meta.json")
+        space.version = self._version(folder / "meta.json")
+
+    @staticmethod
+    def _normalise(values) -> "np.ndarray":
+        matrix = np.asarray(values, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix[None, :]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def upsert(self, vectors, namespace=""):
+        if not vectors:
+            return
+        # The same id twice in one batch: the last occurrence wins, as in Pinecone.
+        vectors = list({v["id"]: v for v in vectors}.values())
+        with self._writer(namespace) as space:
+            new_rows = self._normalise([v["values"] for v in vectors])
+            dim = new_rows.shape[1]
+            if space.ids and space.dim != dim:
+                raise ValueError(f"Vector dimension {dim} does not match namespace dimension {space.dim}")
+            codes, new_scales = quantize(new_rows, space.quantization)
+            current = np.array(space.vectors) if space.ids else np.zeros((0, codes.shape[1]), dtype=codes.dtype)
+            scales = None
+            if new_scales is not None:
+                scales = np.array(space.scales) if space.ids else np.zeros(0, dtype=np.float32)
+            ids, metadata = list(space.ids), list(space.metadata)
+            appended = []
+            for i, v in enumerate(vectors):
+                pos = space.positions.get(v["id"])
+                if pos is None:
+                    ids.append(v["id"])
+                    metadata.append(dict(v.get("metadata") or {}))
+                    appended.append(i)
+                else:
+                    current[pos] = codes[i]
+                    if scales is not None:
+                        scales[pos] = new_scales[i]
+                    metadata[pos] = dict(v.get("metadata") or {})
+            if appended:
+                current = np.vstack([current, codes[appended]])
+                if scales is not None:
+                    scales = np.concatenate([scales, new_scales[appended]])
+            # Nothing above touched `space`, so a failure leaves the namespace as it was.
+            space.ids, space.metadata = ids, metadata
+            space.positions = {vid: i for i, vid in enumerate(ids)}
+            space.vectors, space.scales, space.dim = current, scales, dim
+            space.centroids = space.assignments = None
+            self._save(space, namespace)
+
+    def _candidates(self, space: _Namespace, query: "np.ndarray") -> Optional["np.ndarray"]:
+        n = len(space.ids)
+        if not self.ivf_lists or n < self.ivf_lists * 39:
+            return None
+        if space.centroids is None:
+            self._train(space)
+        closest = np.argsort(-(space.centroids @ query))[: self.nprobe]
+        return np.flatnonzero(np.isin(space.assignments, closest))
+
+    def _train(self, space: _Namespace, iterations: int = 10) -> None:
+        data = self._normalise(dequantize(space.vectors, space.scales, space.quantization, space.dim))
+        rng = np.random.default_rng(0)
+        centroids = data[rng.choice(len(data), self.ivf_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(data @ centroids.T, axis=1)
+            for c in range(self.ivf_lists):
+                members = data[assignments == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = self._normalise(centroids)
+        space.centroids = centroids
+        space.assignments = np.argmax(data @ centroids.T, axis=1)
+
+    def query(self, vector, top_k, namespace="", filter=None, include_metadata=True):
+        with self._lock:
+            space = self._space(namespace)
+            if space.vectors is None or not space.ids:
+                return []
+            q = self._normalise(vector)[0]
+            rows = self._candidates(space, q)
+            if rows is None:
+                data, data_scales = space.vectors, space.scales
+            else:
+                data = space.vectors[rows]
+                data_scales = space.scales[rows] if space.scales is not None else None
+            scores = quantized_scores(data, data_scales, space.quantization, space.dim, q)
+            order = np.argsort(-scores, kind="stable")
+            results = []
+            for i in order:
+                pos = int(rows[i]) if rows is not None else int(i)
+                meta = space.metadata[pos]
+                if not matches_filter(meta, filter):
+                    continue
+                results.append({"id": space.ids[pos], "score": float(scores[i]), "metadata": dict(meta) if include_metadata else {}})
+                if len(results) >= top_k:
+                    break
+            return results
+
+    def fetch(self, ids, namespace=""):
+        with self._lock:
+            space = self._space(namespace)
+            found = {}
+            for vid in ids:
+                pos = space.positions.get(vid)
+                if pos is not None:
+                    scales = space.scales[pos:pos + 1] if space.scales is not None else None
+                    values = dequantize(space.vectors[pos:pos + 1], scales, space.quantization, space.dim)[0]
+                    found[vid] = {"id": vid, "values": values.tolist(), "metadata": dict(space.metadata[pos])}
+            return found
+
+    def delete(self, ids, namespace=""):
+        with self._writer(namespace) as space:
+            drop = {space.positions[vid] for vid in ids if vid in space.positions}
+            if not drop:
+                return
+            keep = [i for i in range(len(space.ids)) if i not in drop]
+            space.vectors = np.array(space.vectors)[keep] if keep else None
+            space.scales = np.array(space.scales)[keep] if keep and space.scales is not None else None
+            space.ids = [space.ids[i] for i in keep]
+            space.metadata = [space.metadata[i] for i in keep]
+            space.positions = {vid: i for i, vid in enumerate(space.ids)}
+            space.centroids = space.assignments = None
+            self._save(space, namespace)
+
+    def update_metadata(self, id, metadata, namespace=""):
+        with self._writer(namespace) as space:
+            pos = space.positions.get(id)
+            if pos is None:
+                return
+            space.metadata[pos].update(metadata)
+            self._save(space, namespace)
+
+    def list_ids(self, namespace="", limit=100):
+        with self._lock:
+            ids = list(self._space(namespace).ids)
+        for i in range(0, len(ids), limit):
+            yield ids[i:i + limit]
+
+    def namespaces(self):
+        with self._lock:
+            if self.path is not None and self.path.exists():
+                for folder in self.path.iterdir():
+                    if (folder / "meta.json").exists():
+                        self._space("" if folder.name == "__default__" else unquote(folder.name))
+            return {ns: len(space.ids) for ns, space in self._spaces.items() if space.ids}
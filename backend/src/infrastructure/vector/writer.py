@@ -1,22 +1,32 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
-from src.infrastructure.vector.client import get_index
-from src.infrastructure.vector.embedder import embed_texts, embed_text
+from src.config.settings import settings
+from src.infrastructure.vector.chunk_store import save_chunks
+from src.infrastructure.vector.client import get_vector_store, namespace_for
+from src.infrastructure.vector.embedder import EMBEDDING_MODEL, embed_texts, embed_text
+from src.infrastructure.vector.sparse import sparse_index
+from src.infrastructure.observability.metrics import VECTOR_OP_SECONDS, timed
 
 logger = logging.getLogger(__name__)
 
-def upsert_segments_batch(segments: List[Dict[str, Any]], batch_size: int = 100):
+def upsert_segments_batch(
+    segments: List[Dict[str, Any]],
+    batch_size: int = 100,
+    org_id: Optional[str] = None,
+    project_id: Optional[str] = None,
+):
     if not segments:
         logger.warning("No segments provided for Pinecone upsert")
         return
         
     try:
-        index = get_index()
+        store = get_vector_store()
     except Exception as e:
-        logger.error(f"Failed to get Pinecone index: {e}")
+        logger.error(f"Failed to get vector store: {e}")
         raise
     
-    logger.info(f"Starting Pinecone upsert for {len(segments)} segments")
+    namespace = namespace_for(org_id, project_id)
+    logger.info(f"Starting Pinecone upsert for {len(segments)} segments (namespace={namespace!r})")
 
     # 1. Prepare data
     ids = []
@@ -38,6 +48,11 @@ def upsert_segments_batch(segments: List[Dict[str, Any]], batch_size: int = 100)
                 # Add text to metadata for retrieval context
                 "text": seg["text"] 
             }
+            # Pinecone rejects null metadata values
+            if org_id:
+                meta["org_id"] = org_id
+            if project_id:
+                meta["project_id"] = project_id
             
             # Pinecone requirement: lists must be strings
             if "page_numbers" in meta and isinstance(meta["page_numbers"], list):
@@ -73,6 +88,21 @@ def upsert_segments_batch(segments: List[Dict[str, Any]], batch_size: int = 100)
         logger.error(f"Mismatch between ID count ({len(ids)}) and vector count ({len(vectors)})")
         return
 
+    # Segment text lives in document_chunks; vectors keep only ids and filter fields.
+    # Without an owning document row (e.g. test ingests) it stays in the metadata.
+    if org_id and not settings.pinecone_metadata_text:
+        try:
+            save_chunks(
+                [dict(meta, id=seg_id) for seg_id, meta in zip(ids, metadatas)],
+                org_id=org_id,
+                project_id=project_id,
+                embedding_model=EMBEDDING_MODEL,
+                embedding_dimension=len(vectors[0]) if vectors else None,
+            )
+            metadatas = [{k: v for k, v in meta.items() if k != "text"} for meta in metadatas]
+        except Exception as e:
+            logger.warning(f"Chunk store write failed, keeping text in vector metadata: {e}")
+
     # 3. Upsert to Pinecone in batches
     # Pinecone recommends batches of 100 or less
     total = len(ids)
@@ -89,7 +119,8 @@ def upsert_segments_batch(segments: List[Dict[str, Any]], batch_size: int = 100)
         
         if batch_vectors_payload:
             try:
-                index.upsert(vectors=batch_vectors_payload)
+                with timed(VECTOR_OP_SECONDS, backend=settings.vector_backend, operation="upsert"):
+                    store.upsert(vectors=batch_vectors_payload, namespace=namespace)
                 upserted_count += len(batch_vectors_payload)
                 logger.info(f"Upserted batch {i//batch_size + 1}: {len(batch_vectors_payload)} vectors")
             except Exception as e:
@@ -99,19 +130,25 @@ def upsert_segments_batch(segments: List[Dict[str, Any]], batch_size: int = 100)
     
     logger.info(f"Pinecone upsert complete. Total vectors upserted: {upserted_count}/{total}")
 
-def persist_to_pinecone(processed_segments: list[dict]):
-    upsert_segments_batch(processed_segments)
+    # Keep the BM25 index in step with Pinecone for hybrid retrieval.
+    try:
+        sparse_index.add_segments(zip(ids, texts, metadatas))
+    except Exception as e:
+        logger.error(f"Failed to update sparse index: {e}")
+
+def persist_to_pinecone(processed_segments: list[dict], org_id: Optional[str] = None, project_id: Optional[str] = None):
+    upsert_segments_batch(processed_segments, org_id=org_id, project_id=project_id)
 
-def upsert_segment(segment_id: str, text: str, metadata: dict):
+def upsert_segment(segment_id: str, text: str, metadata: dict, org_id: Optional[str] = None):
     # Legacy support / Single item upsert
-    index = get_index()
+    store = get_vector_store()
     vector = embed_text(text)
     
     if "page_numbers" in metadata and isinstance(metadata["page_numbers"], list):
         metadata["page_numbers"] = [str(p) for p in metadata["page_numbers"]]
         
-    index.upsert([{
+    store.upsert([{
         "id": segment_id,
         "values": vector,
         "metadata": metadata
-    }])
+    }], namespace=namespace_for(org_id))
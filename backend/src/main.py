@@ -1,11 +1,37 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from src.config.logging import setup_logging
 from src.config.settings import settings
+from src.config.database import async_engine, init_db
 from src.api.v1.router import api_router
 from src.infrastructure.graph.indexes import create_indexes
+from src.infrastructure.health.readiness import readiness_checker
+from src.infrastructure.llm.llm_config import init_llm_config_registry
+from src.infrastructure.llm.usage import usage_recorder
+from src.infrastructure.llm.quota import quota_engine
+from src.infrastructure.agents.crewai_agent import crew_queue_depth, shutdown_crew_executor
+from src.infrastructure.observability.metrics import (
+    CONTENT_TYPE_LATEST,
+    parse_networks,
+    register_collectors,
+    render_latest,
+    scrape_allowed,
+    track_queue,
+)
+from src.infrastructure.llm.exceptions import (
+    CircuitOpenError,
+    LLMDeadlineExceededError,
+    QuotaExceededError,
+    RetryBudgetExhaustedError,
+    UnknownModelError,
+)
 
 setup_logging()
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="AI C-Suite Agent SaaS",
@@ -21,10 +47,39 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(api_router, prefix="/api/v1")
 
+@app.exception_handler(CircuitOpenError)
+async def _circuit_open_handler(request: Request, exc: CircuitOpenError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"LLM provider '{exc.provider}' is overloaded, please retry shortly"},
+        headers={"Retry-After": str(int(exc.retry_after) + 1)},
+    )
+
+@app.exception_handler(RetryBudgetExhaustedError)
+async def _retry_budget_handler(request: Request, exc: RetryBudgetExhaustedError):
+    return JSONResponse(status_code=503, content={"detail": f"LLM provider '{exc.provider}' is overloaded, please retry shortly"})
+
+@app.exception_handler(LLMDeadlineExceededError)
+async def _deadline_handler(request: Request, exc: LLMDeadlineExceededError):
+    return JSONResponse(status_code=504, content={"detail": "LLM request timed out"})
+
+@app.exception_handler(QuotaExceededError)
+async def _quota_exceeded_handler(request: Request, exc: QuotaExceededError):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Monthly token quota exceeded for this organization", "limit": exc.limit, "used": exc.used},
+        headers={"Retry-After": str(int(exc.retry_after) + 1)},
+    )
+
+@app.exception_handler(UnknownModelError)
+async def _unknown_model_handler(request: Request, exc: UnknownModelError):
+    return JSONResponse(status_code=400, content={"detail": f"Model '{exc.model}' is not available"})
+
 @app.get("/health")
 def health_check():
     return {
@@ -32,10 +87,68 @@ def health_check():
         "environment": settings.app_env
     }
 
+@app.get("/ready")
+async def readiness_check(response: Response):
+    report = await readiness_checker.check()
+    if not report["ready"]:
+        response.status_code = 503
+    return report
+
+_metrics_networks = parse_networks(settings.metrics_allowed_networks)
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    # Not authenticated, so only internal scrapers may read it.
+    client_host = request.client.host if request.client else None
+    if not scrape_allowed(client_host, request.headers, _metrics_networks):
+        return PlainTextResponse("forbidden\n", status_code=403)
+    body = render_latest() if settings.metrics_enabled else None
+    if body is None:
+        return PlainTextResponse("metrics unavailable: prometheus_client is not installed or metrics are disabled\n", status_code=404)
+    return Response(content=body, media_type=CONTENT_TYPE_LATEST)
+
+@app.on_event("startup")
+def _startup_metrics() -> None:
+    register_collectors()
+    track_queue("usage_buffer", lambda: len(usage_recorder))
+    track_queue("crewai", crew_queue_depth)
+
+@app.on_event("startup")
+async def _startup_database() -> None:
+    await asyncio.to_thread(init_db)
+
+@app.on_event("startup")
+def _startup_llm_config() -> None:
+    init_llm_config_registry()
+
+@app.on_event("startup")
+async def _startup_usage_recorder() -> None:
+    usage_recorder.start()
+
+@app.on_event("shutdown")
+async def _shutdown_usage_recorder() -> None:
+    await usage_recorder.stop()
+
+@app.on_event("startup")
+async def _startup_quota_engine() -> None:
+    quota_engine.start()
+
+@app.on_event("shutdown")
+async def _shutdown_quota_engine() -> None:
+    await quota_engine.stop()
+
+@app.on_event("shutdown")
+async def _shutdown_async_engine() -> None:
+    await async_engine.dispose()
+
+@app.on_event("shutdown")
+async def _shutdown_crew_executor() -> None:
+    shutdown_crew_executor()
+
 @app.on_event("startup")
 def _startup_graph_indexes() -> None:
     if settings.neo4j_uri and settings.neo4j_username and settings.neo4j_password:
         try:
             create_indexes()
-        except Exception:
-            pass
+        except Exception as e:
+            logger.warning(f"Neo4j index creation failed, /ready reports graph status: {e}")
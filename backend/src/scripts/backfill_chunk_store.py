@@ -0,0 +1,77 @@
+"""Move segment text out of vector metadata into the document_chunks table.
+
+Usage:
+    python src/scripts/backfill_chunk_store.py [--dry-run] [--batch 100]
+
+For every vector that still carries `text` and belongs to a known document,
+the text is saved as a DocumentChunk (keyed by the vector id) and the
+vector's metadata text is blanked. Retrieval keeps
+working throughout: matches without text are hydrated from the chunk store,
+and vectors that were not moved keep serving their own metadata text.
+"""
+import argparse
+import os
+import sys
+from collections import defaultdict
+
+# Add the backend directory to sys.path to allow imports from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+try:
+    from src.config.database import SessionLocal
+    from src.infrastructure.database.models import Document
+    from src.infrastructure.vector.chunk_store import save_chunks
+    from src.infrastructure.vector.client import get_vector_store
+    from src.infrastructure.vector.embedder import EMBEDDING_MODEL
+except ImportError as e:
+    print(f"Error importing modules: {e}")
+    sys.exit(1)
+
+
+def backfill(batch: int, dry_run: bool) -> None:
+    store = get_vector_store()
+    namespaces = list(store.namespaces()) or [""]
+    owners = {}
+    moved = skipped = 0
+    db = SessionLocal()
+    try:
+        for namespace in namespaces:
+            for ids in store.list_ids(namespace=namespace, limit=batch):
+                fetched = store.fetch(ids, namespace=namespace)
+                pending = {seg_id: v for seg_id, v in fetched.items() if v["metadata"].get("text")}
+                doc_ids = {v["metadata"].get("doc_id") for v in pending.values()} - set(owners) - {None}
+                if doc_ids:
+                    rows = db.query(Document.id, Document.org_id, Document.project_id).filter(Document.id.in_(doc_ids)).all()
+                    owners.update({doc_id: (org_id, project_id) for doc_id, org_id, project_id in rows})
+                by_owner = defaultdict(list)
+                for seg_id, v in pending.items():
+                    meta = dict(v["metadata"])
+                    owner = owners.get(meta.get("doc_id"))
+                    if owner is None:
+                        skipped += 1
+                        continue
+                    by_owner[owner].append((dict(meta, id=seg_id), len(v["values"]) or None))
+                for (org_id, project_id), rows in by_owner.items():
+                    if not dry_run:
+                        save_chunks(
+                            [meta for meta, _ in rows],
+                            org_id=org_id,
+                            project_id=project_id,
+                            embedding_model=EMBEDDING_MODEL,
+                            embedding_dimension=rows[0][1],
+                        )
+                        for meta, _ in rows:
+                            store.update_metadata(meta["id"], {"text": ""}, namespace=namespace)
+                    moved += len(rows)
+                print(f"[{namespace or 'default'}] {moved} moved, {skipped} skipped (unknown document)")
+    finally:
+        db.close()
+    print(f"{'Would move' if dry_run else 'Moved'} {moved} segment texts; {skipped} left in vector metadata.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    backfill(args.batch, args.dry_run)
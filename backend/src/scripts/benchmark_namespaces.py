@@ -0,0 +1,75 @@
+"""Compare Pinecone query latency on the shared default namespace vs an org namespace.
+
+Usage:
+    python src/scripts/benchmark_namespaces.py --org-id <org> queries.json [--runs 5] [--top-k 20]
+
+queries.json is a list of strings or of {"query": ...} objects (the labelled
+set used by benchmark_retrieval.py works). The "before" side needs the
+vectors still present in the default namespace: run this before migrating,
+or migrate with --keep-source first.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+# Add the backend directory to sys.path to allow imports from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+try:
+    from src.infrastructure.vector.client import DEFAULT_NAMESPACE, get_vector_store, namespace_for
+    from src.infrastructure.vector.embedder import embed_texts
+except ImportError as e:
+    print(f"Error importing modules: {e}")
+    sys.exit(1)
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def run(org_id: str, path: str, runs: int, top_k: int) -> None:
+    with open(path) as f:
+        items = json.load(f)
+    queries = [i["query"] if isinstance(i, dict) else i for i in items]
+    vectors = embed_texts(queries)
+    # Read units come from the raw Pinecone response, so this bypasses the store interface.
+    index = getattr(get_vector_store(), "index", None)
+    if index is None:
+        print("This benchmark needs vector_backend=pinecone")
+        return
+
+    stats = index.describe_index_stats()
+    counts = {ns: info.vector_count for ns, info in (stats.namespaces or {}).items()}
+    org_ns = namespace_for(org_id)
+    print(f"default namespace: {counts.get(DEFAULT_NAMESPACE, 0)} vectors, {org_ns}: {counts.get(org_ns, 0)} vectors")
+
+    for label, namespace in (("before (default)", DEFAULT_NAMESPACE), (f"after ({org_ns})", org_ns)):
+        latencies, read_units, hits = [], [], []
+        for _ in range(runs):
+            for vector in vectors:
+                started = time.perf_counter()
+                result = index.query(vector=vector, top_k=top_k, include_metadata=True, namespace=namespace)
+                latencies.append((time.perf_counter() - started) * 1000)
+                usage = getattr(result, "usage", None)
+                if usage is not None and getattr(usage, "read_units", None) is not None:
+                    read_units.append(usage.read_units)
+                hits.append(len(result["matches"]))
+        units = f"{statistics.mean(read_units):.1f}" if read_units else "n/a"
+        print(
+            f"{label:<40} p50 {statistics.median(latencies):7.1f} ms  p95 {_percentile(latencies, 0.95):7.1f} ms  "
+            f"read units {units:>6}  avg matches {statistics.mean(hits):.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("queries")
+    parser.add_argument("--org-id", required=True)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top-k", type=int, default=20)
+    args = parser.parse_args()
+    run(args.org_id, args.queries, args.runs, args.top_k)
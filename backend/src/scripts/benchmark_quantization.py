@@ -0,0 +1,110 @@
+"""Measure recall@k of truncated and quantized embeddings against the full-precision baseline.
+
+Usage:
+    python src/scripts/benchmark_quantization.py queries.json [--namespace org-<id>] [--dims 1024,512,256] [--modes none,int8,binary] [--top-k 10]
+
+Reads every vector of one namespace from the configured vector store. The
+baseline is an exact float32 search at the stored size; each candidate
+truncates corpus and queries to the first N dimensions (what the embeddings
+API `dimensions` parameter does), renormalises, encodes them with the given
+quantization and reports overlap with the baseline top-k, latency and
+storage per vector. queries.json is a list of strings or {"query": ...}
+objects.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+# Add the backend directory to sys.path to allow imports from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+try:
+    import numpy as np
+
+    from src.config.settings import settings
+    from src.infrastructure.vector.client import get_vector_store
+    from src.infrastructure.vector.embedder import embed_texts
+    from src.infrastructure.vector.quantization import bytes_per_vector
+    from src.infrastructure.vector.store import LocalVectorStore
+except ImportError as e:
+    print(f"Error importing modules: {e}")
+    sys.exit(1)
+
+
+def _truncate(values, dim: int):
+    row = np.asarray(values[:dim], dtype=np.float32)
+    norm = np.linalg.norm(row)
+    return row / norm if norm else row
+
+
+def _load_corpus(namespace: str):
+    store = get_vector_store()
+    vectors = []
+    for ids in store.list_ids(namespace=namespace):
+        vectors.extend(store.fetch(ids, namespace=namespace).values())
+    return vectors
+
+
+def run(path: str, namespace: str, dims: list, modes: list, top_k: int) -> None:
+    if settings.vector_backend == "local" and settings.local_vector_quantization != "none":
+        print("warning: the source namespace is itself quantized, so the baseline is not full precision")
+    with open(path) as f:
+        items = json.load(f)
+    queries = [i["query"] if isinstance(i, dict) else i for i in items]
+    corpus = _load_corpus(namespace)
+    if not corpus or not queries:
+        print("Nothing to benchmark: empty namespace or query set")
+        return
+    full_dim = len(corpus[0]["values"])
+    query_vectors = embed_texts(queries, dimensions=0)
+    print(f"{len(corpus)} vectors of {full_dim} dims in namespace {namespace or '(default)'}, {len(queries)} queries")
+
+    def build(dim: int, mode: str):
+        store = LocalVectorStore(None, quantization=mode)
+        for start in range(0, len(corpus), 1000):
+            batch = corpus[start:start + 1000]
+            store.upsert([{"id": v["id"], "values": _truncate(v["values"], dim)} for v in batch])
+        return store
+
+    baseline_store = build(full_dim, "none")
+    baseline = [
+        {m["id"] for m in baseline_store.query(_truncate(q, full_dim), top_k=top_k, include_metadata=False)}
+        for q in query_vectors
+    ]
+
+    print(f"{'dims':>6}{'quant':>8}{'bytes/vec':>11}{'total MB':>10}{'recall@' + str(top_k):>11}{'p50 ms':>9}")
+    for dim in [full_dim] + [d for d in dims if d < full_dim]:
+        for mode in modes:
+            store = build(dim, mode)
+            recalls, latencies = [], []
+            for q, expected in zip(query_vectors, baseline):
+                vector = _truncate(q, dim)
+                started = time.perf_counter()
+                matches = store.query(vector, top_k=top_k, include_metadata=False)
+                latencies.append((time.perf_counter() - started) * 1000)
+                recalls.append(len({m["id"] for m in matches} & expected) / max(1, len(expected)))
+            size = bytes_per_vector(mode, dim)
+            print(
+                f"{dim:>6}{mode:>8}{size:>11}{size * len(corpus) / 1e6:>10.1f}"
+                f"{statistics.mean(recalls):>11.3f}{statistics.median(latencies):>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("queries", help="Path to the query set (JSON)")
+    parser.add_argument("--namespace", default="")
+    parser.add_argument("--dims", default="1024,512,256")
+    parser.add_argument("--modes", default="none,int8,binary")
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+    run(
+        args.queries,
+        args.namespace,
+        [int(d) for d in args.dims.split(",") if d.strip()],
+        [m.strip() for m in args.modes.split(",") if m.strip()],
+        args.top_k,
+    )
@@ -0,0 +1,107 @@
+"""Compare dense, sparse (BM25) and hybrid (RRF) retrieval on a labelled query set.
+
+Usage:
+    python src/scripts/benchmark_retrieval.py queries.json [--modes dense,sparse,hybrid] [--ks 1,3,5,10] [--org <org_id>]
+
+queries.json is a list of objects:
+    {"query": "BNSF contract 2024-017 volume commitment",
+     "relevant": ["<segment id or doc_id>", ...],
+     "categories": ["financials"]}            # optional
+
+A result counts as relevant when its segment id or its doc_id is listed.
+--org searches that org's namespace and sparse shard instead of the default ones.
+Run with --modes sparse to benchmark offline without Pinecone/OpenAI keys.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+# Add the backend directory to sys.path to allow imports from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+try:
+    from src.config.settings import settings
+    from src.infrastructure.vector.sparse import sparse_index
+except ImportError as e:
+    print(f"Error importing modules: {e}")
+    sys.exit(1)
+
+
+def _retriever(mode: str, org_id: str = None):
+    if mode == "sparse":
+        return lambda q, cats, k: sparse_index.search(q, top_k=k, categories=cats, org_id=org_id)
+    from src.infrastructure.vector.retriever import retrieve_context, retrieve_hybrid
+    if mode == "dense":
+        return lambda q, cats, k: retrieve_context(query=q, allowed_categories=cats, top_k=k, org_id=org_id)
+    return lambda q, cats, k: retrieve_hybrid(query=q, allowed_categories=cats, top_k=k, org_id=org_id)
+
+
+def _is_relevant(match: dict, relevant: set) -> bool:
+    meta = match.get("text") or {}
+    return match["id"] in relevant or (isinstance(meta, dict) and meta.get("doc_id") in relevant)
+
+
+def _context_chars(matches: list) -> int:
+    total = 0
+    for m in matches:
+        meta = m.get("text") or {}
+        total += len(meta.get("text") or "") if isinstance(meta, dict) else len(str(meta))
+    return total
+
+
+def run(path: str, modes: list, ks: list, org_id: str = None) -> None:
+    with open(path) as f:
+        queries = json.load(f)
+    max_k = max(ks)
+    print(f"{len(queries)} queries, sparse index has {len(sparse_index)} segments")
+    header = f"{'mode':<8}" + "".join(f"{'R@' + str(k):>8}" for k in ks) + f"{'MRR':>8}{'p50 ms':>9}{'p95 ms':>9}{'ctx chars@' + str(settings.retrieval_top_k):>15}{'stable':>8}"
+    print(header)
+    for mode in modes:
+        retrieve = _retriever(mode, org_id)
+        recalls = {k: [] for k in ks}
+        rr, latencies, chars = [], [], []
+        stable = True
+        for item in queries:
+            relevant = set(item["relevant"])
+            cats = item.get("categories")
+            started = time.perf_counter()
+            try:
+                matches = retrieve(item["query"], cats, max_k)
+            except Exception as e:
+                print(f"[{mode}] query failed: {item['query']!r}: {e}")
+                matches = []
+            latencies.append((time.perf_counter() - started) * 1000)
+            if mode != "dense":
+                # Sparse and fused rankings must not depend on dict or thread ordering.
+                again = retrieve(item["query"], cats, max_k)
+                stable = stable and [m["id"] for m in again] == [m["id"] for m in matches]
+            flags = [_is_relevant(m, relevant) for m in matches]
+            for k in ks:
+                found = {m["id"] for m, ok in zip(matches[:k], flags[:k]) if ok}
+                recalls[k].append(min(1.0, len(found) / max(1, len(relevant))))
+            rr.append(next((1.0 / (i + 1) for i, ok in enumerate(flags) if ok), 0.0))
+            chars.append(_context_chars(matches[:settings.retrieval_top_k]))
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0.0
+        row = f"{mode:<8}" + "".join(f"{statistics.mean(recalls[k]) if queries else 0:>8.3f}" for k in ks)
+        row += f"{statistics.mean(rr) if rr else 0:>8.3f}{statistics.median(latencies) if latencies else 0:>9.1f}{p95:>9.1f}"
+        row += f"{statistics.mean(chars) if chars else 0:>15.0f}{'yes' if stable else 'NO':>8}"
+        print(row)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("queries", help="Path to the labelled query set (JSON)")
+    parser.add_argument("--modes", default="dense,sparse,hybrid")
+    parser.add_argument("--ks", default="1,3,5,10")
+    parser.add_argument("--org", default=None)
+    args = parser.parse_args()
+    run(
+        args.queries,
+        [m.strip() for m in args.modes.split(",") if m.strip()],
+        [int(k) for k in args.ks.split(",")],
+        args.org,
+    )
@@ -0,0 +1,101 @@
+"""Compare recall and latency of the local NumPy vector store against Pinecone.
+
+Usage:
+    python src/scripts/benchmark_vector_store.py queries.json [--namespace org-<id>] [--ivf-lists 64] [--nprobe 8] [--top-k 10] [--runs 3]
+
+Copies one Pinecone namespace into a temporary local store (flat, and IVF
+when --ivf-lists > 0), then runs the same embedded queries against each
+backend. Overlap@k is measured against the Pinecone results; when the query
+set carries "relevant" labels (see benchmark_retrieval.py) recall@k against
+those is printed too.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+# Add the backend directory to sys.path to allow imports from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+try:
+    from src.config.settings import settings
+    from src.infrastructure.vector.embedder import embed_texts
+    from src.infrastructure.vector.store import LocalVectorStore, PineconeVectorStore
+except ImportError as e:
+    print(f"Error importing modules: {e}")
+    sys.exit(1)
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def _copy_namespace(source: PineconeVectorStore, targets, namespace: str) -> int:
+    copied = 0
+    for ids in source.list_ids(namespace=namespace):
+        vectors = list(source.fetch(ids, namespace=namespace).values())
+        for target in targets:
+            target.upsert(vectors, namespace=namespace)
+        copied += len(vectors)
+    return copied
+
+
+def _is_relevant(match: dict, relevant: set) -> bool:
+    return match["id"] in relevant or match["metadata"].get("doc_id") in relevant
+
+
+def run(path: str, namespace: str, ivf_lists: int, nprobe: int, top_k: int, runs: int) -> None:
+    with open(path) as f:
+        items = json.load(f)
+    items = [i if isinstance(i, dict) else {"query": i} for i in items]
+    vectors = embed_texts([i["query"] for i in items])
+
+    pinecone = PineconeVectorStore(settings.pinecone_api_key, settings.pinecone_index_name)
+    backends = {"pinecone": pinecone, "local flat": LocalVectorStore(None)}
+    if ivf_lists:
+        backends[f"local ivf{ivf_lists}/{nprobe}"] = LocalVectorStore(None, ivf_lists=ivf_lists, nprobe=nprobe)
+    locals_ = [store for name, store in backends.items() if name != "pinecone"]
+    copied = _copy_namespace(pinecone, locals_, namespace)
+    print(f"copied {copied} vectors from namespace {namespace or '(default)'}")
+    if ivf_lists and copied < ivf_lists * 39:
+        print(f"note: IVF needs at least {ivf_lists * 39} vectors to train; the IVF row is an exact scan")
+    for store in locals_:
+        # Trains the IVF quantizer outside the timed runs.
+        store.query(vectors[0], top_k=1, namespace=namespace)
+
+    baseline = {}
+    print(f"{'backend':<20}{'p50 ms':>9}{'p95 ms':>9}{'overlap@' + str(top_k):>12}{'R@' + str(top_k):>8}")
+    for name, store in backends.items():
+        latencies, overlaps, recalls = [], [], []
+        for _ in range(runs):
+            for i, (item, vector) in enumerate(zip(items, vectors)):
+                started = time.perf_counter()
+                matches = store.query(vector, top_k=top_k, namespace=namespace)
+                latencies.append((time.perf_counter() - started) * 1000)
+                ids = [m["id"] for m in matches]
+                if name == "pinecone":
+                    baseline.setdefault(i, ids)
+                if baseline.get(i):
+                    overlaps.append(len(set(ids) & set(baseline[i])) / len(baseline[i]))
+                if item.get("relevant"):
+                    relevant = set(item["relevant"])
+                    found = {m["id"] for m in matches if _is_relevant(m, relevant)}
+                    recalls.append(min(1.0, len(found) / len(relevant)))
+        overlap = f"{statistics.mean(overlaps):.3f}" if overlaps else "n/a"
+        recall = f"{statistics.mean(recalls):.3f}" if recalls else "n/a"
+        print(f"{name:<20}{statistics.median(latencies):>9.2f}{_percentile(latencies, 0.95):>9.2f}{overlap:>12}{recall:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("queries", help="Path to the query set (JSON)")
+    parser.add_argument("--namespace", default="")
+    parser.add_argument("--ivf-lists", type=int, default=0)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    run(args.queries, args.namespace, args.ivf_lists, args.nprobe, args.top_k, args.runs)
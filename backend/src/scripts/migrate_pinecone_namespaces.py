@@ -0,0 +1,103 @@
+"""Move vectors from the shared default namespace into per-org (or per-project) namespaces.
+
+Usage:
+    python src/scripts/migrate_pinecone_namespaces.py [--dry-run] [--keep-source] [--batch 100]
+
+Each vector's doc_id is resolved to its document's org/project in the database
+(one IN query per batch); the vector is re-upserted with org_id/project_id
+metadata into namespace_for(org, project) and, unless --keep-source, deleted
+from the default namespace afterwards. Vectors whose document is unknown (e.g.
+test ingests) are left where they are. The sparse index is re-tagged to match.
+Safe to re-run: upserts are idempotent and only the default namespace is read.
+"""
+import argparse
+import os
+import sys
+from collections import defaultdict
+
+# Add the backend directory to sys.path to allow imports from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+try:
+    from src.config.database import SessionLocal
+    from src.config.settings import settings
+    from src.infrastructure.database.models import Document
+    from src.infrastructure.vector.chunk_store import fetch_texts
+    from src.infrastructure.vector.client import DEFAULT_NAMESPACE, get_vector_store, namespace_for
+    from src.infrastructure.vector.sparse import sparse_index
+except ImportError as e:
+    print(f"Error importing modules: {e}")
+    sys.exit(1)
+
+
+def _owners(db, doc_ids, cache):
+    missing = [d for d in doc_ids if d not in cache]
+    if missing:
+        rows = db.query(Document.id, Document.org_id, Document.project_id).filter(Document.id.in_(missing)).all()
+        for doc_id, org_id, project_id in rows:
+            cache[doc_id] = (org_id, project_id)
+        for doc_id in missing:
+            cache.setdefault(doc_id, None)
+    return cache
+
+
+def migrate(batch: int, dry_run: bool, keep_source: bool) -> None:
+    if settings.pinecone_namespace_mode == "none":
+        print("pinecone_namespace_mode is 'none'; nothing to migrate.")
+        return
+    store = get_vector_store()
+    db = SessionLocal()
+    owners = {}
+    moved, unmapped = [], 0
+    per_namespace = defaultdict(int)
+    sparse_updates = []
+    try:
+        for ids in store.list_ids(namespace=DEFAULT_NAMESPACE, limit=batch):
+            vectors = store.fetch(ids, namespace=DEFAULT_NAMESPACE)
+            doc_ids = {v["metadata"].get("doc_id") for v in vectors.values()} - {None}
+            _owners(db, doc_ids, owners)
+            stored = fetch_texts(seg_id for seg_id, v in vectors.items() if not v["metadata"].get("text"))
+            grouped = defaultdict(list)
+            for seg_id, v in vectors.items():
+                meta = dict(v["metadata"])
+                owner = owners.get(meta.get("doc_id"))
+                if owner is None:
+                    unmapped += 1
+                    continue
+                org_id, project_id = owner
+                meta["org_id"] = org_id
+                if project_id:
+                    meta["project_id"] = project_id
+                grouped[namespace_for(org_id, project_id)].append({"id": seg_id, "values": v["values"], "metadata": meta})
+                text = meta.get("text") or stored.get(seg_id)
+                if text:
+                    sparse_updates.append((seg_id, text, meta))
+            for namespace, payload in grouped.items():
+                if not dry_run:
+                    store.upsert(vectors=payload, namespace=namespace)
+                per_namespace[namespace] += len(payload)
+                moved.extend(p["id"] for p in payload)
+            print(f"Processed {len(moved) + unmapped} vectors ({len(moved)} to move, {unmapped} unmapped)")
+    finally:
+        db.close()
+
+    if not dry_run:
+        if not keep_source:
+            # Deleted only after the listing is done so pagination is not disturbed.
+            for i in range(0, len(moved), 1000):
+                store.delete(ids=moved[i:i + 1000], namespace=DEFAULT_NAMESPACE)
+        sparse_index.add_segments(sparse_updates)
+
+    for namespace, count in sorted(per_namespace.items()):
+        print(f"  {namespace}: {count}")
+    action = "Would move" if dry_run else "Moved"
+    print(f"{action} {len(moved)} vectors into {len(per_namespace)} namespaces; {unmapped} left in the default namespace.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--keep-source", action="store_true", help="Leave the originals in the default namespace")
+    args = parser.parse_args()
+    migrate(args.batch, args.dry_run, args.keep_source)
@@ -0,0 +1,118 @@
+"""Report per-module import time for the app and, optionally, time until /health answers.
+
+Usage:
+    python src/scripts/profile_startup.py [--module src.main] [--top 25] [--serve] [--port 8765] [--max-seconds 1.0]
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and
+prints the slowest modules by cumulative and self time, plus the totals per
+top-level package. With --serve it also starts uvicorn and measures the time
+from process start to the first 200 from /health. --max-seconds makes the
+script exit non-zero when startup (or the import, without --serve) is slower.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+
+
+def profile_imports(module: str):
+    """(module, self_us, cumulative_us, depth) rows from -X importtime."""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            depth = (len(name) - len(name.lstrip())) // 2
+            rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+        except ValueError:
+            continue
+    if proc.returncode != 0:
+        errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        print("\n".join(errors[-15:]))
+    return rows, elapsed, proc.returncode
+
+
+def time_health(port: int, timeout: float = 60.0):
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if proc.poll() is not None:
+                return None
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.02)
+        return None
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def run(module: str, top: int, serve: bool, port: int, max_seconds: float) -> int:
+    rows, elapsed, returncode = profile_imports(module)
+    if not rows:
+        print("No import timings captured")
+        return 1
+    # Cumulative time of first-level imports adds up to the total without double counting.
+    total_us = sum(cumulative for _, _, cumulative, depth in rows if depth == 0)
+    print(f"import {module}: {total_us / 1e6:.3f}s in imports, {elapsed:.3f}s wall, {len(rows)} modules")
+
+    print(f"\nslowest {top} by cumulative time")
+    for name, self_us, cumulative_us, _ in sorted(rows, key=lambda r: -r[2])[:top]:
+        print(f"{cumulative_us / 1000:>10.1f} ms  {self_us / 1000:>8.1f} ms self  {name}")
+
+    packages = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        packages[name.split(".")[0]] += self_us
+    print(f"\nslowest {top} top-level packages by self time")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"{self_us / 1000:>10.1f} ms  {package}")
+
+    measured = elapsed
+    if serve:
+        ready = time_health(port)
+        if ready is None:
+            print("\nuvicorn did not answer /health")
+            return 1
+        print(f"\nfirst 200 from /health after {ready:.3f}s")
+        measured = ready
+    if returncode != 0:
+        return returncode
+    if max_seconds and measured > max_seconds:
+        print(f"startup took {measured:.3f}s, over the {max_seconds:.3f}s budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="src.main")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--serve", action="store_true")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-seconds", type=float, default=0.0)
+    args = parser.parse_args()
+    sys.exit(run(args.module, args.top, args.serve, args.port, args.max_seconds))
@@ -0,0 +1,53 @@
+"""Rebuild the BM25 sparse index from vector metadata and the chunk store.
+
+Usage:
+    python src/scripts/rebuild_sparse_index.py [--batch 100]
+
+Needed once for segments ingested before hybrid retrieval or before the index
+was sharded per org; new ingests update the index automatically. With Pinecone this needs a serverless index (list()).
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Add the backend directory to sys.path to allow imports from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+try:
+    from src.config.settings import settings
+    from src.infrastructure.vector.chunk_store import fetch_texts
+    from src.infrastructure.vector.client import get_vector_store
+    from src.infrastructure.vector.sparse import BM25Index
+except ImportError as e:
+    print(f"Error importing modules: {e}")
+    sys.exit(1)
+
+
+def rebuild(batch: int) -> None:
+    store = get_vector_store()
+    # Built without a path so the existing file is not merged in, then written once.
+    target = BM25Index(None)
+    segments = []
+    namespaces = list(store.namespaces()) or [""]
+    for namespace in namespaces:
+        for ids in store.list_ids(namespace=namespace, limit=batch):
+            fetched = store.fetch(ids, namespace=namespace)
+            stored = fetch_texts(seg_id for seg_id, v in fetched.items() if not v["metadata"].get("text"))
+            for seg_id, vector in fetched.items():
+                meta = dict(vector["metadata"])
+                text = meta.get("text") or stored.get(seg_id)
+                if text:
+                    segments.append((seg_id, text, meta))
+            print(f"Fetched {len(segments)} segments ({namespace or 'default'} namespace)...")
+    target.add_segments(segments, persist=False)
+    target.path = Path(settings.sparse_index_path)
+    target.save()
+    print(f"Sparse index rebuilt with {len(target)} segments at {settings.sparse_index_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch", type=int, default=100)
+    args = parser.parse_args()
+    rebuild(args.batch)
@@ -0,0 +1,32 @@
+import pytest_asyncio
+from sqlalchemy import BigInteger
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+
+import src.infrastructure.database.models  # noqa: F401  registers every table on Base.metadata
+from src.config.database import Base
+
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_bigint(type_, compiler, **kw):
+    # SQLite only autoincrements INTEGER PRIMARY KEY columns.
+    return "INTEGER"
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    """AsyncSession factory on a fresh SQLite database file with every table created.
+
+    A file rather than :memory: so that separate sessions see each other's commits.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def async_db(session_factory):
+    async with session_factory() as session:
+        yield session
@@ -0,0 +1,104 @@
+import pytest
+
+from src.application.conversations.answer_cache import (
+    CacheProbe,
+    SemanticAnswerCache,
+    context_fingerprint,
+    embed_query,
+    normalize_query,
+)
+
+
+def _cache(**kwargs):
+    options = dict(enabled=True, threshold=0.95, ttl_seconds=60, max_entries=100)
+    options.update(kwargs)
+    return SemanticAnswerCache(**options)
+
+
+def _probe(vector, org_id="org-1", fingerprint="fp", doc_ids=("doc-1",)):
+    return CacheProbe(org_id=org_id, agent_key="agent", fingerprint=fingerprint, vector=list(vector), doc_ids=list(doc_ids))
+
+
+def test_normalize_query_and_fingerprint():
+    assert normalize_query("  What is   OUR revenue?? ") == "what is our revenue"
+    assert context_fingerprint(["b", "a"], ["n1"]) == context_fingerprint(["a", "b"], ["n1"])
+    assert context_fingerprint(["a"], []) != context_fingerprint([], ["a"])
+
+
+@pytest.mark.parametrize("quantization", ["none", "int8"])
+def test_lookup_matches_close_queries_in_the_same_bucket(quantization):
+    if quantization != "none":
+        pytest.importorskip("numpy")
+    cache = _cache(quantization=quantization)
+    cache.store(_probe([1.0, 0.0, 0.0]), "answer", ["cite"])
+
+    hit = cache.lookup(_probe([0.99, 0.05, 0.0]))
+    assert hit is not None and hit.response == "answer" and hit.citations == ["cite"]
+    assert hit.similarity >= 0.95
+    assert cache.lookup(_probe([0.0, 1.0, 0.0])) is None
+    assert cache.lookup(_probe([1.0, 0.0, 0.0], fingerprint="other")) is None
+    assert cache.lookup(_probe([1.0, 0.0, 0.0], org_id="org-2")) is None
+
+
+def test_invalidation_and_expiry():
+    cache = _cache()
+    cache.store(_probe([1.0, 0.0], doc_ids=["doc-1"]), "one")
+    cache.store(_probe([1.0, 0.0], fingerprint="fp2", doc_ids=["doc-2"]), "two")
+    assert cache.invalidate_documents("org-1", ["doc-1"]) == 1
+    assert cache.lookup(_probe([1.0, 0.0])) is None
+    assert cache.lookup(_probe([1.0, 0.0], fingerprint="fp2")).response == "two"
+    cache.invalidate_org("org-1")
+    assert cache.lookup(_probe([1.0, 0.0], fingerprint="fp2")) is None
+
+    expired = _cache(ttl_seconds=-1)
+    expired.store(_probe([1.0, 0.0]), "stale")
+    assert expired.lookup(_probe([1.0, 0.0])) is None
+
+
+def test_eviction_keeps_the_cache_bounded():
+    cache = _cache(max_entries=3, per_bucket=2)
+    for i in range(3):
+        cache.store(_probe([1.0, 0.0]), f"a{i}")
+    # The bucket holds the two newest answers only.
+    assert [e.response for e in cache._buckets[("org-1", "agent", "fp")]] == ["a1", "a2"]
+    for i in range(3):
+        cache.store(_probe([1.0, 0.0], fingerprint=f"fp{i}"), f"b{i}")
+    assert cache._size <= 3
+    assert cache.lookup(_probe([1.0, 0.0], fingerprint="fp2")).response == "b2"
+
+
+@pytest.mark.asyncio
+async def test_embed_query_keeps_the_raw_query_for_retrieval(monkeypatch):
+    calls = []
+
+    def fake_embed_texts(texts, dimensions=None):
+        calls.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    from src.infrastructure.vector import embedder
+
+    monkeypatch.setattr(embedder, "embed_texts", fake_embed_texts)
+    retrieval, cache_vector = await embed_query("What is OUR revenue?")
+    assert calls == [["What is OUR revenue?", "what is our revenue"]]
+    assert retrieval == [20.0] and cache_vector == [19.0]
+
+    calls.clear()
+    retrieval, cache_vector = await embed_query("already normal")
+    assert calls == [["already normal"]] and retrieval == cache_vector
+
+
+def test_binary_quantization_replaces_an_unreachable_threshold():
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(0)
+    stored = rng.standard_normal(256)
+    paraphrase = stored + 0.2 * rng.standard_normal(256)
+
+    cache = _cache(quantization="binary", threshold=0.95, binary_threshold=0.7)
+    assert cache.threshold == 0.7
+    cache.store(_probe(stored), "answer")
+    hit = cache.lookup(_probe(paraphrase))
+    assert hit is not None and hit.response == "answer"
+    assert cache.lookup(_probe(rng.standard_normal(256))) is None
+
+    assert _cache(quantization="binary", threshold=0.6).threshold == 0.6
+    assert _cache(quantization="int8", threshold=0.95).threshold == 0.95
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from src.api.v1.conversations.streaming import ClientDisconnected, coalesce_chunks
+from src.application.conversations import service as service_module
+from src.application.conversations.service import ConversationService
+from src.domain.agents.base import ChatAgentResponse
+from src.infrastructure.database.models.agents import Agent, AgentType
+from src.infrastructure.database.models.conversations import Message, MessageRole, MessageStatus
+from src.infrastructure.database.models.projects import Project
+
+
+class _StalledAgent:
+    """Streams a few deltas, then waits on the provider until cancelled."""
+
+    cancelled = False
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def run_stream(self, ctx):
+        for delta in ("Hel", "lo"):
+            yield ChatAgentResponse(response=delta, tool_calls=[], citations=[])
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            _StalledAgent.cancelled = True
+            raise
+
+
+@pytest.mark.asyncio
+async def test_disconnect_keeps_the_partial_answer_as_cancelled(session_factory, monkeypatch):
+    async def enrich(self, org_id, user_id, query, *args):
+        return query, None, None
+
+    monkeypatch.setattr(ConversationService, "_enrich", enrich)
+    monkeypatch.setattr(service_module, "ExecuterAgent", _StalledAgent)
+    monkeypatch.setattr(service_module.conversation_summarizer, "schedule", lambda conversation_id: None)
+    async with session_factory() as db:
+        db.add(Project(id="proj-1", org_id="org-1", created_by="user-1", name="Project"))
+        db.add(Agent(id="agent-1", org_id="org-1", type=AgentType.GENERAL, name="general", display_name="General"))
+        await db.commit()
+
+    received = []
+
+    async def gone():
+        return len(received) >= 2
+
+    async with session_factory() as db:
+        stream = ConversationService(provider=None).chat_stream(
+            db, "user-1", "org-1", "hello?", "proj-1", None, None, None, None
+        )
+        with pytest.raises(ClientDisconnected):
+            async for chunk in coalesce_chunks(stream, max_delay=10.0, max_chars=1, is_disconnected=gone, disconnect_poll_interval=0.01):
+                received.append(chunk.response)
+
+    assert received == ["Hel", "lo"] and _StalledAgent.cancelled
+    async with session_factory() as db:
+        messages = (await db.execute(select(Message))).scalars().all()
+    messages.sort(key=lambda m: m.role != MessageRole.USER)
+    assert [(m.role, m.content, m.status) for m in messages] == [
+        (MessageRole.USER, "hello?", MessageStatus.SENT),
+        (MessageRole.ASSISTANT, "Hello", MessageStatus.CANCELLED),
+    ]
+    assert messages[1].agent_id == "agent-1"
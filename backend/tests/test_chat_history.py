@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from src.application.conversations.service import ConversationService
+from src.infrastructure.database.models.conversations import Conversation, Message, MessageRole
+from src.shared.pagination import decode_cursor, encode_cursor
+
+
+async def _seed(db, count):
+    db.add(Conversation(id="conv-1", project_id="proj-1", org_id="org-1"))
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for i in range(count):
+        # Every pair shares a timestamp so the id tiebreak is exercised.
+        db.add(
+            Message(
+                id=f"m{i:03d}",
+                conversation_id="conv-1",
+                project_id="proj-1",
+                org_id="org-1",
+                role=MessageRole.USER if i % 2 == 0 else MessageRole.ASSISTANT,
+                content=f"message {i}",
+                created_at=start + timedelta(seconds=i // 2),
+            )
+        )
+    await db.commit()
+    return [f"m{i:03d}" for i in range(count)]
+
+
+async def _page(db, **kwargs):
+    # The service only touches the provider when chatting.
+    return await ConversationService(provider=None).get_chat_history(db=db, org_id="org-1", project_id="proj-1", limit=4, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_pages_backwards_then_forwards_through_history(async_db):
+    ids = await _seed(async_db, 11)
+
+    first = await _page(async_db)
+    assert [m["id"] for m in first["messages"]] == ids[-4:]
+    assert first["has_more"] and first["next_cursor"] and first["newer_cursor"]
+
+    older, page = [], first
+    while page["next_cursor"]:
+        older = [m["id"] for m in page["messages"]] + older
+        page = await _page(async_db, before=page["next_cursor"])
+    older = [m["id"] for m in page["messages"]] + older
+    assert older == ids
+    assert page["has_more"] is False
+
+    # Forward from the oldest page back up to the newest message.
+    newer, cursor = [m["id"] for m in page["messages"]], page["newer_cursor"]
+    while True:
+        page = await _page(async_db, after=cursor)
+        newer += [m["id"] for m in page["messages"]]
+        assert page["next_cursor"] is not None
+        if not page["has_more"]:
+            break
+        cursor = page["newer_cursor"]
+    assert newer == ids
+    assert decode_cursor(page["newer_cursor"])[1] == ids[-1]
+
+    caught_up = await _page(async_db, after=page["newer_cursor"])
+    assert caught_up["messages"] == [] and caught_up["newer_cursor"] is None and not caught_up["has_more"]
+
+
+@pytest.mark.asyncio
+async def test_before_and_after_together_select_a_range(async_db):
+    ids = await _seed(async_db, 10)
+    rows = (await _page(async_db))["messages"]
+    everything = {m["id"]: m for m in rows}
+    page = await _page(
+        async_db,
+        after=encode_cursor(datetime(2024, 1, 1, tzinfo=timezone.utc), ids[0]),
+        before=encode_cursor(everything[ids[-1]]["created_at"], ids[-1]),
+    )
+    assert [m["id"] for m in page["messages"]] == ids[-5:-1]
+    assert page["has_more"] is True
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    created_at = datetime(2024, 5, 6, 7, 8, 9, 123456, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(created_at, "abc|def")) == (created_at, "abc|def")
+    assert decode_cursor(None) is None
+    with pytest.raises(HTTPException) as err:
+        decode_cursor("not a cursor!")
+    assert err.value.status_code == 400
@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.config import database
+from src.config.database import Base
+from src.config.settings import settings
+from src.infrastructure.database.models import DocumentChunk
+from src.infrastructure.vector import client, retriever, writer
+from src.infrastructure.vector.chunk_store import hydrate
+from src.infrastructure.vector.sparse import BM25Index
+from src.infrastructure.vector.store import LocalVectorStore
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'chunks.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(database, "SessionLocal", factory)
+    yield factory
+    engine.dispose()
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = LocalVectorStore(None)
+    monkeypatch.setattr(client, "_store", store)
+    monkeypatch.setattr(writer, "sparse_index", BM25Index(None))
+    monkeypatch.setattr(writer, "embed_texts", lambda texts: [[1.0, 0.0] for _ in texts])
+    monkeypatch.setattr(retriever, "embed_text", lambda text: [1.0, 0.0])
+    monkeypatch.setattr(settings, "pinecone_metadata_text", False)
+    monkeypatch.setattr(settings, "pinecone_namespace_mode", "org")
+    return store
+
+
+def _segment(text):
+    return {"doc_id": "d1", "doc_version": "v1", "segment_id": "s1", "category": "ops", "page_numbers": [3], "text": text}
+
+
+def test_segment_text_is_stored_in_document_chunks_and_read_back(db, store):
+    writer.upsert_segments_batch([_segment("first draft")], org_id="o1")
+    writer.upsert_segments_batch([_segment("Track inspection report")], org_id="o1")
+
+    vector = store.fetch(["d1:v1:s1"], namespace="org-o1")["d1:v1:s1"]
+    assert "text" not in vector["metadata"] and vector["metadata"]["org_id"] == "o1"
+    with db() as session:
+        rows = session.query(DocumentChunk).all()
+        # Re-ingesting the same vector id replaces its chunk row.
+        assert [(r.pinecone_id, r.document_id, r.chunk_text, r.page_number) for r in rows] == [
+            ("d1:v1:s1", "d1", "Track inspection report", 3)
+        ]
+
+    [match] = retriever.retrieve_context("inspection", org_id="o1")
+    assert match["text"]["text"] == "Track inspection report"
+    [raw] = retriever.retrieve_context("inspection", org_id="o1", hydrate_text=False)
+    assert "text" not in raw["text"]
+
+
+def test_hydrate_keeps_legacy_text_and_drops_missing_chunks(db):
+    legacy = {"id": "old", "text": {"doc_id": "d0", "text": "kept in metadata"}, "score": 0.9}
+    missing = {"id": "gone", "text": {"doc_id": "d0"}, "score": 0.5}
+    assert hydrate([legacy]) == [legacy]
+    assert hydrate([legacy, missing]) == [legacy]
@@ -0,0 +1,92 @@
+import sys
+import threading
+import time
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+from src.config.settings import settings
+from src.domain.agents.base import AgentConfig, ChatContext, TaskConfig, ToolCallEventType
+from src.infrastructure.agents.crewai_agent import CrewAborted, CrewAIChatAgent
+from src.infrastructure.llm.exceptions import LLMDeadlineExceededError
+from src.infrastructure.llm.retry import llm_deadline
+
+
+class _Crew:
+    """Stands in for crewai.Crew; `script` plays the run on the worker thread."""
+
+    script = None
+
+    def __init__(self, agents, tasks, step_callback, task_callback):
+        self.step_callback = step_callback
+        self.task_callback = task_callback
+
+    def kickoff(self):
+        return _Crew.script(self)
+
+
+@pytest.fixture
+def crewai(monkeypatch):
+    module = ModuleType("crewai")
+    module.Agent = lambda **kwargs: SimpleNamespace(**kwargs)
+    module.Task = lambda **kwargs: SimpleNamespace(**kwargs)
+    module.Crew = _Crew
+    monkeypatch.setitem(sys.modules, "crewai", module)
+    return _Crew
+
+
+def _agent():
+    task = TaskConfig(description="Answer", expected_output="An answer")
+    return CrewAIChatAgent(AgentConfig(role="Analyst", goal="Answer", backstory="", tasks=[task]))
+
+
+def _ctx():
+    return ChatContext(project_id="p1", query="q")
+
+
+@pytest.mark.asyncio
+async def test_steps_stream_as_tool_events_before_the_answer(crewai):
+    def script(crew):
+        crew.step_callback(SimpleNamespace(tool="search", tool_input={"q": "rail"}, thought="look it up", result="3 hits"))
+        crew.step_callback(SimpleNamespace(output="thinking"))
+        crew.task_callback(SimpleNamespace(raw="the answer"))
+        return SimpleNamespace(raw="the answer")
+
+    crewai.script = script
+    chunks = [chunk async for chunk in _agent().run_stream(_ctx())]
+
+    assert [(c.response, [e.event_type for e in c.tool_calls]) for c in chunks] == [
+        ("", [ToolCallEventType.CALL, ToolCallEventType.RESULT]),
+        ("the answer", []),
+    ]
+    call, result = chunks[0].tool_calls
+    assert call.call_id == result.call_id and call.tool_name == "search"
+    assert call.tool_call_details == {"input": {"q": "rail"}} and result.tool_response == "3 hits"
+
+
+@pytest.mark.asyncio
+async def test_timeout_raises_deadline_error_and_stops_the_worker(crewai, monkeypatch):
+    aborted = threading.Event()
+
+    def script(crew):
+        try:
+            while True:
+                crew.step_callback(SimpleNamespace())
+                time.sleep(0.01)
+        except CrewAborted:
+            aborted.set()
+            raise
+
+    crewai.script = script
+    monkeypatch.setattr(settings, "crewai_timeout_seconds", 0.05)
+    with pytest.raises(LLMDeadlineExceededError):
+        await _agent().run(_ctx())
+    assert aborted.wait(1.0)
+
+    aborted.clear()
+    monkeypatch.setattr(settings, "crewai_timeout_seconds", 60.0)
+    with llm_deadline(0.05):
+        with pytest.raises(LLMDeadlineExceededError):
+            async for _ in _agent().run_stream(_ctx()):
+                pass
+    assert aborted.wait(1.0)
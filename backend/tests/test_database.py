@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from src.config import database
+from src.config.database import SSL_MODES, _async_url, _asyncpg_ssl, _pool_kwargs, pool_status
+from src.config.settings import settings
+
+
+@pytest.mark.parametrize("mode", SSL_MODES)
+def test_every_libpq_sslmode_reaches_asyncpg(mode):
+    url = f"postgresql://u:p@db.internal:5432/app?application_name=api&sslmode={mode}"
+    assert _asyncpg_ssl(url) == mode
+    assert "sslmode" not in _async_url(url)
+
+
+def test_sslmode_defaults_and_validation():
+    assert _asyncpg_ssl("postgresql://u:p@db.internal/app") is None
+    assert _asyncpg_ssl("postgresql://u:p@db.abc.supabase.co/postgres") == "require"
+    assert _asyncpg_ssl("postgresql://u:p@db.abc.supabase.co/postgres?sslmode=disable") == "disable"
+    with pytest.raises(ValueError):
+        _asyncpg_ssl("postgresql://u:p@db.internal/app?sslmode=sometimes")
+
+
+def test_pool_budget_is_split_between_engines(monkeypatch):
+    monkeypatch.setattr(settings, "db_pool_size", 10)
+    monkeypatch.setattr(settings, "db_max_overflow", 20)
+    sync, async_ = _pool_kwargs(0.3), _pool_kwargs(0.7)
+    assert sync["pool_size"] + async_["pool_size"] == 10
+    assert sync["max_overflow"] + async_["max_overflow"] == 20
+    assert _pool_kwargs(0.0)["pool_size"] == 1
+
+
+def test_pool_status_uses_the_pools_own_overflow():
+    engine = create_engine("sqlite://", poolclass=QueuePool, pool_size=2, max_overflow=1)
+    conn = engine.connect()
+    try:
+        status = pool_status(engine.pool)
+    finally:
+        conn.close()
+        engine.dispose()
+    assert status["capacity"] == 3 and status["checked_out"] == 1
+    assert status["saturation"] == round(1 / 3, 3)
+    assert pool_status(database.async_engine.pool)["pool"]
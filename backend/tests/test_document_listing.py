@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException, Response
+
+from src.api.v1.documents.routes import list_documents
+from src.application.documents.service import DocumentService
+from src.infrastructure.database.models import Document, DocumentScope, DocumentStatus, DocumentType, UserStatus
+from src.infrastructure.database.repositories.document_repository import DocumentRepository
+from src.infrastructure.security.principal_cache import Principal
+
+USER = Principal(id="u1", email="ada@example.com", org_id="org-1", role_id="r1", status=UserStatus.ACTIVE)
+
+
+async def _seed(db):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for i in range(7):
+        # Every pair shares a timestamp so the id tiebreak is exercised.
+        db.add(
+            Document(
+                id=f"d{i:02d}",
+                org_id="org-1",
+                uploaded_by="u1",
+                filename=f"f{i}.pdf",
+                original_filename=f"f{i}.pdf",
+                file_type=DocumentType.PDF if i % 2 == 0 else DocumentType.TXT,
+                file_size_bytes=10,
+                storage_path=f"s3://bucket/f{i}",
+                status=DocumentStatus.INGESTED if i < 5 else DocumentStatus.FAILED,
+                scope=DocumentScope.ORGANIZATION,
+                category="finance" if i % 3 == 0 else "ops",
+                tags=["rail", "2024"] if i % 2 == 0 else ["rail"],
+                created_at=start + timedelta(seconds=i // 2),
+            )
+        )
+    db.add(
+        Document(
+            id="other-org",
+            org_id="org-2",
+            uploaded_by="u2",
+            filename="x.pdf",
+            original_filename="x.pdf",
+            file_type=DocumentType.PDF,
+            file_size_bytes=10,
+            storage_path="s3://bucket/x",
+            created_at=start,
+        )
+    )
+    await db.commit()
+    return [f"d{i:02d}" for i in range(7)]
+
+
+async def _list(db, **kwargs):
+    response = Response()
+    svc = DocumentService(DocumentRepository(db), graph=object())
+    docs = await list_documents(
+        response,
+        **{"limit": 3, "cursor": None, "status": None, "category": None, "file_type": None, "scope": None, "tags": None, **kwargs},
+        svc=svc,
+        current_user=USER,
+    )
+    return [d.id for d in docs], response.headers.get("X-Next-Cursor")
+
+
+@pytest.mark.asyncio
+async def test_cursor_walks_every_document_of_the_org_newest_first(async_db):
+    ids = await _seed(async_db)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = await _list(async_db, cursor=cursor)
+        seen += page
+        if cursor is None:
+            break
+    assert seen == ids[::-1]
+
+    with pytest.raises(HTTPException) as exc:
+        await _list(async_db, cursor="not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_filters_combine_with_pagination(async_db):
+    await _seed(async_db)
+
+    assert (await _list(async_db, status=DocumentStatus.FAILED))[0] == ["d06", "d05"]
+    assert (await _list(async_db, file_type=DocumentType.TXT, limit=10))[0] == ["d05", "d03", "d01"]
+    assert (await _list(async_db, category="finance", limit=10))[0] == ["d06", "d03", "d00"]
+    assert (await _list(async_db, tags="rail, 2024", limit=10))[0] == ["d06", "d04", "d02", "d00"]
+
+    first, cursor = await _list(async_db, tags="2024", limit=2)
+    assert first == ["d06", "d04"] and cursor
+    assert (await _list(async_db, tags="2024", limit=2, cursor=cursor)) == (["d02", "d00"], None)
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from src.infrastructure.llm.exceptions import CircuitOpenError, LLMDeadlineExceededError
+from src.infrastructure.llm.failover import LatencyTracker, call_hedged, call_with_failover, should_fail_over
+
+
+@pytest.mark.asyncio
+async def test_call_with_failover_moves_on_only_for_recoverable_errors():
+    attempts = []
+
+    async def attempt(model):
+        attempts.append(model)
+        if model == "a":
+            raise Exception("503 service unavailable")
+        return model
+
+    assert await call_with_failover(["a", "b", "c"], attempt) == "b"
+    assert attempts == ["a", "b"]
+
+    async def invalid(model):
+        attempts.append(model)
+        raise ValueError("invalid request")
+
+    attempts.clear()
+    with pytest.raises(ValueError):
+        await call_with_failover(["a", "b"], invalid)
+    assert attempts == ["a"]
+
+    async def deadline(model):
+        raise LLMDeadlineExceededError("out of time")
+
+    with pytest.raises(LLMDeadlineExceededError):
+        await call_with_failover(["a", "b"], deadline)
+    assert should_fail_over(CircuitOpenError("openai", 1.0))
+
+
+@pytest.mark.asyncio
+async def test_hedged_call_returns_the_first_success_and_cancels_the_other():
+    cancelled = []
+
+    def call(result, delay, fail=False):
+        async def run():
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(result)
+                raise
+            if fail:
+                raise Exception("server_error")
+            return result
+
+        return run
+
+    assert await call_hedged(call("primary", 0.0), call("secondary", 0.0), hedge_after=1.0) == "primary"
+    assert await call_hedged(call("primary", 1.0), call("secondary", 0.0), hedge_after=0.01) == "secondary"
+    await asyncio.sleep(0)
+    assert cancelled == ["primary"]
+    # A recoverable primary failure sends the secondary straight away.
+    assert await call_hedged(call("primary", 0.0, fail=True), call("secondary", 0.0), hedge_after=1.0) == "secondary"
+    with pytest.raises(Exception, match="server_error"):
+        await call_hedged(call("primary", 0.0, fail=True), call("secondary", 0.0, fail=True), hedge_after=1.0)
+
+
+def test_latency_tracker_percentiles_need_enough_samples():
+    tracker = LatencyTracker(window=10)
+    assert tracker.p95("m") is None
+    for seconds in range(1, 21):
+        tracker.record("m", float(seconds))
+    assert tracker.p95("m", min_samples=11) is None
+    assert tracker.percentile("m", 0.0) == 11.0
+    assert tracker.p95("m") == 20.0
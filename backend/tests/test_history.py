@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+import src.config.database as database
+from src.application.conversations import history
+from src.application.conversations.history import ConversationSummarizer, build_history_window
+from src.infrastructure.database.models.conversations import Conversation, Message, MessageRole
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+async def _seed(db, contents):
+    db.add(Conversation(id="conv-1", project_id="proj-1", org_id="org-1"))
+    for i, content in enumerate(contents):
+        db.add(
+            Message(
+                id=f"m{i:03d}",
+                conversation_id="conv-1",
+                project_id="proj-1",
+                org_id="org-1",
+                role=MessageRole.USER if i % 2 == 0 else MessageRole.ASSISTANT,
+                content=content,
+                created_at=START + timedelta(seconds=i),
+            )
+        )
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_window_is_chronological_and_bounded_by_turns_and_tokens(async_db):
+    await _seed(async_db, ["x" * 40] * 6)  # 11 estimated tokens each
+    window = await build_history_window(async_db, "conv-1", token_budget=1000, max_turns=4)
+    assert [m.role for m in window] == ["user", "assistant", "user", "assistant"]
+    assert len(await build_history_window(async_db, "conv-1", token_budget=25, max_turns=10)) == 2
+
+
+@pytest.mark.asyncio
+async def test_oversized_newest_message_is_truncated_to_the_budget(async_db):
+    await _seed(async_db, ["short question", "y" * 4000])
+    window = await build_history_window(async_db, "conv-1", token_budget=100, max_turns=10)
+    assert len(window) == 1
+    assert window[0].role == "assistant"
+    assert window[0].content.endswith("[truncated]") and len(window[0].content) <= 400
+
+
+@pytest.mark.asyncio
+async def test_summarizer_folds_exactly_the_messages_older_than_the_window(session_factory, monkeypatch):
+    monkeypatch.setattr(database, "AsyncSessionLocal", session_factory)
+    async with session_factory() as db:
+        await _seed(db, [f"message {i}" for i in range(10)])
+
+    summarizer = ConversationSummarizer(window_turns=4, token_budget=1000, min_new_messages=1, max_words=50)
+    meta, rows = await summarizer._pending("conv-1")
+    assert meta["org_id"] == "org-1" and meta["summary"] is None
+    assert [content for _, content, _ in rows] == [f"message {i}" for i in range(6)]
+
+    await summarizer._store("conv-1", "summary so far", rows[-1][2])
+    _, rows = await summarizer._pending("conv-1")
+    assert rows == []
+
+    # A tighter token budget shrinks the window, so more falls outside it.
+    tight = ConversationSummarizer(window_turns=4, token_budget=3, min_new_messages=1, max_words=50)
+    _, rows = await tight._pending("conv-1")
+    assert [content for _, content, _ in rows] == ["message 6", "message 7", "message 8"]
+
+    async with session_factory() as db:
+        conv = (await db.execute(select(Conversation))).scalar_one()
+        assert conv.summary == "summary so far"
+
+
+class _Summarizer:
+    def __init__(self):
+        self.prompts = []
+
+    async def call_llm(self, messages, config_type):
+        self.prompts.append(messages[0]["content"])
+        return f"summary {len(self.prompts)}"
+
+
+@pytest.mark.asyncio
+async def test_backlog_is_folded_in_bounded_batches(session_factory, monkeypatch):
+    monkeypatch.setattr(database, "AsyncSessionLocal", session_factory)
+    llm = _Summarizer()
+    monkeypatch.setattr(history.ProviderService, "create", staticmethod(lambda **kwargs: llm))
+    async with session_factory() as db:
+        await _seed(db, [f"message {i}" for i in range(12)])
+
+    summarizer = ConversationSummarizer(
+        window_turns=2, token_budget=1000, min_new_messages=1, max_words=50, batch_messages=4, batch_tokens=1000
+    )
+    await summarizer.refresh("conv-1")
+    assert "message 3" in llm.prompts[0] and "message 4" not in llm.prompts[0]
+    async with session_factory() as db:
+        conv = (await db.execute(select(Conversation))).scalar_one()
+        assert conv.summary == "summary 1"
+        assert conv.summary_generated_at.replace(tzinfo=timezone.utc) == START + timedelta(seconds=3)
+
+    await summarizer.refresh("conv-1")
+    await summarizer.refresh("conv-1")
+    assert "summary 1" in llm.prompts[1] and "message 4" in llm.prompts[1] and "message 8" in llm.prompts[2]
+    await summarizer.refresh("conv-1")
+    assert len(llm.prompts) == 3
+
+
+def test_fold_batch_respects_the_token_budget_and_timestamp_ties():
+    later = START + timedelta(seconds=1)
+    rows = [(MessageRole.USER, "x" * 40, START), (MessageRole.ASSISTANT, "y" * 40, later), (MessageRole.USER, "z" * 40, later)]
+    # The budget cuts between two messages sharing a timestamp, so both wait for the next batch.
+    assert history._fold_batch(rows, token_budget=25, max_messages=10) == rows[:1]
+    assert history._fold_batch(rows, token_budget=40, max_messages=10) == rows
+    assert history._fold_batch(rows, token_budget=40, max_messages=2) == rows[:1]
+    oversized = history._fold_batch([(MessageRole.USER, "w" * 4000, START)], token_budget=10, max_messages=10)
+    assert oversized[0][1].endswith("[truncated]") and len(oversized[0][1]) <= 40
@@ -0,0 +1,47 @@
+from types import MappingProxyType
+
+import pytest
+
+from src.infrastructure.llm.exceptions import UnknownModelError
+from src.infrastructure.llm.llm_config import MODEL_CONFIG_MAP, LLMConfigRegistry, LLMEnvironment
+
+
+def _registry(**overrides):
+    fields = dict(
+        chat_model=None,
+        inference_model=None,
+        api_base=None,
+        api_version=None,
+        capability_overrides=MappingProxyType({}),
+        multimodal_enabled=False,
+    )
+    fields.update(overrides)
+    return LLMConfigRegistry(LLMEnvironment(**fields))
+
+
+def test_resolve_returns_shared_configs_for_known_models():
+    registry = _registry()
+    model = next(iter(MODEL_CONFIG_MAP))
+    assert registry.resolve("chat", model) is registry.resolve("chat", model)
+    assert registry.resolve("chat", None).model == registry.default_model("chat")
+    assert registry.resolve("chat", "null").model == registry.default_model("chat")
+
+
+def test_unknown_override_is_rejected_and_not_cached():
+    registry = _registry()
+    with pytest.raises(UnknownModelError):
+        registry.resolve("chat", "openai/made-up-model")
+    assert not registry.is_known("openai/made-up-model")
+    # Internal lookups still work, without growing the registry.
+    assert registry.get("openai/made-up-model").model == "openai/made-up-model"
+    assert not registry.is_known("openai/made-up-model")
+
+
+def test_allow_list_and_defaults_are_known():
+    registry = _registry(chat_model="ollama/llama3", allowed_models=frozenset({"openai/custom-ft"}))
+    assert registry.resolve("chat", "openai/custom-ft").model == "openai/custom-ft"
+    assert registry.resolve("chat", "ollama/llama3").model == "ollama/llama3"
+
+    registry.set_defaults(inference_model="openai/admin-pick")
+    assert registry.resolve("inference").model == "openai/admin-pick"
+    assert registry.is_known("openai/admin-pick")
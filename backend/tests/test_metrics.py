@@ -0,0 +1,26 @@
+import pytest
+
+from src.infrastructure.observability.metrics import parse_networks, scrape_allowed
+
+NETWORKS = parse_networks("127.0.0.0/8, ::1/128, 10.0.0.0/8, not-a-network")
+
+
+def test_parse_networks_skips_invalid_entries():
+    assert [str(n) for n in NETWORKS] == ["127.0.0.0/8", "::1/128", "10.0.0.0/8"]
+
+
+@pytest.mark.parametrize(
+    "host, headers, expected",
+    [
+        ("127.0.0.1", {}, True),
+        ("::1", {}, True),
+        ("10.2.3.4", {}, True),
+        ("203.0.113.7", {}, False),
+        ("10.2.3.4", {"x-forwarded-for": "203.0.113.7"}, False),
+        ("10.2.3.4", {"forwarded": "for=203.0.113.7"}, False),
+        ("testclient", {}, False),
+        (None, {}, False),
+    ],
+)
+def test_scrape_allowed(host, headers, expected):
+    assert scrape_allowed(host, headers, NETWORKS) is expected
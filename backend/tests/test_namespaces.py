@@ -0,0 +1,64 @@
+import pytest
+
+from src.config.settings import settings
+from src.infrastructure.vector import client, retriever, writer
+from src.infrastructure.vector.client import namespace_for, read_namespaces
+from src.infrastructure.vector.sparse import BM25Index
+from src.infrastructure.vector.store import LocalVectorStore
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = LocalVectorStore(None)
+    sparse = BM25Index(None)
+    monkeypatch.setattr(client, "_store", store)
+    monkeypatch.setattr(writer, "sparse_index", sparse)
+    monkeypatch.setattr(retriever, "sparse_index", sparse)
+    # Every text embeds to the same vector, so a query returns its whole namespace.
+    monkeypatch.setattr(writer, "embed_texts", lambda texts: [[1.0, 0.0, 0.0, 0.0] for _ in texts])
+    monkeypatch.setattr(retriever, "embed_text", lambda text: [1.0, 0.0, 0.0, 0.0])
+    monkeypatch.setattr(settings, "pinecone_metadata_text", True)
+    monkeypatch.setattr(settings, "pinecone_namespace_mode", "org")
+    return store
+
+
+def _segments(doc_id, text="Track inspection report"):
+    return [
+        {"doc_id": doc_id, "doc_version": "v1", "segment_id": "s1", "category": "ops", "page_numbers": [1], "text": text},
+    ]
+
+
+def test_namespace_modes(monkeypatch):
+    monkeypatch.setattr(settings, "pinecone_namespace_mode", "org")
+    assert namespace_for("o1", "p1") == "org-o1"
+    assert namespace_for(None) == ""
+    assert read_namespaces("o1", "p1") == ["org-o1"]
+
+    monkeypatch.setattr(settings, "pinecone_namespace_mode", "project")
+    assert namespace_for("o1", "p1") == "org-o1:proj-p1"
+    assert read_namespaces("o1", "p1") == ["org-o1:proj-p1", "org-o1"]
+
+    monkeypatch.setattr(settings, "pinecone_namespace_mode", "none")
+    assert namespace_for("o1", "p1") == "" and read_namespaces("o1") == [""]
+
+
+def test_writes_and_queries_stay_inside_the_org_namespace(store):
+    writer.upsert_segments_batch(_segments("d1"), org_id="o1")
+    writer.upsert_segments_batch(_segments("d2"), org_id="o2")
+    assert store.namespaces() == {"org-o1": 1, "org-o2": 1}
+
+    for org_id, expected in (("o1", ["d1:v1:s1"]), ("o2", ["d2:v1:s1"]), ("o3", [])):
+        assert [m["id"] for m in retriever.retrieve_context("inspection", org_id=org_id)] == expected
+        assert [m["id"] for m in retriever.retrieve_hybrid("inspection", org_id=org_id)] == expected
+
+
+def test_project_mode_reads_the_project_and_org_namespaces(store, monkeypatch):
+    monkeypatch.setattr(settings, "pinecone_namespace_mode", "project")
+    writer.upsert_segments_batch(_segments("org-wide"), org_id="o1")
+    writer.upsert_segments_batch(_segments("p1-doc"), org_id="o1", project_id="p1")
+    writer.upsert_segments_batch(_segments("p2-doc"), org_id="o1", project_id="p2")
+
+    dense = retriever.retrieve_context("inspection", org_id="o1", project_id="p1", top_k=10)
+    assert sorted(m["id"] for m in dense) == ["org-wide:v1:s1", "p1-doc:v1:s1"]
+    hybrid = retriever.retrieve_hybrid("inspection", org_id="o1", project_id="p1", top_k=10)
+    assert sorted(m["id"] for m in hybrid) == ["org-wide:v1:s1", "p1-doc:v1:s1"]
@@ -0,0 +1,42 @@
+import pytest
+from sqlalchemy import func, select
+
+from src.application.conversations.service import ConversationService
+from src.infrastructure.database.models.conversations import Conversation, Message, MessageRole, MessageStatus
+from src.infrastructure.database.models.projects import Project
+
+
+def _reply(conv, org_id):
+    return Message(
+        conversation_id=conv.id,
+        project_id=conv.project_id,
+        org_id=org_id,
+        role=MessageRole.ASSISTANT,
+        content="reply",
+        status=MessageStatus.SENT,
+        total_tokens=10,
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_turns_share_one_conversation(session_factory):
+    async with session_factory() as db:
+        db.add(Project(id="proj-1", org_id="org-1", created_by="user-1", name="Project"))
+        await db.commit()
+
+    service = ConversationService(provider=None)
+    async with session_factory() as first, session_factory() as second:
+        # Both turns start before either has written its conversation.
+        _, conv_a, new_a, _ = await service._prepare_turn(first, "org-1", "proj-1", None)
+        _, conv_b, new_b, _ = await service._prepare_turn(second, "org-1", "proj-1", None)
+        assert new_a and new_b and conv_a.id != conv_b.id
+
+        await service._persist_turn(first, conv_a, new_a, service._new_user_message(conv_a, "org-1", "user-1", "q1", None), _reply(conv_a, "org-1"))
+        await service._persist_turn(second, conv_b, new_b, service._new_user_message(conv_b, "org-1", "user-1", "q2", None), _reply(conv_b, "org-1"))
+
+    assert conv_b.id == conv_a.id
+    async with session_factory() as db:
+        conversations = (await db.execute(select(Conversation))).scalars().all()
+        assert [(c.id, c.message_count, c.total_tokens_used) for c in conversations] == [(conv_a.id, 4, 20)]
+        messages = (await db.execute(select(func.count()).select_from(Message).where(Message.conversation_id == conv_a.id))).scalar()
+        assert messages == 4
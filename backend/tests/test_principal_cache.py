@@ -0,0 +1,109 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.api import dependencies
+from src.config.database import Base
+from src.config.settings import settings
+from src.infrastructure.database.models import User, UserStatus
+from src.infrastructure.security import principal_cache as principal_cache_module
+from src.infrastructure.security.principal_cache import Principal, PrincipalCache, principal_cache
+from src.infrastructure.security.token_provider import JoseJwtTokenProvider
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(principal_cache_module.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "auth_stateless_claims", False)
+    principal_cache.clear()
+    engine = create_engine(f"sqlite:///{tmp_path / 'auth.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(id="u1", org_id="o1", role_id="r1", email="ada@example.com", hashed_password="x"))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+    principal_cache.clear()
+
+
+def _principal(user_id="u1"):
+    return Principal(id=user_id, email=f"{user_id}@example.com", org_id="o1", role_id="r1", status=UserStatus.ACTIVE)
+
+
+def test_entries_expire_after_the_ttl_or_the_token(clock):
+    cache = PrincipalCache(ttl_seconds=60, max_entries=10)
+    cache.put("k", _principal())
+    assert cache.get("k") == _principal()
+    clock.now += 60
+    assert cache.get("k") is None
+
+    cache.put("already-expired", _principal(), token_exp=0)
+    assert cache.get("already-expired") is None
+
+
+def test_invalidate_user_drops_every_token_of_that_user(clock):
+    cache = PrincipalCache(ttl_seconds=60, max_entries=10)
+    cache.put("a", _principal("u1"))
+    cache.put("b", _principal("u1"))
+    cache.put("c", _principal("u2"))
+    cache.invalidate_user("u1")
+    assert cache.get("a") is None and cache.get("b") is None
+    assert cache.get("c") == _principal("u2")
+
+
+def test_full_cache_evicts_the_oldest_entry(clock):
+    cache = PrincipalCache(ttl_seconds=60, max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, _principal(key))
+    assert cache.get("a") is None
+    assert cache.get("b") is not None and cache.get("c") is not None
+
+
+def test_get_current_user_reads_the_database_once_per_token(db, monkeypatch):
+    lookups = []
+    get_by_email = dependencies.UserRepository.get_by_email
+
+    def counting(self, email):
+        lookups.append(email)
+        return get_by_email(self, email)
+
+    monkeypatch.setattr(dependencies.UserRepository, "get_by_email", counting)
+    token = JoseJwtTokenProvider().create("ada@example.com")
+
+    first = dependencies.get_current_user(token=token, db=db)
+    second = dependencies.get_current_user(token=token, db=db)
+    assert first == second and first.id == "u1" and first.org_id == "o1"
+    assert lookups == ["ada@example.com"]
+
+
+def test_updating_the_user_invalidates_the_cached_principal(db):
+    token = JoseJwtTokenProvider().create("ada@example.com")
+    assert dependencies.get_current_user(token=token, db=db).status == UserStatus.ACTIVE
+
+    db.get(User, "u1").status = UserStatus.SUSPENDED
+    db.commit()
+    assert dependencies.get_current_user(token=token, db=db).status == UserStatus.SUSPENDED
+    with pytest.raises(HTTPException):
+        dependencies.get_current_active_user(dependencies.get_current_user(token=token, db=db))
+
+    db.delete(db.get(User, "u1"))
+    db.commit()
+    with pytest.raises(HTTPException) as exc:
+        dependencies.get_current_user(token=token, db=db)
+    assert exc.value.status_code == 401
@@ -0,0 +1,89 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Optional
+
+import pytest
+from pydantic import BaseModel
+
+from src.config.settings import settings
+from src.infrastructure.llm import provider_service
+from src.infrastructure.llm.provider_service import ProviderService
+
+
+@pytest.fixture
+def fallbacks(monkeypatch):
+    for name in ("LLM_API_KEY", "OPENAI_API_KEY", "ANTHROPIC_API_KEY", "OPENROUTER_API_KEY"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(settings, "llm_failover_enabled", True)
+    monkeypatch.setattr(settings, "llm_max_fallbacks", 3)
+    monkeypatch.setattr(
+        settings,
+        "llm_chat_fallback_models",
+        "anthropic/claude-sonnet-4-5-20250929,openai/gpt-4o,openrouter/google/gemini-2.0-flash-001",
+    )
+    return monkeypatch
+
+
+def _chain(model="openai/gpt-4.1"):
+    return [c.model for c in ProviderService("user-1", chat_model=model)._fallback_chain("chat")]
+
+
+def test_generic_key_only_covers_the_primary_provider(fallbacks):
+    fallbacks.setenv("LLM_API_KEY", "generic")
+    assert _chain() == ["openai/gpt-4.1", "openai/gpt-4o"]
+
+
+def test_other_providers_need_their_own_key(fallbacks):
+    fallbacks.setenv("LLM_API_KEY", "generic")
+    fallbacks.setenv("ANTHROPIC_API_KEY", "anthropic-key")
+    assert _chain() == ["openai/gpt-4.1", "anthropic/claude-sonnet-4-5-20250929", "openai/gpt-4o"]
+    service = ProviderService("user-1")
+    assert service._get_api_key("anthropic") == "anthropic-key"
+    assert service._get_api_key("openai") == "generic"
+
+
+def test_failover_disabled_and_fallback_cap(fallbacks):
+    fallbacks.setenv("OPENAI_API_KEY", "k")
+    fallbacks.setenv("ANTHROPIC_API_KEY", "k")
+    fallbacks.setenv("OPENROUTER_API_KEY", "k")
+    fallbacks.setattr(settings, "llm_max_fallbacks", 1)
+    assert _chain() == ["openai/gpt-4.1", "anthropic/claude-sonnet-4-5-20250929"]
+    fallbacks.setattr(settings, "llm_failover_enabled", False)
+    assert _chain() == ["openai/gpt-4.1"]
+
+
+class _Intent(BaseModel):
+    category: str
+    confidence: Optional[float] = None
+    reason: Optional[str] = None
+
+
+@pytest.mark.asyncio
+async def test_cancelled_hedge_loser_still_records_usage(fallbacks):
+    fallbacks.setenv("OPENAI_API_KEY", "k")
+    fallbacks.setenv("ANTHROPIC_API_KEY", "k")
+    fallbacks.setattr(settings, "llm_max_fallbacks", 1)
+    fallbacks.setattr(settings, "llm_hedge_default_delay", 0.01)
+    fallbacks.setattr(settings, "llm_hedge_min_samples", 10**6)
+    fallbacks.setattr(provider_service, "_get_instructor", lambda: None)
+    records, consumed = [], []
+    fallbacks.setattr(provider_service, "record_usage", records.append)
+    fallbacks.setattr(provider_service.quota_engine, "consume", lambda org_id, tokens: consumed.append((org_id, tokens)))
+
+    async def acompletion(messages, model, **kwargs):
+        if model.startswith("openai/"):
+            await asyncio.sleep(5)
+        usage = {"prompt_tokens": 20, "completion_tokens": 5}
+        return SimpleNamespace(usage=usage, choices=[SimpleNamespace(message=SimpleNamespace(content='{"category": "FAST"}'))])
+
+    fallbacks.setattr(provider_service, "acompletion", acompletion)
+    service = ProviderService("user-1", chat_model="openai/gpt-4.1", org_id="org-1")
+    result = await service.call_llm_with_structured_output([{"role": "user", "content": "x" * 400}], _Intent, hedge=True)
+    await asyncio.sleep(0.01)
+
+    assert result.category == "FAST"
+    by_status = {r.status: r for r in records}
+    assert set(by_status) == {"success", "cancelled"}
+    loser = by_status["cancelled"]
+    assert loser.model == "openai/gpt-4.1" and loser.prompt_tokens > 100 and loser.metadata["estimated_tokens"]
+    assert sorted(tokens for _, tokens in consumed) == [25, loser.prompt_tokens]
@@ -0,0 +1,46 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.infrastructure.vector import quantization
+from src.infrastructure.vector.quantization import bytes_per_vector, check_mode, dequantize, quantize, scores
+
+
+def _unit_rows(n, dim, seed=0):
+    rows = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def test_check_mode():
+    assert check_mode("int8") == "int8"
+    with pytest.raises(ValueError):
+        check_mode("int4")
+
+
+def test_int8_round_trip_is_close_and_binary_keeps_signs():
+    rows = _unit_rows(4, 64)
+    codes, scales = quantize(rows, "int8")
+    assert codes.dtype == np.int8 and scales.shape == (4,)
+    assert np.abs(dequantize(codes, scales, "int8", 64) - rows).max() < 0.01
+
+    codes, scales = quantize(rows, "binary")
+    assert codes.shape == (4, 8) and scales is None
+    signs = dequantize(codes, None, "binary", 64)
+    assert np.array_equal(signs > 0, rows > 0)
+    assert np.allclose(np.linalg.norm(signs, axis=1), 1.0)
+
+
+@pytest.mark.parametrize("mode, tolerance", [("none", 1e-6), ("int8", 0.01), ("binary", 0.5)])
+def test_scores_track_exact_dot_products(mode, tolerance, monkeypatch):
+    monkeypatch.setattr(quantization, "_BLOCK_ROWS", 7)
+    rows = _unit_rows(50, 96)
+    query = rows[3]
+    codes, scales = quantize(rows, mode)
+    got = scores(codes, scales, mode, 96, query)
+    assert np.abs(got - rows @ query).max() < tolerance
+    assert int(np.argmax(got)) == 3
+
+
+def test_bytes_per_vector():
+    assert [bytes_per_vector(mode, 1024) for mode in ("none", "int8", "binary")] == [4096, 1028, 128]
+    assert bytes_per_vector("binary", 9) == 2
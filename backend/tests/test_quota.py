@@ -0,0 +1,65 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from src.infrastructure.llm.exceptions import QuotaExceededError
+from src.infrastructure.llm.quota import (
+    InMemoryQuotaStore,
+    QuotaEngine,
+    current_period,
+    period_start,
+    seconds_until_period_end,
+)
+
+
+def _engine(limits=None, usage=None, enabled=True):
+    store = InMemoryQuotaStore()
+    store.sync(current_period(), limits or {}, usage or {})
+    return QuotaEngine(store, refresh_interval=60.0, enabled=enabled)
+
+
+def test_period_boundaries():
+    now = datetime(2025, 12, 31, 23, 0, tzinfo=timezone.utc)
+    assert current_period(now) == "2025-12"
+    assert period_start(now) == datetime(2025, 12, 1, tzinfo=timezone.utc)
+    assert seconds_until_period_end(now) == 3600.0
+
+
+def test_check_blocks_once_local_usage_reaches_the_limit():
+    engine = _engine(limits={"org-1": 100, "org-unlimited": None}, usage={"org-1": 90})
+    engine.check("org-1")
+    assert engine.remaining("org-1") == 10
+    engine.consume("org-1", 10)
+    with pytest.raises(QuotaExceededError) as exc:
+        engine.check("org-1")
+    assert (exc.value.limit, exc.value.used) == (100, 100) and exc.value.retry_after > 0
+    assert engine.remaining("org-1") == 0
+
+    engine.consume("org-unlimited", 10**9)
+    engine.check("org-unlimited")
+    engine.check(None)
+    assert engine.remaining("org-unlimited") is None
+    _engine(limits={"org-1": 1}, usage={"org-1": 5}, enabled=False).check("org-1")
+
+
+def test_sync_keeps_counters_that_are_ahead_of_the_database():
+    store = InMemoryQuotaStore()
+    period = current_period()
+    store.add_usage("org-1", period, 50)
+    store.add_usage("org-1", "2000-01", 999)
+    store.sync(period, {"org-1": 100}, {"org-1": 20, "org-2": 70})
+    assert store.get_usage("org-1", period) == 50
+    assert store.get_usage("org-2", period) == 70
+    assert store.get_usage("org-1", "2000-01") == 0
+    store.sync(period, {"org-1": 100}, {"org-1": 80})
+    assert store.get_usage("org-1", period) == 80
+
+
+@pytest.mark.asyncio
+async def test_refresh_loads_limits_and_usage(monkeypatch):
+    engine = _engine()
+    monkeypatch.setattr(engine, "_load", lambda: ({"org-1": 10}, {"org-1": 10}))
+    engine.check("org-1")
+    await engine.refresh()
+    with pytest.raises(QuotaExceededError):
+        engine.check("org-1")
@@ -0,0 +1,95 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Response
+
+import src.main
+from src.infrastructure.health import readiness
+from src.infrastructure.health.readiness import ReadinessChecker
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    # Only the module's view of time: the event loop needs the real monotonic clock.
+    monkeypatch.setattr(readiness, "time", SimpleNamespace(monotonic=clock, perf_counter=time.perf_counter))
+    return clock
+
+
+def _probe(calls, name, ok=True, delay=0.0, error=None):
+    async def probe():
+        calls.append(name)
+        if delay:
+            await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return ok, {"name": name}
+
+    return probe
+
+
+@pytest.mark.asyncio
+async def test_report_is_cached_until_it_ages_out(clock):
+    calls = []
+    checker = ReadinessChecker({"database": _probe(calls, "database")}, ["database"], cache_seconds=5, timeout_seconds=1)
+
+    first = await checker.check()
+    assert first["status"] == "ready" and first["cached"] is False
+    assert first["checks"]["database"]["detail"] == {"name": "database"}
+
+    clock.now += 4
+    cached = await checker.check()
+    assert cached["cached"] is True and cached["age_seconds"] == 4 and calls == ["database"]
+
+    clock.now += 1
+    assert (await checker.check())["cached"] is False
+    assert calls == ["database", "database"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_in_flight_check(clock):
+    calls = []
+    checker = ReadinessChecker({"database": _probe(calls, "database", delay=0.05)}, ["database"], cache_seconds=5, timeout_seconds=1)
+    reports = await asyncio.gather(*(checker.check() for _ in range(5)))
+    assert calls == ["database"]
+    assert sorted(r["cached"] for r in reports) == [False, True, True, True, True]
+
+
+@pytest.mark.asyncio
+async def test_only_required_probes_make_the_worker_unready(clock):
+    calls = []
+    probes = {
+        "database": _probe(calls, "database"),
+        "llm": _probe(calls, "llm", ok=False),
+        "graph": _probe(calls, "graph", error=RuntimeError("refused")),
+        "vector": _probe(calls, "vector", delay=1.0),
+    }
+    report = await ReadinessChecker(probes, ["database"], cache_seconds=0, timeout_seconds=0.05).check()
+    assert report["status"] == "degraded" and report["ready"] is True
+    checks = report["checks"]
+    assert checks["graph"]["error"] == "RuntimeError: refused"
+    assert checks["vector"]["error"] == "timed out after 0.05s"
+    assert [name for name, c in checks.items() if not c["ok"]] == ["llm", "graph", "vector"]
+
+    report = await ReadinessChecker(probes, ["database", "graph"], cache_seconds=0, timeout_seconds=0.05).check()
+    assert report["status"] == "unready" and report["ready"] is False
+
+
+@pytest.mark.asyncio
+async def test_ready_endpoint_returns_503_when_unready(clock, monkeypatch):
+    calls = []
+    checker = ReadinessChecker({"database": _probe(calls, "database", ok=False)}, ["database"], cache_seconds=0, timeout_seconds=1)
+    monkeypatch.setattr(src.main, "readiness_checker", checker)
+    response = Response()
+    report = await src.main.readiness_check(response)
+    assert response.status_code == 503 and report["status"] == "unready"
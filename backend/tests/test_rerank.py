@@ -0,0 +1,57 @@
+import pytest
+
+from src.application.reasoning import rerank
+from src.application.reasoning.rerank import relevance_scores, rerank_and_pack
+from src.config.settings import settings
+
+
+@pytest.fixture(autouse=True)
+def lexical_scoring(monkeypatch):
+    monkeypatch.setattr(settings, "rerank_model", "")
+    monkeypatch.setattr(settings, "rerank_dense_weight", 0.5)
+    monkeypatch.setattr(settings, "rerank_mmr_lambda", 0.7)
+    monkeypatch.setattr(settings, "rerank_duplicate_threshold", 0.8)
+    monkeypatch.setattr(rerank, "_cross_encoder", None)
+
+
+def _match(seg_id, text, dense=None, doc_id="d1", pages=(1,)):
+    return {"id": seg_id, "text": {"text": text, "doc_id": doc_id, "page_numbers": list(pages)}, "dense_score": dense}
+
+
+def test_relevance_blends_normalised_dense_and_lexical_overlap():
+    matches = [_match("a", "ballast replacement budget", dense=0.9), _match("b", "signal maintenance", dense=0.5)]
+    assert relevance_scores("ballast budget", matches) == [1.0, 0.0]
+    assert relevance_scores("signal budget", [_match("c", "signal", dense=None)]) == [0.25]
+
+
+def test_near_duplicates_from_the_same_pages_are_dropped():
+    text = "ballast replacement budget overrun on the northern line"
+    matches = [
+        _match("a", text, dense=0.9),
+        _match("b", text + " today", dense=0.8),
+        _match("c", text + " today", dense=0.8, doc_id="d2"),
+        _match("d", text + " today", dense=0.8, pages=(7,)),
+    ]
+    assert [m["id"] for m in rerank_and_pack("ballast budget", matches, top_k=4, token_budget=1000)] == ["a", "c", "d"]
+
+
+def test_mmr_prefers_new_information_over_redundancy(monkeypatch):
+    monkeypatch.setattr(settings, "rerank_mmr_lambda", 0.3)
+    matches = [
+        _match("a", "ballast budget overrun northern line", dense=1.0, doc_id="d1"),
+        _match("b", "ballast budget overrun northern section", dense=0.95, doc_id="d2"),
+        _match("c", "ballast budget approved by finance", dense=0.9, doc_id="d3"),
+    ]
+    assert [m["id"] for m in rerank_and_pack("ballast budget", matches, top_k=2, token_budget=1000)] == ["a", "c"]
+    monkeypatch.setattr(settings, "rerank_mmr_lambda", 1.0)
+    assert [m["id"] for m in rerank_and_pack("ballast budget", matches, top_k=2, token_budget=1000)] == ["a", "b"]
+
+
+def test_token_budget_skips_segments_that_do_not_fit():
+    matches = [
+        _match("long", "ballast budget " * 40, dense=1.0),
+        _match("short", "ballast budget summary", dense=0.5, doc_id="d2"),
+    ]
+    packed = rerank_and_pack("ballast budget", matches, top_k=2, token_budget=20)
+    assert [m["id"] for m in packed] == ["short"]
+    assert rerank_and_pack("anything", [], top_k=3, token_budget=10) == []
@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+
+from src.infrastructure.llm import retry
+from src.infrastructure.llm.exceptions import CircuitOpenError, LLMDeadlineExceededError, RetryBudgetExhaustedError
+from src.infrastructure.llm.retry import CircuitBreaker, RetryBudget, RetrySettings, llm_deadline, robust_llm_call
+
+_NO_BACKOFF = RetrySettings(max_retries=3, min_delay=0.0, base_delay=0.0, max_delay=0.0, jitter_factor=0.0)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(retry.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setattr(retry, "_budgets", {})
+    monkeypatch.setattr(retry, "_breakers", {})
+    monkeypatch.setattr(retry, "retry_metrics", retry.RetryMetrics())
+
+
+class _Client:
+    """Minimal owner: robust_llm_call resolves the provider through _routing_provider_for."""
+
+    def __init__(self, outcomes, delay=0.0):
+        self.outcomes = list(outcomes)
+        self.delay = delay
+        self.calls = 0
+
+    def _routing_provider_for(self, **kwargs):
+        return "openai"
+
+    @robust_llm_call(_NO_BACKOFF)
+    async def call(self):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        outcome = self.outcomes.pop(0) if self.outcomes else "ok"
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def test_retry_budget_earns_tokens_per_request_and_caps_them():
+    budget = RetryBudget(ratio=0.5, min_tokens=1.0, max_tokens=2.0)
+    assert budget.try_acquire()
+    assert not budget.try_acquire()
+    budget.record_request()
+    assert not budget.try_acquire()
+    budget.record_request()
+    assert budget.try_acquire()
+    for _ in range(10):
+        budget.record_request()
+    assert budget.tokens == 2.0
+
+
+def test_circuit_opens_after_threshold_and_lets_one_probe_through(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30.0)
+    breaker.record_overload()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_overload()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.retry_after() == 30.0
+
+    clock.now += 30.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_overload()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now += 30.0
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow_request()
+
+
+def test_other_failures_do_not_trip_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0)
+    breaker.record_other_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_recoverable_errors_are_retried_until_success():
+    client = _Client([Exception("503 service unavailable"), Exception("rate limit exceeded"), "done"])
+    assert await client.call() == "done"
+    assert client.calls == 3
+    snapshot = retry.get_resilience_snapshot()["openai"]
+    assert snapshot["calls"] == 1 and snapshot["retries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_unrecoverable_errors_and_exhausted_retries_raise():
+    client = _Client([ValueError("invalid request")])
+    with pytest.raises(ValueError):
+        await client.call()
+    assert client.calls == 1
+
+    client = _Client([Exception("timeout")] * 5)
+    with pytest.raises(Exception, match="timeout"):
+        await client.call()
+    assert client.calls == _NO_BACKOFF.max_retries + 1
+
+
+@pytest.mark.asyncio
+async def test_empty_retry_budget_stops_retrying(monkeypatch):
+    monkeypatch.setattr(retry.app_settings, "llm_retry_budget_min_tokens", 0.0)
+    monkeypatch.setattr(retry.app_settings, "llm_retry_budget_ratio", 0.0)
+    client = _Client([Exception("server_error")])
+    with pytest.raises(RetryBudgetExhaustedError):
+        await client.call()
+    assert client.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_rejects_without_calling(monkeypatch):
+    monkeypatch.setattr(retry.app_settings, "llm_circuit_failure_threshold", 1)
+    client = _Client([Exception("429 rate limit exceeded")])
+    # The overload opens the circuit, so the retry is rejected instead of sent.
+    with pytest.raises(CircuitOpenError):
+        await client.call()
+    with pytest.raises(CircuitOpenError):
+        await client.call()
+    assert client.calls == 1
+    assert retry.get_resilience_snapshot()["openai"]["circuit_rejections"] == 2
+
+
+@pytest.mark.asyncio
+async def test_deadline_bounds_the_call():
+    client = _Client(["late"], delay=1.0)
+    with llm_deadline(0.05):
+        with pytest.raises(LLMDeadlineExceededError):
+            await client.call()
+    with llm_deadline(10):
+        with llm_deadline(60):
+            assert 0 < retry.remaining_time() <= 10
+    assert retry.remaining_time() is None
+
+
+@pytest.mark.asyncio
+async def test_timeouts_without_an_expired_deadline_are_retried():
+    client = _Client([asyncio.TimeoutError(), asyncio.TimeoutError(), "done"])
+    assert await client.call() == "done"
+    assert client.calls == 3
+
+    client = _Client([asyncio.TimeoutError(), "done"])
+    with llm_deadline(10):
+        assert await client.call() == "done"
+    assert client.calls == 2
+    assert retry.get_resilience_snapshot()["openai"].get("deadline_exceeded", 0) == 0
@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+
+import pytest
+
+from src.config.settings import settings
+from src.infrastructure.vector.sparse import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+@pytest.fixture(autouse=True)
+def org_namespaces(monkeypatch):
+    monkeypatch.setattr(settings, "pinecone_namespace_mode", "org")
+
+
+def _index(path=None):
+    index = BM25Index(str(path) if path else None)
+    index.add_segments(
+        [
+            ("d1:v1:s1", "Track inspection report BNSF-2024-017 for the northern line", {"doc_id": "d1", "org_id": "o1"}),
+            ("d1:v1:s2", "Budget overrun of 12.5% on ballast replacement", {"doc_id": "d1", "org_id": "o1", "category": "finance"}),
+            ("d3:v1:s1", "Inspection of the southern depot", {"doc_id": "d3", "org_id": "o1"}),
+            ("d2:v1:s1", "Inspection schedule for signalling and track circuits", {"doc_id": "d2", "org_id": "o2"}),
+        ]
+    )
+    return index
+
+
+def test_tokenize_keeps_identifiers_and_their_parts():
+    assert tokenize("The BNSF-2024-017 report, 12.5% of it") == ["bnsf-2024-017", "bnsf", "2024", "017", "report", "12.5%", "12", "5"]
+
+
+def test_search_ranks_rare_terms_and_stays_in_the_org_shard():
+    index = _index()
+    assert [m["id"] for m in index.search("BNSF-2024-017 inspection", top_k=3, org_id="o1")] == ["d1:v1:s1", "d3:v1:s1"]
+    assert [m["id"] for m in index.search("inspection track", top_k=3, org_id="o2")] == ["d2:v1:s1"]
+    assert [m["id"] for m in index.search("budget ballast", top_k=3, org_id="o1", categories=["finance"])] == ["d1:v1:s2"]
+    assert index.search("inspection", top_k=3) == []
+    assert index.search("the of and", top_k=3, org_id="o1") == []
+    assert len(index.search("inspection track", top_k=1, org_id="o1")) == 1
+    assert len(index) == 4
+
+
+def test_shards_are_separate_files_and_reload_from_disk(tmp_path):
+    index = _index(tmp_path)
+    assert sorted(p.name for p in tmp_path.glob("*.json")) == ["org-o1.json", "org-o2.json"]
+    assert index.remove_document("d1", org_id="o1") == 2
+    assert index.remove_document("d2") == 1
+
+    reloaded = BM25Index(str(tmp_path))
+    assert len(reloaded) == 1
+    assert [m["id"] for m in reloaded.search("inspection", top_k=3, org_id="o1")] == ["d3:v1:s1"]
+    assert reloaded.search("inspection", top_k=3, org_id="o2") == []
+
+
+def test_other_process_writes_are_picked_up(tmp_path):
+    writer = BM25Index(str(tmp_path))
+    reader = BM25Index(str(tmp_path))
+    writer.add_segments([("a", "ballast budget", {"org_id": "o1"})])
+    assert [m["id"] for m in reader.search("ballast", top_k=3, org_id="o1")] == ["a"]
+    writer.add_segments([("b", "ballast tamping", {"org_id": "o1"})])
+    assert [m["id"] for m in reader.search("tamping", top_k=3, org_id="o1")] == ["b"]
+
+
+def _add_many(path, prefix, count):
+    index = BM25Index(path)
+    for i in range(count):
+        index.add_segments([(f"{prefix}{i}", f"segment {prefix} number {i}", {"org_id": "o1"})])
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_concurrent_writer_processes_do_not_lose_segments(tmp_path):
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_add_many, args=(str(tmp_path), prefix, 25)) for prefix in "ab"]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join(30)
+    assert [w.exitcode for w in workers] == [0, 0]
+    assert len(BM25Index(str(tmp_path))) == 50
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d", "c"]], k=60)
+    assert [item_id for item_id, _ in fused] == ["b", "c", "a", "d"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+    # Equal scores break on id.
+    assert [item_id for item_id, _ in reciprocal_rank_fusion([["y"], ["x"]])] == ["x", "y"]
@@ -0,0 +1,20 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+HEAVY_MODULES = ("litellm", "crewai", "pinecone")
+
+
+def test_importing_the_app_does_not_load_heavy_sdks():
+    # A fresh interpreter: other tests in this process may already have imported them.
+    script = f"import json, sys, src.main; print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=Path(__file__).resolve().parents[1],
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
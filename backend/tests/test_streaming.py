@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from src.api.v1.conversations.streaming import (
+    HEARTBEAT,
+    SSE_HEARTBEAT,
+    ClientDisconnected,
+    coalesce_chunks,
+    sse_frames,
+)
+from src.domain.agents.base import ChatAgentResponse, ToolCallEventType, ToolCallResponse
+
+
+def _text(value):
+    return ChatAgentResponse(response=value, tool_calls=[], citations=[])
+
+
+def _tool():
+    call = ToolCallResponse(
+        call_id="c1", event_type=ToolCallEventType.CALL, tool_name="search", tool_response="", tool_call_details={}
+    )
+    return ChatAgentResponse(response="", tool_calls=[call], citations=[])
+
+
+async def _source(items, delay=0.0):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+@pytest.mark.asyncio
+async def test_deltas_merge_until_max_chars_and_tool_events_flush():
+    items = [_text("ab"), _text("cd"), _text("ef"), _text("g"), _tool(), _text(""), _text("h")]
+    out = await _collect(coalesce_chunks(_source(items), max_delay=10.0, max_chars=5))
+    assert [(c.response, len(c.tool_calls)) for c in out] == [("abcdef", 0), ("g", 0), ("", 1), ("h", 0)]
+
+
+@pytest.mark.asyncio
+async def test_pending_text_is_flushed_after_max_delay():
+    out = await _collect(coalesce_chunks(_source([_text("a"), _text("b")], delay=0.05), max_delay=0.01, max_chars=100))
+    assert [c.response for c in out] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_while_the_source_is_idle():
+    out = await _collect(
+        coalesce_chunks(_source([_text("a")], delay=0.08), max_delay=0.01, max_chars=100, heartbeat_interval=0.02)
+    )
+    assert HEARTBEAT in out and out[-1].response == "a"
+    assert sse_frames(HEARTBEAT) == [SSE_HEARTBEAT]
+    assert sse_frames(_text("hi")) == [b'event: delta\ndata: {"t":"hi"}\n\n']
+
+
+@pytest.mark.asyncio
+async def test_source_errors_surface_after_pending_text():
+    out = []
+    with pytest.raises(RuntimeError, match="boom"):
+        async for chunk in coalesce_chunks(_source([_text("partial"), RuntimeError("boom")]), max_delay=10.0, max_chars=100):
+            out.append(chunk)
+    assert [c.response for c in out] == ["partial"]
+
+
+@pytest.mark.asyncio
+async def test_disconnect_cancels_the_source():
+    cancelled = asyncio.Event()
+
+    async def endless():
+        try:
+            while True:
+                yield _text("x")
+                await asyncio.sleep(0.01)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def gone():
+        return True
+
+    with pytest.raises(ClientDisconnected):
+        await _collect(
+            coalesce_chunks(endless(), max_delay=0.01, max_chars=100, is_disconnected=gone, disconnect_poll_interval=0.02)
+        )
+    assert cancelled.is_set()
@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+import src.config.database as database
+import src.infrastructure.database.models  # noqa: F401
+from src.config.database import Base
+from src.infrastructure.database.models.logs import LLMUsageLog
+from src.infrastructure.database.models.organizations import Organization
+from src.infrastructure.llm import usage
+from src.infrastructure.llm.usage import UsageRecord, UsageRecorder, estimate_cost, tokens_from_usage, usage_scope
+
+
+def _record(**kwargs):
+    return UsageRecord(provider="openai", model="openai/gpt-4o", endpoint="completion", prompt_tokens=10, completion_tokens=5, **kwargs)
+
+
+def test_ring_buffer_drops_oldest_and_batches():
+    recorder = UsageRecorder(capacity=3, batch_size=2, flush_interval=1.0)
+    recorder.record_many([_record(org_id=str(i)) for i in range(5)])
+    assert len(recorder) == 3 and recorder.dropped == 2
+    assert [r.org_id for r in recorder._take_batch()] == ["2", "3"]
+    assert [r.org_id for r in recorder._take_batch()] == ["4"]
+    assert recorder._take_batch() == []
+
+
+def test_scopes_attribute_and_nest(monkeypatch):
+    drained = []
+    monkeypatch.setattr(usage.usage_recorder, "record_many", drained.extend)
+    with usage_scope(org_id="org-1", project_id="proj-1") as outer:
+        with usage_scope(conversation_id="conv-1") as inner:
+            inner.add(_record())
+            inner.message_id = "msg-1"
+        outer.add(_record(org_id="org-explicit"))
+        assert outer.total_tokens == 30
+    assert [(r.org_id, r.project_id, r.conversation_id, r.message_id) for r in drained] == [
+        ("org-1", "proj-1", "conv-1", "msg-1"),
+        ("org-explicit", "proj-1", None, None),
+    ]
+
+
+def test_token_and_cost_helpers():
+    assert tokens_from_usage({"input_tokens": 3, "output_tokens": 4}) == (3, 4)
+    assert tokens_from_usage(None) == (0, 0)
+    assert estimate_cost("openai/gpt-4o", 1_000_000, 0) == 2.5
+    assert estimate_cost("unknown/model", 1, 1) is None
+
+
+@pytest.fixture
+def usage_db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'usage.db'}")
+    event.listen(engine, "connect", lambda conn, _: conn.execute("PRAGMA foreign_keys=ON"))
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        db.add(Organization(id="org-1", name="Org", slug="org"))
+        db.commit()
+    monkeypatch.setattr(database, "SessionLocal", factory)
+    yield factory
+    engine.dispose()
+
+
+def test_bad_reference_does_not_lose_the_batch(usage_db):
+    recorder = UsageRecorder(capacity=10, batch_size=10, flush_interval=1.0)
+    recorder._write_batch(
+        [
+            _record(org_id="org-1"),
+            _record(org_id="org-1", conversation_id="never-committed"),
+            _record(org_id="missing-org"),
+            _record(),
+        ]
+    )
+    assert (recorder.written, recorder.failed, recorder.skipped) == (2, 1, 1)
+    with usage_db() as db:
+        rows = db.execute(select(LLMUsageLog).order_by(LLMUsageLog.id)).scalars().all()
+    assert [r.conversation_id for r in rows] == [None, None]
+    assert rows[1].metadata_ == {"detached_references": {"conversation_id": "never-committed"}}
@@ -0,0 +1,125 @@
+import multiprocessing
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.infrastructure.vector.store import LocalVectorStore, matches_filter
+
+
+def _vector(vid, values, **metadata):
+    return {"id": vid, "values": values, "metadata": metadata}
+
+
+@pytest.mark.parametrize("quantization", ["none", "int8", "binary"])
+def test_upsert_with_duplicate_ids_keeps_last(tmp_path, quantization):
+    store = LocalVectorStore(str(tmp_path), quantization=quantization)
+    store.upsert([_vector("a", [1.0, 0.0, 0.0, 0.0], n=1)])
+    store.upsert(
+        [
+            _vector("b", [0.0, 1.0, 0.0, 0.0], n=1),
+            _vector("b", [0.0, 0.0, 1.0, 0.0], n=2),
+            _vector("a", [0.0, 0.0, 0.0, 1.0], n=3),
+        ]
+    )
+
+    assert store.namespaces() == {"": 2}
+    fetched = store.fetch(["a", "b"])
+    assert fetched["b"]["metadata"] == {"n": 2}
+    assert fetched["a"]["metadata"] == {"n": 3}
+    assert store.query([0.0, 0.0, 1.0, 0.0], top_k=1)[0]["id"] == "b"
+
+    reopened = LocalVectorStore(str(tmp_path), quantization=quantization)
+    assert sorted(i for ids in reopened.list_ids() for i in ids) == ["a", "b"]
+
+
+def test_failed_upsert_leaves_namespace_untouched():
+    store = LocalVectorStore(None)
+    store.upsert([_vector("a", [1.0, 0.0, 0.0])])
+    with pytest.raises(ValueError):
+        store.upsert([_vector("b", [1.0, 0.0])])
+    assert list(store.list_ids()) == [["a"]]
+    assert store.query([1.0, 0.0, 0.0], top_k=5)[0]["id"] == "a"
+
+
+def test_query_filter_delete_and_update_metadata():
+    store = LocalVectorStore(None)
+    store.upsert(
+        [
+            _vector("a", [1.0, 0.0], kind="doc"),
+            _vector("b", [0.9, 0.1], kind="note"),
+            _vector("c", [0.0, 1.0], kind="doc"),
+        ],
+        namespace="org-1",
+    )
+    assert [m["id"] for m in store.query([1.0, 0.0], top_k=3, namespace="org-1")] == ["a", "b", "c"]
+    assert [m["id"] for m in store.query([1.0, 0.0], top_k=3, namespace="org-1", filter={"kind": "doc"})] == ["a", "c"]
+    assert store.query([1.0, 0.0], top_k=3) == []
+
+    store.update_metadata("c", {"kind": "note"}, namespace="org-1")
+    store.delete(["a"], namespace="org-1")
+    assert [m["id"] for m in store.query([1.0, 0.0], top_k=3, namespace="org-1", filter={"kind": "note"})] == ["b", "c"]
+
+
+def test_other_process_writes_are_picked_up(tmp_path):
+    writer = LocalVectorStore(str(tmp_path))
+    reader = LocalVectorStore(str(tmp_path))
+    writer.upsert([_vector("a", [1.0, 0.0])])
+    assert reader.namespaces() == {"": 1}
+    writer.upsert([_vector("b", [0.0, 1.0])])
+    assert reader.query([0.0, 1.0], top_k=1)[0]["id"] == "b"
+
+
+def test_ivf_search_finds_the_nearest_cluster():
+    rng = np.random.default_rng(1)
+    store = LocalVectorStore(None, ivf_lists=4, nprobe=1)
+    centers = np.eye(8)[:4]
+    rows = np.vstack([c + 0.05 * rng.standard_normal((50, 8)) for c in centers])
+    store.upsert([_vector(str(i), row.tolist(), cluster=i // 50) for i, row in enumerate(rows)])
+    matches = store.query(centers[2].tolist(), top_k=5)
+    assert {m["metadata"]["cluster"] for m in matches} == {2}
+
+
+@pytest.mark.parametrize(
+    "metadata, filter, expected",
+    [
+        ({"kind": "doc"}, None, True),
+        ({"kind": "doc"}, {"kind": "doc"}, True),
+        ({"kind": "doc"}, {"kind": {"$ne": "doc"}}, False),
+        ({"kind": "doc"}, {"kind": {"$in": ["doc", "note"]}}, True),
+        ({"kind": "doc"}, {"kind": {"$nin": ["doc"]}}, False),
+        ({"tags": ["a", "b"]}, {"tags": "b"}, True),
+        ({"tags": ["a", "b"]}, {"tags": {"$nin": ["c"]}}, True),
+        ({"kind": "doc"}, {"missing": "x"}, False),
+        ({"kind": "doc", "org": 1}, {"$and": [{"kind": "doc"}, {"org": 1}]}, True),
+        ({"kind": "doc", "org": 1}, {"$and": [{"kind": "doc"}, {"org": 2}]}, False),
+        ({"kind": "doc"}, {"$or": [{"kind": "note"}, {"kind": "doc"}]}, True),
+        ({"kind": "doc"}, {"$or": [{"kind": "note"}, {"kind": "sheet"}]}, False),
+    ],
+)
+def test_matches_filter(metadata, filter, expected):
+    assert matches_filter(metadata, filter) is expected
+
+
+def test_matches_filter_rejects_unknown_operators():
+    with pytest.raises(ValueError):
+        matches_filter({"n": 1}, {"n": {"$gt": 0}})
+
+
+def _upsert_many(path, prefix, count):
+    store = LocalVectorStore(path)
+    for i in range(count):
+        store.upsert([_vector(f"{prefix}{i}", [1.0, float(i)])])
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_concurrent_writer_processes_do_not_lose_upserts(tmp_path):
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_upsert_many, args=(str(tmp_path), prefix, 25)) for prefix in "ab"]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join(30)
+    assert [w.exitcode for w in workers] == [0, 0]
+    assert LocalVectorStore(str(tmp_path)).namespaces() == {"": 50}